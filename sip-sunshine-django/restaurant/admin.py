@@ -1,12 +1,26 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.core.exceptions import ValidationError
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
 from parler.admin import TranslatableAdmin
 from .models import (
     Language, SiteSetting, Page, MenuItem, ContentBlock,
-    BlogPost, Reservation, ContactMessage, Order, OrderItem,
-    Cart, DeliverySettings, PaymentSettings
+    BlogPost, Reservation, ContactMessage, Order, OrderConflict, OrderItem,
+    Cart, DeliverySettings, DeliveryZone, PaymentSettings, PickupSlot, SalesRollup, MenuItemSalesRollup,
+    DiningTable, ReservationSettings
 )
+from .carts import line_quantity
+from .exports import CONTENT_TYPES, export_orders
+from .menu_index import get_menu_name_index
+from .money import round_money
+from .order_status import transition_orders
+from .pagination import EstimatedCountPaginator
+from .reservations import ReservationUnavailable, check_seating
 
 
 
@@ -80,6 +94,8 @@ class MenuItemAdmin(TranslatableAdmin):
     list_filter = ('category', 'is_active', 'created_at')
     search_fields = ('name', 'description')
     ordering = ('category', 'order')
+    # Autocomplete searches match at most this many names from the index
+    autocomplete_limit = 200
     
     fieldsets = (
         (_('Basic Information'), {
@@ -116,6 +132,17 @@ class MenuItemAdmin(TranslatableAdmin):
         return format_html('<span style="background: #dc3545; color: white; padding: 3px 8px; border-radius: 3px;">Inactive</span>')
     get_status.short_description = 'Status'
 
+    def get_search_results(self, request, queryset, search_term):
+        if getattr(request.resolver_match, 'url_name', None) != 'autocomplete':
+            return super().get_search_results(request, queryset, search_term)
+        # Order line autocomplete: match names in the cached index, then
+        # load the page with its translations in one extra query
+        queryset = queryset.prefetch_related('translations')
+        if search_term:
+            ids = get_menu_name_index().search(search_term, self.autocomplete_limit)
+            queryset = queryset.filter(pk__in=ids)
+        return queryset, False
+
 
 @admin.register(ContentBlock)
 class ContentBlockAdmin(TranslatableAdmin):
@@ -161,21 +188,51 @@ class BlogPostAdmin(TranslatableAdmin):
     )
 
 
+class ReservationAdminForm(forms.ModelForm):
+    """Refuses date, time, party size or un-cancel changes no table can take"""
+
+    class Meta:
+        model = Reservation
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # self.instance still holds the row as read for this request
+        moved = set(self.changed_data) & {'reservation_date', 'reservation_time', 'number_of_guests'}
+        uncancelled = self.instance.pk and self.instance.status == 'cancelled'
+        if self.errors or cleaned_data.get('status', self.instance.status) == 'cancelled':
+            return cleaned_data
+        if not (moved or uncancelled or not self.instance.pk):
+            return cleaned_data
+        try:
+            check_seating(
+                cleaned_data.get('reservation_date', self.instance.reservation_date),
+                cleaned_data.get('reservation_time', self.instance.reservation_time),
+                cleaned_data.get('number_of_guests', self.instance.number_of_guests),
+                self.instance.pk,
+            )
+        except ReservationUnavailable as exc:
+            raise ValidationError(str(exc))
+        return cleaned_data
+
+
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
+    form = ReservationAdminForm
     list_display = ('get_guest_info', 'get_reservation_details', 'get_status_badge', 'status', 'created_at')
     list_editable = ('status',)
-    list_filter = ('status', 'reservation_date', 'created_at')
+    list_filter = ('status', 'reservation_date', 'table', 'created_at')
     search_fields = ('name', 'email', 'phone')
     date_hierarchy = 'reservation_date'
-    readonly_fields = ('created_at', 'get_guest_contact')
+    # The table is assigned (and released) by restaurant.reservations
+    readonly_fields = ('created_at', 'get_guest_contact', 'table')
     
     fieldsets = (
         (_('Guest Information'), {
             'fields': ('name', 'email', 'phone', 'get_guest_contact')
         }),
         (_('Reservation Details'), {
-            'fields': ('reservation_date', 'reservation_time', 'number_of_guests')
+            'fields': ('reservation_date', 'reservation_time', 'number_of_guests', 'table')
         }),
         (_('Status & Notes'), {
             'fields': ('status', 'special_requests', 'created_at')
@@ -213,6 +270,11 @@ class ReservationAdmin(admin.ModelAdmin):
             obj.get_status_display()
         )
     get_status_badge.short_description = 'Status'
+
+    def get_changelist_form(self, request, **kwargs):
+        # The editable status column gets the same seating check
+        kwargs.setdefault('form', ReservationAdminForm)
+        return super().get_changelist_form(request, **kwargs)
     
     def get_guest_contact(self, obj):
         return format_html(
@@ -230,6 +292,8 @@ class ContactMessageAdmin(admin.ModelAdmin):
     list_filter = ('is_read', 'created_at')
     search_fields = ('name', 'email', 'subject', 'message')
     date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ('created_at', 'get_full_contact')
     
     fieldsets = (
@@ -278,12 +342,37 @@ class ContactMessageAdmin(admin.ModelAdmin):
 
 # ==================== Order Management ====================
 
-class OrderItemInline(admin.TabularInline):
+class MenuItemIndexSelect(AutocompleteSelect):
+    """Autocomplete for MenuItem that labels selected values from the name index"""
+
+    def optgroups(self, name, value, attr=None):
+        default = (None, [], 0)
+        if not self.is_required:
+            default[1].append(self.create_option(name, '', '', False, 0))
+        index = get_menu_name_index()
+        for pk in value:
+            if str(pk) in self.choices.field.empty_values:
+                continue
+            default[1].append(self.create_option(name, pk, index.label(pk), True, len(default[1])))
+        return [default]
+
+
+class MenuItemAutocompleteMixin:
+    """Render OrderItem.menu_item as an index-backed autocomplete"""
+    autocomplete_fields = ('menu_item',)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'menu_item':
+            kwargs['widget'] = MenuItemIndexSelect(db_field, self.admin_site, using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class OrderItemInline(MenuItemAutocompleteMixin, admin.TabularInline):
     """Inline Order Items in Order admin"""
     model = OrderItem
     extra = 0
     readonly_fields = ('created_at', 'get_subtotal')
-    fields = ('item_name', 'item_price', 'quantity', 'special_instructions', 'get_subtotal', 'created_at')
+    fields = ('menu_item', 'item_name', 'item_price', 'quantity', 'special_instructions', 'get_subtotal', 'created_at')
     
     def get_subtotal(self, obj):
         return format_html(
@@ -293,19 +382,62 @@ class OrderItemInline(admin.TabularInline):
     get_subtotal.short_description = 'Subtotal'
 
 
+CONFLICT_MESSAGE = _(
+    'This order was changed by someone else while you were editing it. '
+    'Reload it to see the latest version.'
+)
+
+
+class OrderAdminForm(forms.ModelForm):
+    """Order form that only offers allowed status changes and carries the
+    version it was loaded at, so a concurrent edit is refused on save"""
+
+    class Meta:
+        model = Order
+        fields = '__all__'
+        widgets = {'version': forms.HiddenInput}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk and 'status' in self.fields:
+            current = self.instance.status
+            allowed = {current, *Order.STATUS_TRANSITIONS.get(current, ())}
+            self.fields['status'].choices = [
+                choice for choice in self.fields['status'].choices if choice[0] in allowed
+            ]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # self.instance still holds the row as read for this request
+        if self.instance.pk and cleaned_data.get('version') != self.instance.version:
+            raise ValidationError(CONFLICT_MESSAGE)
+        return cleaned_data
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
+    form = OrderAdminForm
     list_display = ('get_order_info', 'get_customer_info', 'get_order_type_badge', 'get_payment_status', 'get_total', 'created_at')
     list_editable = ()
     list_filter = ('status', 'order_type', 'payment_method', 'payment_status', 'created_at')
     search_fields = ('guest_name', 'guest_email', 'guest_phone', 'id', 'payment_id')
     date_hierarchy = 'created_at'
-    readonly_fields = ('id', 'created_at', 'updated_at', 'get_order_summary', 'subtotal', 'tax')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_select_related = ('user',)
+    readonly_fields = (
+        'id', 'created_at', 'updated_at', 'get_order_summary', 'subtotal', 'tax', 'item_count', 'quantity_sum',
+        'pickup_slot', 'pickup_load',
+    )
     inlines = [OrderItemInline]
+    actions = [
+        'mark_confirmed', 'mark_preparing', 'mark_ready', 'mark_completed', 'mark_cancelled',
+        'export_csv', 'export_jsonl',
+    ]
     
     fieldsets = (
         (_('Order Information'), {
-            'fields': ('id', 'order_type', 'status', 'created_at', 'updated_at')
+            'fields': ('id', 'order_type', 'status', 'created_at', 'updated_at', 'version')
         }),
         (_('Customer Details'), {
             'fields': ('user', 'guest_name', 'guest_email', 'guest_phone')
@@ -326,7 +458,7 @@ class OrderAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         (_('Pricing'), {
-            'fields': ('subtotal', 'tax', 'total_price')
+            'fields': ('subtotal', 'tax', 'total_price', 'item_count', 'quantity_sum')
         }),
         (_('Payment Information'), {
             'fields': ('payment_method', 'payment_status', 'payment_id', 'payment_details')
@@ -336,7 +468,7 @@ class OrderAdmin(admin.ModelAdmin):
             'classes': ('wide',)
         }),
         (_('Order Timing'), {
-            'fields': ('promised_time', 'completed_at')
+            'fields': ('promised_time', 'pickup_slot', 'pickup_load', 'completed_at')
         }),
     )
     
@@ -423,6 +555,7 @@ class OrderAdmin(admin.ModelAdmin):
             obj.total_price
         )
     get_total.short_description = 'Total'
+    get_total.admin_order_field = 'total_price'
     
     def get_order_summary(self, obj):
         items = obj.items.all()
@@ -437,14 +570,78 @@ class OrderAdmin(admin.ModelAdmin):
         )
     get_order_summary.short_description = 'Order Summary'
 
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except OrderConflict:
+            # Lost the compare-and-swap between validation and the UPDATE
+            self.message_user(request, CONFLICT_MESSAGE, messages.ERROR)
+            return HttpResponseRedirect(request.path)
+
+    def _transition(self, request, queryset, action):
+        # One UPDATE for the whole selection; see restaurant.order_status
+        result = transition_orders(queryset, action)
+        self.message_user(request, _('%(count)d order(s) moved to "%(status)s".') % {
+            'count': len(result.updated), 'status': result.status,
+        }, messages.SUCCESS if result.updated else messages.WARNING)
+        if result.skipped:
+            self.message_user(request, _('%(count)d order(s) skipped: their status does not allow this.') % {
+                'count': len(result.skipped),
+            }, messages.WARNING)
+
+    def mark_confirmed(self, request, queryset):
+        self._transition(request, queryset, 'confirm')
+    mark_confirmed.short_description = _('Confirm selected orders')
+
+    def mark_preparing(self, request, queryset):
+        self._transition(request, queryset, 'start_preparing')
+    mark_preparing.short_description = _('Start preparing selected orders')
+
+    def mark_ready(self, request, queryset):
+        self._transition(request, queryset, 'ready')
+    mark_ready.short_description = _('Mark selected orders ready')
+
+    def mark_completed(self, request, queryset):
+        self._transition(request, queryset, 'complete')
+    mark_completed.short_description = _('Complete selected orders')
+
+    def mark_cancelled(self, request, queryset):
+        self._transition(request, queryset, 'cancel')
+    mark_cancelled.short_description = _('Cancel selected orders')
+
+    def _export(self, queryset, fmt):
+        # Streams in id-ordered chunks; works for "select all" on any filter
+        response = StreamingHttpResponse(export_orders(queryset, fmt), content_type=CONTENT_TYPES[fmt])
+        filename = f"orders-{timezone.localdate():%Y%m%d}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def export_csv(self, request, queryset):
+        return self._export(queryset, 'csv')
+    export_csv.short_description = _('Export selected orders with lines (CSV)')
+
+    def export_jsonl(self, request, queryset):
+        return self._export(queryset, 'jsonl')
+    export_jsonl.short_description = _('Export selected orders with lines (JSONL)')
+
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(MenuItemAutocompleteMixin, admin.ModelAdmin):
     list_display = ('get_item_info', 'quantity', 'item_price', 'get_subtotal', 'order_link')
     list_filter = ('created_at', 'item_price')
     search_fields = ('item_name', 'order__guest_name', 'special_instructions')
     date_hierarchy = 'created_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ('created_at', 'order')
+
+    def get_queryset(self, request):
+        # Line subtotal from SQL; order_link only needs order_id, so no join
+        return super().get_queryset(request).annotate(
+            line_subtotal=ExpressionWrapper(
+                F('item_price') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2)
+            )
+        )
     
     def get_item_info(self, obj):
         return format_html(
@@ -457,15 +654,16 @@ class OrderItemAdmin(admin.ModelAdmin):
     def get_subtotal(self, obj):
         return format_html(
             '<span style="color: #f34949; font-weight: bold;">€{}</span>',
-            obj.get_subtotal()
+            round_money(obj.line_subtotal)
         )
     get_subtotal.short_description = 'Subtotal'
+    get_subtotal.admin_order_field = 'line_subtotal'
     
     def order_link(self, obj):
         return format_html(
             '<a href="/admin/restaurant/order/{}/change/">Order #{}</a>',
-            obj.order.id,
-            obj.order.id
+            obj.order_id,
+            obj.order_id
         )
     order_link.short_description = 'Order'
 
@@ -477,6 +675,7 @@ class CartAdmin(admin.ModelAdmin):
     list_filter = ('created_at', 'updated_at')
     search_fields = ('session_key', 'user__username', 'user__email')
     readonly_fields = ('session_key', 'created_at', 'updated_at', 'items')
+    list_select_related = ('user',)
     
     def get_user_info(self, obj):
         if obj.user:
@@ -489,11 +688,10 @@ class CartAdmin(admin.ModelAdmin):
     get_user_info.short_description = 'User/Session'
     
     def get_item_count(self, obj):
+        # items is already decoded by the JSONField; no extra query per row
         try:
-            items = obj.items if isinstance(obj.items, list) else []
-            count = sum(item.get('quantity', 1) for item in items)
-            return count
-        except:
+            return sum(line_quantity(item) for item in obj.get_items() if isinstance(item, dict))
+        except Exception:
             return 0
     get_item_count.short_description = 'Items'
     
@@ -514,7 +712,7 @@ class DeliverySettingsAdmin(admin.ModelAdmin):
             'fields': ('delivery_charge_fixed', 'delivery_charge_percent', 'min_delivery_amount')
         }),
         (_('Pickup Settings'), {
-            'fields': ('min_pickup_amount', 'estimated_pickup_time')
+            'fields': ('min_pickup_amount', 'estimated_pickup_time', 'pickup_slot_minutes', 'pickup_slot_capacity')
         }),
         (_('Delivery Timing & Area'), {
             'fields': ('estimated_delivery_time', 'max_delivery_radius')
@@ -562,3 +760,71 @@ class PaymentSettingsAdmin(admin.ModelAdmin):
         return format_html('{} {}', status, obj.get_gateway_display())
     get_gateway_name.short_description = 'Payment Gateway'
 
+
+
+class RollupAdmin(admin.ModelAdmin):
+    """Read-only view of a rollup table (rebuilt by rebuild_sales_rollups)"""
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SalesRollup)
+class SalesRollupAdmin(RollupAdmin):
+    """Completed-order totals per day, hour, order type and payment method"""
+    list_display = ('date', 'hour', 'order_type', 'payment_method', 'order_count', 'item_quantity', 'subtotal', 'tax', 'delivery_charge', 'total')
+    list_filter = ('order_type', 'payment_method', 'hour')
+
+
+@admin.register(MenuItemSalesRollup)
+class MenuItemSalesRollupAdmin(RollupAdmin):
+    """Quantities and revenue per menu item and day"""
+    list_display = ('date', 'item_name', 'quantity', 'line_count', 'revenue')
+    search_fields = ('item_name',)
+
+
+@admin.register(PickupSlot)
+class PickupSlotAdmin(admin.ModelAdmin):
+    """Kitchen occupancy per pickup slot (maintained by checkout)"""
+    list_display = ('start', 'reserved_items', 'order_count')
+    date_hierarchy = 'start'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DeliveryZone)
+class DeliveryZoneAdmin(admin.ModelAdmin):
+    """Postal code prefixes we deliver to, with their fee and delivery time"""
+    list_display = ('postal_prefix', 'country', 'name', 'distance_km', 'delivery_fee', 'eta_minutes', 'is_active')
+    list_filter = ('country', 'is_active')
+    list_editable = ('is_active',)
+    search_fields = ('postal_prefix', 'name')
+
+
+@admin.register(DiningTable)
+class DiningTableAdmin(admin.ModelAdmin):
+    """Tables reservations are seated at"""
+    list_display = ('name', 'seats', 'min_party_size', 'is_active')
+    list_filter = ('is_active', 'seats')
+    list_editable = ('is_active',)
+    search_fields = ('name',)
+
+
+@admin.register(ReservationSettings)
+class ReservationSettingsAdmin(admin.ModelAdmin):
+    """Seating hours and dining duration"""
+    list_display = ('first_seating_time', 'last_seating_time', 'dining_minutes')
+
+    def has_add_permission(self, request):
+        return not ReservationSettings.objects.exists()
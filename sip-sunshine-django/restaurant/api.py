@@ -1,18 +1,37 @@
 """
 Restaurant API endpoints for cart, checkout, and orders
 """
+import hashlib
 import json
-from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.translation import get_language
+from django.views.decorators.http import condition, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.models import User
 from django.db import transaction
-from django.utils.dateparse import parse_datetime
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils import timezone
+from datetime import timedelta
 from decimal import Decimal
 import logging
 
+from .carts import CartError, apply_changes, merge_session_cart, parse_changes, serialize_cart
 from .chatbot import generate_reply
+from .delivery_zones import DeliveryZoneError, quote_delivery
+from .idempotency import idempotent
+from .kitchen import changes_since
+from .order_events import open_stream
+from .pagination import CursorError
+from .rollups import GROUPINGS, sales_report, top_items
+from .menu_snapshot import get_menu_snapshot, get_menu_version
+from .order_history import HISTORY_PAGE_SIZE, get_order_history, serialize_order
+from .orders import OrderBuilder, OrderValidationError
+from .order_status import TRANSITIONS, transition_orders
+from .pickup_slots import available_slots
+from .pricing import PricingError, get_price_map, resolve_line_items
+from .reservations import available_times, parse_request as parse_reservation_request
+from . import settings_cache
 
 from .models import (
     Order, OrderItem, Cart, MenuItem,
@@ -62,7 +81,7 @@ def get_delivery_settings(request):
     Returns delivery settings (charges, times, etc.)
     """
     try:
-        settings = DeliverySettings.objects.first()
+        settings = settings_cache.get_delivery_settings()
         if not settings:
             # Return defaults if no settings exist
             return JsonResponse({
@@ -96,12 +115,62 @@ def get_delivery_settings(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _menu_etag(request):
+    """ETag for the menu catalog: a hash of the menu version and language."""
+    raw = f"{get_menu_version()}:{get_language()}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _serialize_menu_entry(entry):
+    return {
+        'id': entry.id,
+        'name': entry.name,
+        'description': entry.description,
+        'price': str(entry.price),
+        'category': entry.category,
+        'category_label': entry.category_label,
+        'image_url': entry.image_url,
+    }
+
+
+@require_http_methods(["GET"])
+@condition(etag_func=_menu_etag)
+def menu_catalog(request):
+    """
+    GET /api/menu/  (or /<lang>/api/menu/)
+    Returns the active menu for the current language.
+
+    Responses carry an ETag derived from the menu version; clients that send
+    it back in If-None-Match get 304 Not Modified until the menu changes.
+    """
+    snapshot = get_menu_snapshot()
+    response = JsonResponse({
+        'language': snapshot.language,
+        'version': get_menu_version(),
+        'items': [_serialize_menu_entry(entry) for entry in snapshot.items],
+        'categories': {
+            'appetizers': [entry.id for entry in snapshot.appetizers],
+            'main_courses': [entry.id for entry in snapshot.main_courses],
+            'desserts': [entry.id for entry in snapshot.desserts],
+            'beverages': [entry.id for entry in snapshot.beverages],
+        },
+    })
+    # Let clients keep the catalog but always revalidate it.
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
 @require_http_methods(["POST"])
 @csrf_exempt
+@idempotent
 def create_order(request):
     """
     POST /api/orders/create/
     Creates a new order from checkout data
+
+    Send an ``Idempotency-Key`` header to make retries safe: a repeat of the
+    same request within 24 hours gets the original response back instead of
+    creating a second order.
     
     Request body:
     {
@@ -118,9 +187,12 @@ def create_order(request):
         "delivery_instructions": "Ring doorbell twice",
         "special_requests": "No onions please",
         "items": [
-            {"id": 1, "name": "Burger", "price": 12.50, "quantity": 2, "special_instructions": ""}
+            {"id": 1, "quantity": 2, "special_instructions": ""}
         ]
     }
+
+    Item names and prices are always taken from the menu; any "name" or
+    "price" sent by the client is ignored.
     """
     try:
         data = json.loads(request.body)
@@ -128,163 +200,92 @@ def create_order(request):
         return JsonResponse({'success': False, 'message': 'Invalid JSON'}, status=400)
 
     try:
-        with transaction.atomic():
-            # Validate required fields
-            required_fields = ['order_type', 'payment_method', 'guest_name', 'guest_phone', 'items']
-            for field in required_fields:
-                if not data.get(field):
-                    return JsonResponse({
-                        'success': False,
-                        'message': f'Missing required field: {field}'
-                    }, status=400)
-
-            # Validate order type
-            valid_order_types = ['seated', 'pickup', 'delivery']
-            if data['order_type'] not in valid_order_types:
+        # Validate required fields
+        required_fields = ['order_type', 'payment_method', 'guest_name', 'guest_phone', 'items']
+        for field in required_fields:
+            if not data.get(field):
                 return JsonResponse({
                     'success': False,
-                    'message': f'Invalid order type. Must be one of: {", ".join(valid_order_types)}'
+                    'message': f'Missing required field: {field}'
                 }, status=400)
 
-            # Validate payment method
-            valid_payment_methods = ['cash', 'stripe', 'paypal']
-            if data['payment_method'] not in valid_payment_methods:
-                return JsonResponse({
-                    'success': False,
-                    'message': f'Invalid payment method. Must be one of: {", ".join(valid_payment_methods)}'
-                }, status=400)
-
-            # Validate order-type specific requirements
-            if data['order_type'] == 'seated' and not data.get('table_number'):
-                return JsonResponse({
-                    'success': False,
-                    'message': 'Table number required for dine-in orders'
-                }, status=400)
-
-            if data['order_type'] == 'delivery':
-                required_delivery_fields = ['delivery_address', 'delivery_city', 'delivery_postal_code']
-                for field in required_delivery_fields:
-                    if not data.get(field):
-                        return JsonResponse({
+        # Validate order-type specific requirements
+        if data['order_type'] == 'seated' and not data.get('table_number'):
+            return JsonResponse({
+                'success': False,
+                'message': 'Table number required for dine-in orders'
+            }, status=400)
+
+        # Associate order to authenticated user (do not trust client-provided user_id)
+        user = request.user if getattr(request, 'user', None) and request.user.is_authenticated else None
+
+        builder = OrderBuilder(
+            order_type=data['order_type'],
+            status='pending',
+            guest_name=data['guest_name'],
+            guest_phone=data['guest_phone'],
+            guest_email=data.get('guest_email', ''),
+            special_requests=data.get('special_requests', ''),
+            user=user,
+            payment_method=data['payment_method'],
+            payment_status='pending' if data['payment_method'] != 'cash' else 'unpaid',
+        )
+        order = builder.order
+
+        # Set order-type specific fields
+        if data['order_type'] == 'seated':
+            order.table_number = data.get('table_number')
+
+        elif data['order_type'] == 'pickup':
+            preferred_pickup_time_raw = data.get('preferred_pickup_time')
+            if preferred_pickup_time_raw:
+                pickup_dt = parse_datetime(preferred_pickup_time_raw)
+                if pickup_dt is None:
+                    return JsonResponse(
+                        {
                             'success': False,
-                            'message': f'Missing delivery field: {field}'
-                        }, status=400)
+                            'message': 'Invalid preferred_pickup_time. Use ISO format, e.g. 2024-01-15T14:30'
+                        },
+                        status=400,
+                    )
+
+                if timezone.is_naive(pickup_dt) and timezone.get_current_timezone() is not None:
+                    pickup_dt = timezone.make_aware(pickup_dt, timezone.get_current_timezone())
+
+                order.preferred_pickup_time = pickup_dt
+
+        elif data['order_type'] == 'delivery':
+            order.delivery_address = data.get('delivery_address', '')
+            order.delivery_city = data.get('delivery_city', '')
+            order.delivery_postal_code = data.get('delivery_postal_code', '')
+            delivery_country = data.get('delivery_country')
+            if delivery_country:
+                order.delivery_country = delivery_country
+            order.delivery_instructions = data.get('delivery_instructions', '')
+
+        # Resolve names and prices from the catalog (never trust client prices),
+        # then validate, total and write the order with one bulk insert of its lines.
+        try:
+            builder.add_lines(resolve_line_items(data['items']))
+            order = builder.save()
+        except (OrderValidationError, PricingError) as e:
+            return JsonResponse({
+                'success': False,
+                'message': str(e)
+            }, status=400)
 
-            # Validate items
-            if not data.get('items') or len(data['items']) == 0:
-                return JsonResponse({
-                    'success': False,
-                    'message': 'Order must contain at least one item'
-                }, status=400)
+        # TODO: Handle payment processing based on payment method
+        # For now, mark as pending for all methods
 
-            # Calculate totals
-            subtotal = Decimal('0.00')
-            for item in data['items']:
-                if not item.get('price') or not item.get('quantity'):
-                    return JsonResponse({
-                        'success': False,
-                        'message': f'Invalid item data'
-                    }, status=400)
-                subtotal += Decimal(str(item['price'])) * item['quantity']
-
-            # Calculate tax (21% for Netherlands)
-            tax = (subtotal * Decimal('0.21')).quantize(Decimal('0.01'))
-
-            # Calculate delivery charge if applicable
-            delivery_charge = Decimal('0.00')
-            if data['order_type'] == 'delivery':
-                try:
-                    settings = DeliverySettings.objects.first()
-                    if settings:
-                        # Fixed charge + percentage
-                        fixed_charge = Decimal(str(settings.delivery_charge_fixed))
-                        percentage_charge = (subtotal * Decimal(str(settings.delivery_charge_percent)) / 100).quantize(Decimal('0.01'))
-                        delivery_charge = fixed_charge + percentage_charge
-                except:
-                    delivery_charge = Decimal('2.50')  # Default
-
-            total = subtotal + tax + delivery_charge
-
-            # Associate order to authenticated user (do not trust client-provided user_id)
-            user = request.user if getattr(request, 'user', None) and request.user.is_authenticated else None
-
-            # Create order
-            order = Order.objects.create(
-                order_type=data['order_type'],
-                status='pending',
-                guest_name=data['guest_name'],
-                guest_phone=data['guest_phone'],
-                guest_email=data.get('guest_email', ''),
-                special_requests=data.get('special_requests', ''),
-                user=user,
-                payment_method=data['payment_method'],
-                payment_status='pending' if data['payment_method'] != 'cash' else 'unpaid',
-                subtotal=subtotal,
-                tax=tax,
-                delivery_charge=delivery_charge,
-                total_price=total
-            )
-
-            # Set order-type specific fields
-            if data['order_type'] == 'seated':
-                order.table_number = data.get('table_number')
-
-            elif data['order_type'] == 'pickup':
-                preferred_pickup_time_raw = data.get('preferred_pickup_time')
-                if preferred_pickup_time_raw:
-                    pickup_dt = parse_datetime(preferred_pickup_time_raw)
-                    if pickup_dt is None:
-                        return JsonResponse(
-                            {
-                                'success': False,
-                                'message': 'Invalid preferred_pickup_time. Use ISO format, e.g. 2024-01-15T14:30'
-                            },
-                            status=400,
-                        )
-
-                    if timezone.is_naive(pickup_dt) and timezone.get_current_timezone() is not None:
-                        pickup_dt = timezone.make_aware(pickup_dt, timezone.get_current_timezone())
-
-                    order.preferred_pickup_time = pickup_dt
-
-            elif data['order_type'] == 'delivery':
-                order.delivery_address = data.get('delivery_address', '')
-                order.delivery_city = data.get('delivery_city', '')
-                order.delivery_postal_code = data.get('delivery_postal_code', '')
-                delivery_country = data.get('delivery_country')
-                if delivery_country:
-                    order.delivery_country = delivery_country
-                order.delivery_instructions = data.get('delivery_instructions', '')
-
-            order.save()
-
-            # Create order items
-            for item_data in data['items']:
-                try:
-                    menu_item = MenuItem.objects.get(id=item_data.get('id'))
-                except MenuItem.DoesNotExist:
-                    menu_item = None
-
-                OrderItem.objects.create(
-                    order=order,
-                    menu_item=menu_item,
-                    item_name=item_data.get('name', 'Unknown Item'),
-                    item_price=Decimal(str(item_data.get('price', 0))),
-                    quantity=item_data.get('quantity', 1),
-                    special_instructions=item_data.get('special_instructions', '')
-                )
-
-            # TODO: Handle payment processing based on payment method
-            # For now, mark as pending for all methods
-
-            logger.info(f"Order {order.id} created successfully for {data['guest_name']}")
+        logger.info(f"Order {order.id} created successfully for {data['guest_name']}")
 
-            return JsonResponse({
-                'success': True,
-                'message': 'Order created successfully',
-                'order_id': order.id,
-                'total': str(total)
-            })
+        return JsonResponse({
+            'success': True,
+            'message': 'Order created successfully',
+            'order_id': order.id,
+            'total': str(order.total_price),
+            'promised_time': timezone.localtime(order.promised_time).isoformat() if order.promised_time else None,
+        })
 
     except Exception as e:
         logger.error(f"Error creating order: {str(e)}", exc_info=True)
@@ -329,3 +330,304 @@ def get_order_status(request, order_id):
     except Exception as e:
         logger.error(f"Error fetching order: {str(e)}")
         return JsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def order_status_stream(request, order_id):
+    """
+    GET /api/orders/{order_id}/events/
+    Server-Sent Events stream of the order's status: the current status
+    first, then one ``status`` event per transition, with heartbeats between.
+    """
+    status = Order.objects.filter(id=order_id).values_list('status', flat=True).first()
+    if status is None:
+        return JsonResponse({'error': 'Order not found'}, status=404)
+
+    stream = open_stream(order_id, status)
+    if stream is None:
+        response = JsonResponse({'error': 'Too many live connections, please retry'}, status=503)
+        response['Retry-After'] = '30'
+        return response
+
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_http_methods(["GET"])
+def kitchen_changes(request):
+    """
+    GET /api/kitchen/changes/?since=<cursor>&limit=100
+    Orders created or changed after ``since`` (staff only). Without ``since``
+    all orders still in progress are returned. Poll again with the returned
+    ``cursor``; orders may repeat and should be upserted by id.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'message': 'Staff access required'}, status=403)
+
+    try:
+        limit = int(request.GET.get('limit', 100))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid limit'}, status=400)
+
+    try:
+        feed = changes_since(request.GET.get('since') or None, limit=limit)
+    except CursorError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    response = JsonResponse(feed)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@require_http_methods(["GET"])
+def profile_orders(request):
+    """
+    GET /api/profile/orders/?cursor=<cursor>&limit=20
+    The signed-in customer's orders, newest first. Pass the returned
+    ``next_cursor`` to load the following page; it is null on the last page.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'message': 'Login required'}, status=401)
+
+    try:
+        limit = int(request.GET.get('limit', HISTORY_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid limit'}, status=400)
+
+    try:
+        page = get_order_history(request.user, request.GET.get('cursor') or None, limit)
+    except CursorError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    return JsonResponse({
+        'orders': [serialize_order(order) for order in page.items],
+        'next_cursor': page.next_cursor,
+    })
+
+
+def _report_range(request):
+    """Parse ``start``/``end`` (YYYY-MM-DD); defaults to the last 30 days."""
+    today = timezone.localdate()
+    try:
+        end = parse_date(request.GET['end']) if request.GET.get('end') else today
+        start = parse_date(request.GET['start']) if request.GET.get('start') else end - timedelta(days=29)
+    except ValueError:
+        start = end = None
+    if start is None or end is None or start > end:
+        raise ValueError('Use start and end dates in YYYY-MM-DD format, start before end')
+    return start, end
+
+
+@require_http_methods(["GET"])
+def sales_report_api(request):
+    """
+    GET /api/reports/sales/?start=2024-01-01&end=2024-01-31&group_by=day
+    Completed-order totals from the sales rollups (staff only). ``group_by``
+    is one of day, hour, order_type or payment_method.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'message': 'Staff access required'}, status=403)
+
+    group_by = request.GET.get('group_by', 'day')
+    if group_by not in GROUPINGS:
+        return JsonResponse({
+            'success': False,
+            'message': f'Invalid group_by. Must be one of: {", ".join(GROUPINGS)}'
+        }, status=400)
+    try:
+        start, end = _report_range(request)
+        limit = int(request.GET.get('top', 10))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    return JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'group_by': group_by,
+        'rows': sales_report(start, end, group_by),
+        'top_items': top_items(start, end, max(0, min(limit, 100))),
+    })
+
+
+MAX_BULK_ORDERS = 500
+
+
+@require_http_methods(["POST"])
+def bulk_order_status(request):
+    """
+    POST /api/orders/status/bulk/
+    Move many orders through one status transition (staff only).
+    Body: {"action": "ready", "order_ids": [1, 2, 3]} where action is one of
+    confirm, start_preparing, ready, complete or cancel. Orders whose status
+    does not allow the transition are returned under ``skipped``.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'message': 'Staff access required'}, status=403)
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON'}, status=400)
+
+    action = data.get('action')
+    if action not in TRANSITIONS:
+        return JsonResponse({
+            'success': False,
+            'message': f'Invalid action. Must be one of: {", ".join(TRANSITIONS)}'
+        }, status=400)
+    order_ids = data.get('order_ids')
+    if (
+        not isinstance(order_ids, list) or not order_ids or len(order_ids) > MAX_BULK_ORDERS
+        or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in order_ids)
+    ):
+        return JsonResponse({
+            'success': False,
+            'message': f'order_ids must be a list of 1 to {MAX_BULK_ORDERS} order ids'
+        }, status=400)
+
+    result = transition_orders(Order.objects.filter(pk__in=order_ids), action)
+    found = set(result.updated) | set(result.skipped)
+    return JsonResponse({
+        'success': True,
+        'action': result.action,
+        'status': result.status,
+        'updated': sorted(result.updated),
+        'skipped': sorted(result.skipped),
+        'not_found': sorted(set(order_ids) - found),
+    })
+
+
+def _current_cart(request, create: bool = True) -> Cart | None:
+    user = request.user if request.user.is_authenticated else None
+    if user is not None:
+        cart = Cart.objects.filter(user=user).first()
+        if cart is None and create:
+            # Signed in elsewhere than the login view (e.g. the admin): adopt the guest cart
+            cart = merge_session_cart(user, request.session.session_key)
+        if cart is not None or not create:
+            return cart
+    elif not create:
+        key = request.session.session_key
+        return Cart.objects.filter(session_key=key, user__isnull=True).first() if key else None
+    if not request.session.session_key:
+        request.session.save()
+    cart, _created = Cart.objects.get_or_create(session_key=request.session.session_key, defaults={'user': user})
+    return cart
+
+
+@require_http_methods(["GET", "POST"])
+def cart_sync(request):
+    """
+    GET /api/cart/sync/
+    POST /api/cart/sync/
+    Returns the visitor's server-side cart; a POST first applies a batch of
+    changes with one write. Body:
+    {"changes": [{"op": "add", "id": 5, "quantity": 2},
+                 {"op": "set", "id": 7, "quantity": 1, "special_instructions": "No onions"},
+                 {"op": "remove", "id": 9}, {"op": "clear"}]}
+    Added items are named and priced from the menu. Reading never creates a
+    cart; version 0 means there is none yet.
+    """
+    changes = []
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body or b'{}')
+        except json.JSONDecodeError:
+            return JsonResponse({'success': False, 'message': 'Invalid JSON'}, status=400)
+        try:
+            changes = parse_changes(data.get('changes', []) if isinstance(data, dict) else None)
+        except CartError as exc:
+            return JsonResponse({'success': False, 'message': str(exc)}, status=400)
+
+    cart = _current_cart(request, create=bool(changes))
+    lines = None
+    if changes:
+        try:
+            lines = apply_changes(cart, changes, get_price_map())
+        except CartError as exc:
+            return JsonResponse({'success': False, 'message': str(exc)}, status=400)
+
+    response = JsonResponse({'success': True, **serialize_cart(cart, lines)})
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@require_http_methods(["GET"])
+def delivery_quote(request):
+    """
+    GET /api/delivery/quote/?postal_code=1012AB&country=NL&subtotal=25.00
+    Whether we deliver to a postal code, and the delivery charge and time
+    for an order of ``subtotal``.
+    """
+    postal_code = request.GET.get('postal_code', '').strip()
+    if not postal_code:
+        return JsonResponse({'success': False, 'message': 'postal_code is required'}, status=400)
+    try:
+        subtotal = Decimal(request.GET.get('subtotal', '0'))
+        if not subtotal.is_finite() or subtotal < 0:
+            raise ValueError
+    except (ArithmeticError, ValueError):
+        return JsonResponse({'success': False, 'message': 'subtotal must be a non-negative amount'}, status=400)
+
+    try:
+        quote = quote_delivery(
+            postal_code,
+            request.GET.get('country', 'NL'),
+            subtotal,
+            settings_cache.get_delivery_settings(),
+            settings_cache.get_delivery_zones(),
+        )
+    except DeliveryZoneError as exc:
+        return JsonResponse({'deliverable': False, 'message': str(exc)})
+    return JsonResponse(quote.as_dict())
+
+
+@require_http_methods(["GET"])
+def pickup_slots(request):
+    """
+    GET /api/pickup/slots/?items=3&date=2024-01-15
+    Pickup slots for a day (default: from now) with the kitchen capacity
+    left in each; ``available`` says whether an order of ``items`` fits.
+    """
+    try:
+        items = int(request.GET.get('items', 1))
+        if items < 1:
+            raise ValueError
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'items must be a positive number'}, status=400)
+    day = None
+    if request.GET.get('date'):
+        try:
+            day = parse_date(request.GET['date'])
+        except ValueError:
+            day = None
+        if day is None:
+            return JsonResponse({'success': False, 'message': 'date must be in YYYY-MM-DD format'}, status=400)
+        if day < timezone.localdate():
+            return JsonResponse({'success': False, 'message': 'date must not be in the past'}, status=400)
+
+    response = JsonResponse({'slots': available_slots(items, day)})
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@require_http_methods(["GET"])
+def reservation_availability(request):
+    """
+    GET /api/reservations/availability/?date=2024-01-15&guests=4
+    Seating times on a day at which a table for ``guests`` is free.
+    """
+    try:
+        day, _time, guests = parse_reservation_request(request.GET.get('date'), None, request.GET.get('guests', 2))
+    except ValueError as exc:
+        return JsonResponse({'success': False, 'message': str(exc)}, status=400)
+
+    response = JsonResponse({
+        'date': day.isoformat(),
+        'guests': guests,
+        'times': [f'{moment:%H:%M}' for moment in available_times(day, guests)],
+    })
+    response['Cache-Control'] = 'no-store'
+    return response
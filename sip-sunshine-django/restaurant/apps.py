@@ -7,6 +7,9 @@ class RestaurantConfig(AppConfig):
     verbose_name = 'Restaurant Management'
     
     def ready(self):
+        # Cache invalidation hooks (menu snapshots, etc.)
+        from . import signals  # noqa: F401
+
         # Initialize default languages and site settings when the app is ready
         from .models import Language, SiteSetting
         
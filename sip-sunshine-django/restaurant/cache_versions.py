@@ -0,0 +1,33 @@
+"""Version counters for cache entries that are superseded, not deleted.
+
+A cached value is stored under a key that includes the current version of
+its counter; bumping the counter makes every process read (and build) a new
+key, and the superseded entries simply age out of the cache. Used by
+``restaurant.menu_snapshot`` and ``restaurant.settings_cache``.
+"""
+
+from __future__ import annotations
+
+import time
+
+from django.core.cache import cache
+
+
+def get(key: str) -> int:
+    """Return the counter at ``key``, seeding it if it is missing."""
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a lost or evicted counter never reuses a
+        # version that older values were cached under.
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+def bump(key: str) -> None:
+    """Supersede every value cached under the current version of ``key``."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counter missing: the next read seeds a fresh, unused version.
+        pass
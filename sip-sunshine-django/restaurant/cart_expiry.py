@@ -0,0 +1,118 @@
+"""Expiry of abandoned carts.
+
+Every anonymous visitor who touches the cart leaves a ``Cart`` row behind
+(keyed by session), and nothing ever removed them. ``collect_expired_carts()``
+deletes carts not updated for ``CART_TTL_DAYS`` (guest carts only unless
+asked otherwise), together with their ``CartItem`` children.
+
+The table is walked in primary-key ranges of ``batch_size`` ids. Each range
+is one short transaction: select the expired ids in the range, delete them
+with their items. SQLite holds its single write lock only for that
+long, so checkouts and cart syncs keep going while a large backlog is
+cleared; ``pause`` adds a breather between ranges.
+
+Run it from cron with ``manage.py expire_carts``, or set
+``CART_GC_INTERVAL`` (seconds) to let finished requests trigger a small
+collection at most once per interval (``maybe_collect_expired_carts``).
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Min, TextField
+from django.db.models.functions import Cast, Length
+from django.utils import timezone
+
+from .models import Cart, CartItem
+
+DEFAULT_TTL_DAYS = 30
+BATCH_SIZE = 500
+# Ranges handled by one collection triggered from a request
+HOOK_MAX_BATCHES = 2
+HOOK_LOCK_KEY = 'cart_expiry:last_run'
+
+
+@dataclass
+class ExpiryResult:
+    carts: int = 0
+    cart_items: int = 0
+    # Approximate payload reclaimed: session keys plus the items JSON
+    bytes: int = 0
+    batches: int = 0
+
+
+def ttl() -> timedelta:
+    return timedelta(days=getattr(settings, 'CART_TTL_DAYS', DEFAULT_TTL_DAYS))
+
+
+def expired_carts(cutoff, include_users: bool = False):
+    carts = Cart.objects.filter(updated_at__lt=cutoff)
+    if not include_users:
+        carts = carts.filter(user__isnull=True)
+    return carts
+
+
+def _collect_range(carts, low: int, high: int, result: ExpiryResult) -> None:
+    with transaction.atomic():
+        rows = list(
+            carts.filter(pk__gte=low, pk__lt=high)
+            .annotate(payload=Length('session_key') + Length(Cast('items', TextField())))
+            .values_list('pk', 'payload')
+        )
+        if not rows:
+            return
+        # The CartItem children go in the same transaction (cascade)
+        _total, deleted = carts.filter(pk__in=[pk for pk, _payload in rows]).only('pk').delete()
+        result.carts += deleted.get(Cart._meta.label, 0)
+        result.cart_items += deleted.get(CartItem._meta.label, 0)
+        result.bytes += sum(payload or 0 for _pk, payload in rows)
+
+
+def collect_expired_carts(
+    cutoff=None,
+    *,
+    include_users: bool = False,
+    batch_size: int = BATCH_SIZE,
+    max_batches: int | None = None,
+    pause: float = 0,
+    dry_run: bool = False,
+) -> ExpiryResult:
+    """Delete carts last updated before ``cutoff`` (default: now - TTL)."""
+    cutoff = cutoff or timezone.now() - ttl()
+    carts = expired_carts(cutoff, include_users)
+    result = ExpiryResult()
+    bounds = carts.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return result
+    if dry_run:
+        result.carts = carts.count()
+        result.cart_items = CartItem.objects.filter(cart__in=carts).count()
+        return result
+
+    low = bounds['low']
+    while low <= bounds['high']:
+        if max_batches is not None and result.batches >= max_batches:
+            break
+        _collect_range(carts, low, low + batch_size, result)
+        result.batches += 1
+        low += batch_size
+        if pause and low <= bounds['high']:
+            time.sleep(pause)
+    return result
+
+
+def maybe_collect_expired_carts() -> ExpiryResult | None:
+    """Run a small collection if ``CART_GC_INTERVAL`` allows one now."""
+    interval = getattr(settings, 'CART_GC_INTERVAL', None)
+    if not interval:
+        return None
+    # cache.add is atomic: one process per interval wins the run
+    if not cache.add(HOOK_LOCK_KEY, timezone.now().isoformat(), interval):
+        return None
+    return collect_expired_carts(max_batches=HOOK_MAX_BATCHES)
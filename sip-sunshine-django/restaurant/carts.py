@@ -0,0 +1,328 @@
+"""Server-side carts with batched delta updates.
+
+``Cart.items`` stays a JSON list of line dicts, but every change goes
+through ``CartLines``: the lines keyed by item id, so an add or quantity
+change is a dict lookup instead of a scan, with the subtotal computed once
+per change set. ``apply_changes()`` applies a whole batch of changes (add,
+set quantity, remove, clear) and writes the result with one conditional
+UPDATE that also stores the subtotal and bumps ``Cart.version``; if another
+request wrote the cart in between, the batch is replayed on the fresh lines.
+
+``/api/cart/sync/`` takes the changes ``cart-system.js`` coalesced over a
+few clicks and prices added items from the catalog (``restaurant.pricing``).
+
+At login ``merge_session_cart()`` folds the guest cart of the old session
+into the customer's cart: both are read in one query, merged and repriced
+in memory against the catalog price map, and saved with one write.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Cart
+from .money import from_cents, subtotal_cents, to_cents
+from .pricing import get_price_map
+
+OPERATIONS = ('add', 'set', 'remove', 'clear')
+MAX_CART_CHANGES = 100
+MAX_LINE_QUANTITY = 99
+WRITE_ATTEMPTS = 3
+
+
+class CartError(ValueError):
+    """Raised for a change that cannot be applied to a cart."""
+
+
+def line_key(item_id) -> str:
+    # The browser sends ids as strings, older carts stored ints
+    return str(item_id)
+
+
+def line_price(line: dict) -> int:
+    """Unit price of ``line`` in cents."""
+    try:
+        return to_cents(line.get('price', 0) or 0)
+    except ValueError:
+        return 0
+
+
+def line_quantity(line: dict) -> int:
+    """Quantity of ``line``: 1 when missing, 0 when not a number."""
+    quantity = line.get('quantity')
+    if quantity in (None, ''):
+        return 1
+    try:
+        return int(quantity)
+    except (TypeError, ValueError):
+        return 0
+
+
+class CartLines:
+    """Cart lines keyed by item id, in the order they were first added."""
+
+    def __init__(self, items=()):
+        self._lines: dict[str, dict] = {}
+        self._subtotal: Decimal | None = None
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __contains__(self, item_id) -> bool:
+        return line_key(item_id) in self._lines
+
+    def get(self, item_id) -> dict | None:
+        return self._lines.get(line_key(item_id))
+
+    def add(self, item: dict, quantity: int | None = None) -> None:
+        quantity = line_quantity(item) if quantity is None else quantity
+        key = line_key(item.get('id'))
+        line = self._lines.get(key)
+        if line is None:
+            self._lines[key] = dict(item, quantity=quantity)
+        else:
+            line['quantity'] = line_quantity(line) + quantity
+        self._subtotal = None
+
+    def set_quantity(self, item_id, quantity: int) -> None:
+        key = line_key(item_id)
+        if quantity <= 0:
+            self._lines.pop(key, None)
+        elif key in self._lines:
+            self._lines[key]['quantity'] = quantity
+        self._subtotal = None
+
+    def set_instructions(self, item_id, instructions: str) -> None:
+        line = self._lines.get(line_key(item_id))
+        if line is not None:
+            line['special_instructions'] = instructions
+
+    def remove(self, item_id) -> None:
+        self._lines.pop(line_key(item_id), None)
+        self._subtotal = None
+
+    def clear(self) -> None:
+        self._lines.clear()
+        self._subtotal = None
+
+    @property
+    def item_count(self) -> int:
+        return sum(line_quantity(line) for line in self._lines.values())
+
+    @property
+    def subtotal(self) -> Decimal:
+        if self._subtotal is None:
+            lines = self._lines.values()
+            self._subtotal = from_cents(
+                subtotal_cents([line_price(line) for line in lines], [line_quantity(line) for line in lines])
+            )
+        return self._subtotal
+
+    def as_list(self) -> list[dict]:
+        return list(self._lines.values())
+
+    def reprice(self, prices) -> None:
+        """Take names and prices of menu items from ``prices``.
+
+        Menu items that are no longer sold are dropped; lines that do not
+        refer to a menu item are left alone. Quantities are capped.
+        """
+        for key, line in list(self._lines.items()):
+            try:
+                menu_item_id = int(line.get('id'))
+            except (TypeError, ValueError):
+                continue
+            catalog = prices.get(menu_item_id)
+            if catalog is None:
+                del self._lines[key]
+                continue
+            line['name'] = catalog.name_for()
+            line['price'] = str(catalog.price)
+            line['quantity'] = min(line_quantity(line), MAX_LINE_QUANTITY)
+        self._subtotal = None
+
+
+@dataclass(frozen=True)
+class CartChange:
+    op: str
+    item_id: object = None
+    quantity: int = 1
+    # Full line data for adds that do not come from the catalog (Cart.add_item)
+    item: dict | None = None
+    special_instructions: str | None = None
+
+
+def _quantity(value, minimum: int) -> int:
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError):
+        raise CartError('quantity must be a whole number')
+    if quantity < minimum or quantity > MAX_LINE_QUANTITY:
+        raise CartError(f'quantity must be between {minimum} and {MAX_LINE_QUANTITY}')
+    return quantity
+
+
+def parse_changes(payload) -> list[CartChange]:
+    """Validate the ``changes`` list of a sync request."""
+    if not isinstance(payload, list):
+        raise CartError('changes must be a list')
+    if len(payload) > MAX_CART_CHANGES:
+        raise CartError(f'At most {MAX_CART_CHANGES} changes per request')
+    changes = []
+    for raw in payload:
+        if not isinstance(raw, dict) or raw.get('op') not in OPERATIONS:
+            raise CartError(f'Each change needs an op, one of: {", ".join(OPERATIONS)}')
+        op = raw['op']
+        if op == 'clear':
+            changes.append(CartChange('clear'))
+            continue
+        if raw.get('id') in (None, ''):
+            raise CartError(f'{op} needs an item id')
+        instructions = raw.get('special_instructions')
+        if instructions is not None:
+            instructions = str(instructions)[:500]
+        if op == 'add':
+            quantity = _quantity(raw.get('quantity', 1), 1)
+        elif op == 'set':
+            quantity = _quantity(raw.get('quantity'), 0)
+        else:
+            quantity = 0
+        changes.append(CartChange(op, item_id=raw['id'], quantity=quantity, special_instructions=instructions))
+    return changes
+
+
+def _catalog_line(change: CartChange, prices) -> dict:
+    try:
+        catalog = prices.get(int(change.item_id))
+    except (TypeError, ValueError):
+        catalog = None
+    if catalog is None:
+        raise CartError(f'Menu item {change.item_id} is not available')
+    return {
+        'id': change.item_id,
+        'name': catalog.name_for(),
+        'price': str(catalog.price),
+        'quantity': change.quantity,
+        'special_instructions': change.special_instructions or '',
+    }
+
+
+def apply_to_lines(lines: CartLines, changes, prices=None) -> None:
+    """Apply ``changes`` in order; adds without line data are priced from ``prices``."""
+    for change in changes:
+        if change.op == 'clear':
+            lines.clear()
+        elif change.op == 'remove':
+            lines.remove(change.item_id)
+        elif change.op == 'set':
+            lines.set_quantity(change.item_id, change.quantity)
+        elif change.item is not None:
+            lines.add(change.item, change.quantity)
+        elif change.item_id in lines:
+            lines.add(lines.get(change.item_id), change.quantity)
+        else:
+            if prices is None:
+                raise CartError('Cannot add an item without its price')
+            lines.add(_catalog_line(change, prices))
+        if change.special_instructions is not None and change.op in ('add', 'set'):
+            lines.set_instructions(change.item_id, change.special_instructions)
+
+
+def apply_changes(cart: Cart, changes, prices=None) -> CartLines:
+    """Apply a batch of changes to ``cart`` with a single write.
+
+    The cart instance is updated in place; returns its new lines.
+    """
+    if cart.pk is None:
+        cart.save()
+    for _attempt in range(WRITE_ATTEMPTS):
+        lines = CartLines(cart.get_items())
+        apply_to_lines(lines, changes, prices)
+        if _write(cart, lines):
+            return lines
+        # Someone else wrote the cart since it was read: replay on their lines
+        cart.refresh_from_db(fields=['items', 'subtotal', 'version', 'updated_at'])
+    raise CartError('The cart is being changed elsewhere, please try again')
+
+
+def _write(cart: Cart, lines: CartLines, **fields) -> bool:
+    """Store ``lines`` (and ``fields``) if ``cart`` is unchanged since it was read."""
+    now = timezone.now()
+    items = lines.as_list()
+    written = Cart.objects.filter(pk=cart.pk, version=cart.version).update(
+        items=items, subtotal=lines.subtotal, version=F('version') + 1, updated_at=now, **fields
+    )
+    if written:
+        cart.items = items
+        cart.subtotal = lines.subtotal
+        cart._remember_subtotal()
+        cart.version += 1
+        cart.updated_at = now
+        for name, value in fields.items():
+            setattr(cart, name, value)
+    return bool(written)
+
+
+def merge_session_cart(user, session_key: str | None, prices=None) -> Cart | None:
+    """Fold the guest cart of ``session_key`` into ``user``'s cart.
+
+    Quantities of items in both carts are added up and every menu item is
+    repriced from the catalog. A customer without a cart adopts the guest
+    cart; otherwise the merged lines are written to the customer's cart and
+    the guest cart is deleted. Both steps are conditional on the versions
+    read, so a concurrent change to either cart (or a cart created for the
+    customer meanwhile) makes the merge start over. Returns the customer's
+    cart, if any; raises ``CartError`` after ``WRITE_ATTEMPTS`` lost races.
+    """
+    if not session_key:
+        return Cart.objects.filter(user=user).first()
+    if prices is None:
+        prices = get_price_map()
+
+    for _attempt in range(WRITE_ATTEMPTS):
+        carts = list(Cart.objects.filter(Q(user=user) | Q(session_key=session_key, user__isnull=True)))
+        own = next((cart for cart in carts if cart.user_id == user.pk), None)
+        guest = next((cart for cart in carts if cart.user_id is None), None)
+        if guest is None:
+            return own
+
+        lines = CartLines(own.get_items() if own is not None else ())
+        for item in guest.get_items():
+            lines.add(item)
+        lines.reprice(prices)
+
+        if own is None:
+            try:
+                with transaction.atomic():
+                    if _write(guest, lines, user=user):
+                        return guest
+            except IntegrityError:
+                # Another request created the customer's cart first: merge into it
+                pass
+            continue
+        with transaction.atomic():
+            if _write(own, lines):
+                deleted, _rows = Cart.objects.filter(pk=guest.pk, version=guest.version).delete()
+                if deleted:
+                    return own
+                # The guest cart changed after we read it: undo and merge again
+                transaction.set_rollback(True)
+    raise CartError('The cart is being changed elsewhere, please try again')
+
+
+def serialize_cart(cart: Cart | None, lines: CartLines | None = None) -> dict:
+    if lines is None:
+        lines = CartLines(cart.get_items() if cart is not None else ())
+    return {
+        'version': cart.version if cart is not None else 0,
+        'items': lines.as_list(),
+        'item_count': lines.item_count,
+        'subtotal': str(lines.subtotal),
+    }
@@ -14,6 +14,7 @@ from difflib import SequenceMatcher
 from typing import Iterable, Optional
 
 from .models import DeliverySettings, SiteSetting
+from .settings_cache import get_delivery_settings, get_site_settings
 
 
 @dataclass(frozen=True)
@@ -34,14 +35,14 @@ def _score(query: str, example: str) -> float:
 
 def _first_site_settings() -> Optional[SiteSetting]:
     try:
-        return SiteSetting.objects.first()
+        return get_site_settings()
     except Exception:
         return None
 
 
 def _first_delivery_settings() -> Optional[DeliverySettings]:
     try:
-        return DeliverySettings.objects.first()
+        return get_delivery_settings()
     except Exception:
         return None
 
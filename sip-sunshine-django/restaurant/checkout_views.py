@@ -6,6 +6,7 @@ from django.views import View
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse
 from django.db.utils import OperationalError, ProgrammingError
@@ -17,6 +18,7 @@ from .models import Order, OrderItem, CustomerProfile
 logger = logging.getLogger(__name__)
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class CheckoutView(View):
     """
     Main checkout page - displays order summary and starts checkout flow
@@ -37,6 +39,7 @@ class CheckoutView(View):
         return render(request, self.template_name, context)
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class OrderConfirmationView(TemplateView):
     """
     Order confirmation page - shows after order is successfully created
@@ -67,6 +70,7 @@ class OrderConfirmationView(TemplateView):
         return context
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class OrderTrackingView(TemplateView):
     """
     Order tracking page - allows customers to track their orders
@@ -1,11 +1,12 @@
-from restaurant.models import SiteSetting, Language
 from django.utils.translation import get_language
 
+from restaurant.settings_cache import get_active_languages, get_site_settings
+
 
 def site_settings(request):
     """Make site settings available to all templates"""
     try:
-        settings = SiteSetting.objects.first()
+        settings = get_site_settings()
     except:
         settings = None
     
@@ -15,7 +16,7 @@ def site_settings(request):
 def active_languages(request):
     """Make active languages available to all templates"""
     try:
-        languages = Language.objects.filter(is_active=True).order_by('-is_default')
+        languages = get_active_languages()
     except:
         languages = []
     
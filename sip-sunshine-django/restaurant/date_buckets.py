@@ -0,0 +1,75 @@
+"""Per-month row counts for the admin date hierarchy.
+
+Django's ``date_hierarchy`` finds the years and months to offer with
+``MIN``/``MAX`` and ``DISTINCT`` date truncations over the whole changelist
+queryset, which scans every order. ``MonthBucket`` keeps the number of rows
+per local calendar month instead; signals add and remove rows as they are
+created and deleted (see ``restaurant.signals``), and ``rebuild()``
+(``manage.py rebuild_month_buckets``) recomputes them from the tables.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ContactMessage, MonthBucket, Order
+
+# Models whose admin date hierarchy reads buckets, with the bucketed field
+TRACKED = {
+    Order: 'created_at',
+    ContactMessage: 'created_at',
+}
+
+
+def model_key(model) -> str:
+    return model._meta.label_lower
+
+
+def month_of(value) -> date:
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date().replace(day=1)
+
+
+def add(model, value, delta: int = 1) -> None:
+    """Count ``delta`` rows into the month containing ``value``."""
+    if value is None:
+        return
+    key, month = model_key(model), month_of(value)
+    # One UPDATE once the month's bucket exists; creating it happens monthly
+    if MonthBucket.objects.filter(model=key, month=month).update(count=F('count') + delta):
+        return
+    with transaction.atomic():
+        bucket, _created = MonthBucket.objects.get_or_create(model=key, month=month)
+        MonthBucket.objects.filter(pk=bucket.pk).update(count=F('count') + delta)
+
+
+def months(model) -> list[date]:
+    """Months that have rows, oldest first."""
+    return list(
+        MonthBucket.objects.filter(model=model_key(model), count__gt=0)
+        .order_by('month')
+        .values_list('month', flat=True)
+    )
+
+
+def rebuild(model) -> int:
+    """Recount the buckets of ``model``; returns the number of months."""
+    field = TRACKED[model]
+    counts = Counter(
+        month_of(value)
+        for value in model.objects.order_by().values_list(field, flat=True).iterator(chunk_size=2000)
+        if value is not None
+    )
+    key = model_key(model)
+    with transaction.atomic():
+        MonthBucket.objects.filter(model=key).delete()
+        MonthBucket.objects.bulk_create(
+            [MonthBucket(model=key, month=month, count=count) for month, count in sorted(counts.items())]
+        )
+    return len(counts)
@@ -0,0 +1,144 @@
+"""Postal-code delivery zones.
+
+``DeliveryZone`` rows map a postal code prefix to a zone with its distance,
+fee and delivery time; they are loaded locally (admin or
+``manage.py load_delivery_zones``), no geocoding service is involved. The
+active rows are compiled into a ``ZoneIndex``: one dict keyed by
+``(country, prefix)`` plus the prefix lengths in use, so a lookup is a
+handful of dict probes (longest prefix first) however many zones exist.
+The index is cached like the settings rows (``settings_cache``).
+
+When no zones are configured, delivery is not restricted and the flat
+``DeliverySettings`` charge applies, as before.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+
+from .models import DeliveryZone
+from .money import from_cents, percent_of, to_cents
+
+COUNTRY_ALIASES = {
+    'nl': 'NL', 'netherlands': 'NL', 'the netherlands': 'NL', 'nederland': 'NL', 'holland': 'NL',
+    'be': 'BE', 'belgium': 'BE', 'belgië': 'BE', 'belgie': 'BE', 'belgique': 'BE', 'belgien': 'BE',
+}
+
+# NL: 4 digits + 2 letters; BE: 4 digits
+POSTCODE_PATTERNS = {
+    'NL': re.compile(r'^[1-9][0-9]{3}([A-Z]{2})?$'),
+    'BE': re.compile(r'^[1-9][0-9]{3}$'),
+}
+
+
+class DeliveryZoneError(ValueError):
+    """The address cannot be delivered to."""
+
+
+@dataclass(frozen=True)
+class Zone:
+    name: str
+    country: str
+    prefix: str
+    distance_km: Decimal
+    fee: Decimal
+    eta_minutes: int
+
+
+@dataclass(frozen=True)
+class DeliveryQuote:
+    zone: Zone | None
+    delivery_charge: Decimal
+    eta_minutes: int
+
+    def as_dict(self) -> dict:
+        return {
+            'deliverable': True,
+            'zone': self.zone.name if self.zone else None,
+            'distance_km': str(self.zone.distance_km) if self.zone else None,
+            'delivery_charge': str(self.delivery_charge),
+            'eta_minutes': self.eta_minutes,
+        }
+
+
+def normalize_country(country: str | None) -> str:
+    value = (country or 'NL').strip()
+    return COUNTRY_ALIASES.get(value.lower(), value.upper())
+
+
+def normalize_postcode(postal_code: str | None) -> str:
+    return re.sub(r'[\s-]', '', postal_code or '').upper()
+
+
+class ZoneIndex:
+    """Longest-prefix lookup of postal codes to zones."""
+
+    def __init__(self, zones):
+        self._zones: dict[tuple[str, str], Zone] = {}
+        lengths = set()
+        for zone in zones:
+            self._zones[(zone.country, zone.prefix)] = zone
+            lengths.add(len(zone.prefix))
+        self._lengths = tuple(sorted(lengths, reverse=True))
+
+    def __bool__(self) -> bool:
+        return bool(self._zones)
+
+    def __len__(self) -> int:
+        return len(self._zones)
+
+    def lookup(self, postal_code: str, country: str = 'NL') -> Zone | None:
+        code = normalize_postcode(postal_code)
+        country = normalize_country(country)
+        for length in self._lengths:
+            if length <= len(code):
+                zone = self._zones.get((country, code[:length]))
+                if zone is not None:
+                    return zone
+        return None
+
+
+def build_zone_index() -> ZoneIndex:
+    return ZoneIndex(
+        Zone(
+            name=row.name,
+            country=row.country,
+            prefix=normalize_postcode(row.postal_prefix),
+            distance_km=row.distance_km,
+            fee=row.delivery_fee,
+            eta_minutes=row.eta_minutes,
+        )
+        for row in DeliveryZone.objects.filter(is_active=True)
+    )
+
+
+def quote_delivery(postal_code, country, subtotal: Decimal, settings, index: ZoneIndex) -> DeliveryQuote:
+    """Price delivery of ``subtotal`` to ``postal_code``.
+
+    Raises ``DeliveryZoneError`` if zones are configured and the address is
+    outside them or beyond ``settings.max_delivery_radius``.
+    """
+    percentage_charge = percent_of(to_cents(subtotal), settings.delivery_charge_percent) if settings else 0
+    default_eta = settings.estimated_delivery_time if settings else 30
+
+    if not index:
+        fixed = to_cents(settings.delivery_charge_fixed) if settings else 0
+        return DeliveryQuote(zone=None, delivery_charge=from_cents(fixed + percentage_charge), eta_minutes=default_eta)
+
+    country_code = normalize_country(country)
+    code = normalize_postcode(postal_code)
+    pattern = POSTCODE_PATTERNS.get(country_code)
+    if pattern is None:
+        raise DeliveryZoneError('We do not deliver to this country')
+    if not pattern.match(code):
+        raise DeliveryZoneError('Invalid postal code')
+    zone = index.lookup(code, country_code)
+    if zone is None:
+        raise DeliveryZoneError('We do not deliver to this postal code')
+    if settings is not None and settings.max_delivery_radius and zone.distance_km > settings.max_delivery_radius:
+        raise DeliveryZoneError('This address is outside our delivery radius')
+    return DeliveryQuote(
+        zone=zone, delivery_charge=from_cents(to_cents(zone.fee) + percentage_charge), eta_minutes=zone.eta_minutes
+    )
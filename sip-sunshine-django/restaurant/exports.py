@@ -0,0 +1,125 @@
+"""Streaming order exports for accounting.
+
+Orders are read in primary-key ranges of ``chunk_size`` rows
+(``WHERE id > last ORDER BY id LIMIT n``) and the lines of each chunk are
+fetched with one ``order_id IN (...)`` query, so memory stays bounded by
+one chunk however many orders the date range covers. The output is produced
+row by row, for a ``StreamingHttpResponse`` or a file.
+
+CSV has one row per order line with the order columns repeated (an order
+without lines gets one row with empty line columns); JSONL has one order
+per line with its ``items`` nested. Text cells of the CSV that a
+spreadsheet would run as a formula (guest names, item names, ...) are
+prefixed with ``'``.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import OrderItem
+
+CHUNK_SIZE = 500
+FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+ORDER_FIELDS = (
+    'id', 'created_at', 'completed_at', 'status', 'order_type', 'user_id',
+    'guest_name', 'guest_email', 'delivery_postal_code', 'payment_method',
+    'payment_status', 'payment_id', 'item_count', 'quantity_sum',
+    'subtotal', 'tax', 'delivery_charge', 'total_price',
+)
+LINE_FIELDS = ('menu_item_id', 'item_name', 'item_price', 'quantity')
+CSV_HEADER = ORDER_FIELDS + tuple(f'line_{name}' for name in LINE_FIELDS) + ('line_subtotal',)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _plain(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _cell(value):
+    """``_plain`` for CSV: text starting like a formula is kept as text."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return _plain(value)
+
+
+def iter_orders(queryset, chunk_size: int = CHUNK_SIZE):
+    """Yield ``(order, lines)`` pairs as plain dicts, in id order."""
+    queryset = queryset.order_by('pk').values(*ORDER_FIELDS)
+    last_pk = 0
+    while True:
+        orders = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not orders:
+            return
+        lines = {}
+        for line in (
+            OrderItem.objects.filter(order_id__in=[order['id'] for order in orders])
+            .order_by('order_id', 'pk')
+            .values('order_id', *LINE_FIELDS)
+        ):
+            lines.setdefault(line.pop('order_id'), []).append(line)
+        for order in orders:
+            yield order, lines.get(order['id'], [])
+        last_pk = orders[-1]['id']
+
+
+def _line_subtotal(line) -> str:
+    return str((line['item_price'] or Decimal('0.00')) * line['quantity'])
+
+
+def csv_rows(orders):
+    """Header plus one row per order line."""
+    yield CSV_HEADER
+    for order, lines in orders:
+        head = [_cell(order[name]) for name in ORDER_FIELDS]
+        if not lines:
+            yield head + [''] * (len(LINE_FIELDS) + 1)
+        for line in lines:
+            yield head + [_cell(line[name]) for name in LINE_FIELDS] + [_line_subtotal(line)]
+
+
+class _Echo:
+    """File-like object that hands each written row back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(orders):
+    writer = csv.writer(_Echo())
+    for row in csv_rows(orders):
+        yield writer.writerow(row)
+
+
+def iter_jsonl(orders):
+    for order, lines in orders:
+        record = {name: _plain(order[name]) for name in ORDER_FIELDS}
+        record['items'] = [
+            dict({name: _plain(line[name]) for name in LINE_FIELDS}, subtotal=_line_subtotal(line))
+            for line in lines
+        ]
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def export_orders(queryset, fmt: str = 'csv', chunk_size: int = CHUNK_SIZE):
+    """Iterate the export of ``queryset`` as text chunks in ``fmt``."""
+    if fmt not in FORMATS:
+        raise ValueError(f'format must be one of: {", ".join(FORMATS)}')
+    orders = iter_orders(queryset, chunk_size)
+    return iter_csv(orders) if fmt == 'csv' else iter_jsonl(orders)
@@ -0,0 +1,98 @@
+"""Idempotency-Key support for POST endpoints.
+
+Clients on unreliable connections may retry a request whose first attempt
+already succeeded. When such a request carries an ``Idempotency-Key``
+header, the first successful response is kept in the shared cache together
+with a fingerprint of the request body; a retry with the same key gets that
+response replayed without running the view (and without touching the
+database).
+
+A key that is still being processed is claimed with ``cache.add`` so that a
+concurrent duplicate is told to retry instead of creating a second order.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAY_HEADER = 'Idempotent-Replayed'
+CACHE_KEY = 'idempotency:{path}:{key}'
+MAX_KEY_LENGTH = 255
+# How long a completed response is replayed for.
+RESPONSE_TTL = 60 * 60 * 24
+# How long an in-flight claim blocks duplicates if the worker dies mid-request.
+PENDING_TTL = 60
+
+PENDING = 'pending'
+
+
+def _fingerprint(request) -> str:
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def _replay(stored) -> HttpResponse:
+    _fingerprint, status, content, content_type = stored
+    response = HttpResponse(content, status=status, content_type=content_type)
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def _conflict(stored, fingerprint):
+    if stored[0] != fingerprint:
+        return JsonResponse({
+            'success': False,
+            'message': 'Idempotency-Key was already used for a different request'
+        }, status=422)
+    if stored[1] == PENDING:
+        return JsonResponse({
+            'success': False,
+            'message': 'A request with this Idempotency-Key is still being processed'
+        }, status=409)
+    return None
+
+
+def idempotent(view):
+    """Replay the stored response for requests that repeat an Idempotency-Key."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.META.get(HEADER, '').strip()
+        if not key:
+            return view(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse({'success': False, 'message': 'Idempotency-Key is too long'}, status=400)
+
+        cache_key = CACHE_KEY.format(path=request.path, key=hashlib.sha256(key.encode()).hexdigest())
+        fingerprint = _fingerprint(request)
+
+        if not cache.add(cache_key, (fingerprint, PENDING, b'', ''), PENDING_TTL):
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return _conflict(stored, fingerprint) or _replay(stored)
+            # The claim expired between add() and get(); take it over.
+            cache.set(cache_key, (fingerprint, PENDING, b'', ''), PENDING_TTL)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+
+        if response.status_code >= 400 or response.streaming:
+            # Only successes are replayed; a rejected request can be fixed
+            # and resent under the same key.
+            cache.delete(cache_key)
+        else:
+            cache.set(
+                cache_key,
+                (fingerprint, response.status_code, response.content, response.get('Content-Type', '')),
+                RESPONSE_TTL,
+            )
+        return response
+
+    return wrapper
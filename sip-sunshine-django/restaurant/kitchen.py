@@ -0,0 +1,87 @@
+"""Order change feed for kitchen and counter displays.
+
+Displays poll ``changes_since(cursor)`` and upsert the returned orders by id.
+The cursor is the ``(updated_at, id)`` position of the last order returned,
+served by the ``order_updated_feed_idx`` composite index, so each poll is a
+single range scan plus one query for the item lines.
+
+``updated_at`` is stamped before the saving transaction commits, so a slow
+transaction can commit a row behind a cursor that has already moved on. The
+returned cursor is therefore never ahead of ``now - SETTLE_SECONDS``; orders
+changed within that window may be sent twice, which upserting absorbs.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import Order, OrderItem
+from .pagination import after, decode_cursor, encode_cursor
+
+SETTLE_SECONDS = 2
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+# A display starting without a cursor only needs orders still in progress.
+CLOSED_STATUSES = ('completed', 'cancelled')
+
+ORDER_FIELDS = (
+    'id', 'order_type', 'status', 'table_number', 'preferred_pickup_time',
+    'guest_name', 'special_requests', 'created_at', 'updated_at',
+)
+
+
+def _serialize(order: Order) -> dict:
+    return {
+        'id': order.id,
+        'number': order.order_number,
+        'type': order.order_type,
+        'status': order.status,
+        'table': order.table_number,
+        'pickup_at': order.preferred_pickup_time.isoformat() if order.preferred_pickup_time else None,
+        'guest': order.guest_name,
+        'notes': order.special_requests,
+        'created_at': order.created_at.isoformat(),
+        'updated_at': order.updated_at.isoformat(),
+        # [name, quantity, special instructions]
+        'items': [[item.item_name, item.quantity, item.special_instructions] for item in order.items.all()],
+    }
+
+
+def changes_since(cursor: str | None = None, limit: int = DEFAULT_LIMIT) -> dict:
+    """Return orders changed after ``cursor``, oldest change first.
+
+    The result holds ``orders``, the ``cursor`` to send next time and ``more``
+    when another page is immediately available.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    orders = Order.objects.only(*ORDER_FIELDS).prefetch_related(
+        Prefetch(
+            'items',
+            queryset=OrderItem.objects.only('order_id', 'item_name', 'quantity', 'special_instructions'),
+        )
+    )
+    previous = decode_cursor(cursor) if cursor else None
+    if previous is None:
+        orders = orders.exclude(status__in=CLOSED_STATUSES)
+
+    page = list(after(orders, 'updated_at', previous)[:limit + 1])
+    more = len(page) > limit
+    page = page[:limit]
+
+    position = (page[-1].updated_at, page[-1].id) if page else previous
+    if not more:
+        # Hold the cursor back so late-committing rows are not skipped,
+        # without ever moving it backwards.
+        settled = (timezone.now() - timedelta(seconds=SETTLE_SECONDS), 0)
+        position = settled if position is None else min(position, settled)
+        if previous is not None:
+            position = max(position, previous)
+
+    return {
+        'orders': [_serialize(order) for order in page],
+        'cursor': encode_cursor(*position),
+        'more': more,
+    }
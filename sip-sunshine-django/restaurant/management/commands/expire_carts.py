@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from restaurant.cart_expiry import BATCH_SIZE, collect_expired_carts, ttl
+
+
+class Command(BaseCommand):
+    help = 'Delete carts that have not been updated within the cart TTL, in small primary-key batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Expire carts idle for this many days; default: CART_TTL_DAYS')
+        parser.add_argument('--include-users', action='store_true', help="Also expire logged-in customers' carts")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Primary keys per transaction')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['days'] is not None and options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        age = timedelta(days=options['days']) if options['days'] is not None else ttl()
+        result = collect_expired_carts(
+            timezone.now() - age,
+            include_users=options['include_users'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f'Would delete {result.carts} carts and {result.cart_items} cart items')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {result.carts} carts and {result.cart_items} cart items '
+            f'({result.bytes} bytes) in {result.batches} batches'
+        ))
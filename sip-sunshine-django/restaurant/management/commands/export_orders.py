@@ -0,0 +1,65 @@
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from restaurant.exports import CHUNK_SIZE, FORMATS, export_orders
+from restaurant.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Export orders with their lines as CSV or JSONL, streamed in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First local date to export (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last local date to export (YYYY-MM-DD)')
+        parser.add_argument('--month', help='Export one calendar month (YYYY-MM); overrides --start/--end')
+        parser.add_argument('--status', action='append', help='Only orders in this status (repeatable)')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', '-o', help='File to write; default: stdout')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def parse_date(self, value, option):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'{option} must be a date in YYYY-MM-DD format')
+
+    def date_range(self, options):
+        if options['month']:
+            try:
+                start = date.fromisoformat(f"{options['month']}-01")
+            except ValueError:
+                raise CommandError('--month must be in YYYY-MM format')
+            end = (start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+            return start, end
+        start = self.parse_date(options['start'], '--start')
+        end = self.parse_date(options['end'], '--end')
+        if start and end and start > end:
+            raise CommandError('--start must not be after --end')
+        return start, end
+
+    def handle(self, *args, **options):
+        start, end = self.date_range(options)
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        # Compare against local-midnight bounds so created_at's index is used
+        orders = Order.objects.all()
+        if start:
+            orders = orders.filter(created_at__gte=timezone.make_aware(datetime.combine(start, time.min)))
+        if end:
+            orders = orders.filter(created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)))
+        if options['status']:
+            orders = orders.filter(status__in=options['status'])
+
+        chunks = export_orders(orders, options['format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as handle:
+                handle.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
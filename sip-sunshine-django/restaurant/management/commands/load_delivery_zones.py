@@ -0,0 +1,59 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from restaurant.delivery_zones import normalize_country, normalize_postcode
+from restaurant.models import DeliveryZone
+from restaurant.settings_cache import invalidate_settings
+
+COLUMNS = ('country', 'postal_prefix', 'name', 'distance_km', 'delivery_fee', 'eta_minutes')
+
+
+class Command(BaseCommand):
+    help = (
+        'Load delivery zones from a CSV file with the columns '
+        'country, postal_prefix, name, distance_km, delivery_fee, eta_minutes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--replace', action='store_true', help='Delete all existing zones first')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], newline='', encoding='utf-8') as handle:
+                rows = list(csv.DictReader(handle))
+        except OSError as exc:
+            raise CommandError(str(exc))
+        if rows and set(COLUMNS) - set(rows[0]):
+            raise CommandError(f'Missing columns: {", ".join(sorted(set(COLUMNS) - set(rows[0])))}')
+
+        zones = {}
+        for number, row in enumerate(rows, start=2):
+            try:
+                zone = DeliveryZone(
+                    country=normalize_country(row['country']),
+                    postal_prefix=normalize_postcode(row['postal_prefix']),
+                    name=row['name'].strip(),
+                    distance_km=Decimal(row['distance_km']),
+                    delivery_fee=Decimal(row['delivery_fee']),
+                    eta_minutes=int(row['eta_minutes']),
+                )
+            except (InvalidOperation, ValueError) as exc:
+                raise CommandError(f'Line {number}: {exc}')
+            zones[(zone.country, zone.postal_prefix)] = zone
+
+        with transaction.atomic():
+            if options['replace']:
+                DeliveryZone.objects.all().delete()
+            DeliveryZone.objects.bulk_create(
+                zones.values(),
+                update_conflicts=True,
+                unique_fields=['country', 'postal_prefix'],
+                update_fields=['name', 'distance_km', 'delivery_fee', 'eta_minutes'],
+            )
+        # bulk_create sends no post_save; drop the cached zone index explicitly
+        invalidate_settings(DeliveryZone)
+        self.stdout.write(self.style.SUCCESS(f'Loaded {len(zones)} delivery zones'))
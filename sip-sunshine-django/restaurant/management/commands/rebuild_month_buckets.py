@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from restaurant.date_buckets import TRACKED, model_key, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recount the per-month buckets used by the admin date hierarchy'
+
+    def handle(self, *args, **options):
+        for model in TRACKED:
+            months = rebuild(model)
+            self.stdout.write(self.style.SUCCESS(f'{model_key(model)}: {months} months'))
@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily sales rollups from completed orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First local date to rebuild (YYYY-MM-DD); default: all history')
+        parser.add_argument('--end', help='Last local date to rebuild (YYYY-MM-DD); default: today')
+
+    def parse_date(self, value, option):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'{option} must be a date in YYYY-MM-DD format')
+
+    def handle(self, *args, **options):
+        start = self.parse_date(options['start'], '--start')
+        end = self.parse_date(options['end'], '--end')
+        if start and end and start > end:
+            raise CommandError('--start must not be after --end')
+
+        sales_rows, item_rows = rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {sales_rows} sales rollup rows and {item_rows} menu item rollup rows.'
+        ))
@@ -0,0 +1,33 @@
+"""Custom managers and querysets for the restaurant models."""
+
+from django.db.models import Prefetch
+from django.utils.translation import get_language
+from parler import appsettings
+from parler.managers import TranslatableManager, TranslatableQuerySet
+
+
+class TranslationPrefetchQuerySet(TranslatableQuerySet):
+    """TranslatableQuerySet that can batch-load translations for a list view.
+
+    Without a prefetch, every ``{{ obj.title }}`` in a template may cost its own
+    translation query. ``prefetch_translations()`` loads the rows for the
+    active language plus its fallbacks in one extra query for the whole list.
+    """
+
+    def prefetch_translations(self, language_code=None):
+        language_code = language_code or self._language or get_language()
+        language_codes = appsettings.PARLER_LANGUAGES.get_active_choices(language_code)
+        translations_model = self.model._parler_meta.root_model
+        return self.prefetch_related(
+            Prefetch(
+                self.model._parler_meta.root_rel_name,
+                queryset=translations_model.objects.filter(language_code__in=language_codes),
+            )
+        )
+
+
+class TranslationPrefetchManager(TranslatableManager):
+    _queryset_class = TranslationPrefetchQuerySet
+
+    def prefetch_translations(self, language_code=None):
+        return self.get_queryset().prefetch_translations(language_code)
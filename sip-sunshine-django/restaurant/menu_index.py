@@ -0,0 +1,65 @@
+"""Cached, per-language index of menu item names for admin autocomplete.
+
+Order lines point at ``MenuItem`` rows whose ``__str__`` is a parler
+translation lookup, so rendering or searching them one by one costs a query
+per item. The index holds every item's display name (inactive items too, as
+old orders reference them) for one language and is cached under the menu
+version from ``restaurant.menu_snapshot``, so any MenuItem or translation
+change supersedes it.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+
+from .menu_snapshot import SNAPSHOT_TIMEOUT, get_menu_version
+from .models import MenuItem
+
+CACHE_KEY = 'menu_name_index:{version}:{language}'
+
+
+@dataclass(frozen=True)
+class MenuNameIndex:
+    language: str
+    # id -> display name, in menu order
+    names: dict[int, str]
+
+    def label(self, pk) -> str:
+        try:
+            return self.names.get(int(pk), '')
+        except (TypeError, ValueError):
+            return ''
+
+    def search(self, term: str, limit: int | None = None) -> list[int]:
+        """Ids whose name contains every word of ``term``, in menu order."""
+        words = term.casefold().split()
+        matches = [
+            pk for pk, name in self.names.items()
+            if all(word in name.casefold() for word in words)
+        ]
+        return matches[:limit] if limit else matches
+
+
+def build_menu_name_index(language: str) -> MenuNameIndex:
+    queryset = MenuItem.objects.order_by('category', 'order', 'id').prefetch_related('translations')
+    names = {}
+    with translation.override(language):
+        for item in queryset:
+            item.set_current_language(language)
+            names[item.pk] = item.safe_translation_getter('name', default='', any_language=True) or f'#{item.pk}'
+    return MenuNameIndex(language=language, names=names)
+
+
+def get_menu_name_index(language: str | None = None) -> MenuNameIndex:
+    """Return the cached index for ``language``, building it on a miss."""
+    language = language or translation.get_language() or settings.LANGUAGE_CODE
+    key = CACHE_KEY.format(version=get_menu_version(), language=language)
+    index = cache.get(key)
+    if index is None:
+        index = build_menu_name_index(language)
+        cache.set(key, index, SNAPSHOT_TIMEOUT)
+    return index
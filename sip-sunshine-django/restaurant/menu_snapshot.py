@@ -0,0 +1,168 @@
+"""Precomputed, per-language menu snapshots.
+
+The menu page shows the same active items grouped several ways (category
+tabs, featured strip, the older ``categories`` mapping). Instead of deriving
+each grouping from its own queryset on every request, a snapshot is built
+once per language in a single pass and kept in the cache.
+
+Snapshots are keyed by a menu version counter that is bumped whenever a
+MenuItem or one of its translations changes (see ``restaurant.signals``), so
+stale snapshots are simply never read again. The same counter drives the
+ETag of the ``/api/menu/`` endpoint.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import translation
+
+from . import cache_versions
+from .models import MenuItem
+
+VERSION_KEY = 'menu_version'
+CACHE_KEY = 'menu_snapshot:{version}:{language}'
+# Long enough for a quiet menu; superseded snapshots expire on their own
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+APPETIZER_CATEGORIES = frozenset({'appetizers', 'Appetizers'})
+DESSERT_CATEGORIES = frozenset({'desserts', 'Desserts'})
+BEVERAGE_CATEGORIES = frozenset({'beverages', 'Beverages', 'drinks', 'Drinks'})
+MAIN_COURSE_CATEGORIES = frozenset({'main_courses', 'main', 'Main', 'Side', 'main courses', 'Main Courses'})
+
+FEATURED_COUNT = 6
+
+
+@dataclass(frozen=True)
+class MenuEntry:
+    """A menu item resolved for one language, safe to cache and share."""
+    id: int
+    category: str
+    category_label: str
+    name: str
+    description: str
+    price: Decimal
+    image_url: str
+    order: int
+
+
+@dataclass(frozen=True)
+class MenuSnapshot:
+    """All active menu items for one language, already grouped for templates."""
+    language: str
+    items: tuple[MenuEntry, ...]
+    appetizers: tuple[MenuEntry, ...]
+    main_courses: tuple[MenuEntry, ...]
+    desserts: tuple[MenuEntry, ...]
+    beverages: tuple[MenuEntry, ...]
+    # (category label, entries) pairs in menu order. Kept as tuples so the
+    # snapshot stays immutable and picklable for the cache backend.
+    grouped: tuple[tuple[str, tuple[MenuEntry, ...]], ...]
+
+    @property
+    def categories(self) -> dict[str, list[MenuEntry]]:
+        return {label: list(entries) for label, entries in self.grouped}
+
+    @property
+    def featured_items(self) -> tuple[MenuEntry, ...]:
+        return self.items[:FEATURED_COUNT]
+
+
+def _image_url(item: MenuItem) -> str:
+    if not item.image:
+        return ''
+    try:
+        return item.image.url
+    except ValueError:
+        return ''
+
+
+def build_menu_snapshot(language: str) -> MenuSnapshot:
+    """Build a snapshot straight from the database (items + translations)."""
+    known = {key for key, _label in MenuItem.CATEGORY_CHOICES}
+    labels = dict(MenuItem.CATEGORY_CHOICES)
+
+    # Snapshots are rebuilt rarely, so load every language's translations:
+    # any_language below can then fall back to whatever text exists.
+    queryset = (
+        MenuItem.objects.filter(is_active=True)
+        .order_by('category', 'order', 'id')
+        .prefetch_related('translations')
+    )
+
+    items = []
+    appetizers, main_courses, desserts, beverages = [], [], [], []
+    grouped: dict[str, list[MenuEntry]] = {}
+
+    with translation.override(language):
+        for item in queryset:
+            item.set_current_language(language)
+            category = item.category or ''
+            label = str(labels.get(category, category))
+            entry = MenuEntry(
+                id=item.pk,
+                category=category,
+                category_label=label,
+                name=item.safe_translation_getter('name', default='', any_language=True),
+                description=item.safe_translation_getter('description', default='', any_language=True),
+                price=item.price,
+                image_url=_image_url(item),
+                order=item.order,
+            )
+            items.append(entry)
+            grouped.setdefault(label, []).append(entry)
+
+            # Anything not matching a known category is treated as a main course.
+            if category in APPETIZER_CATEGORIES:
+                appetizers.append(entry)
+            elif category in DESSERT_CATEGORIES:
+                desserts.append(entry)
+            elif category in BEVERAGE_CATEGORIES:
+                beverages.append(entry)
+            if category in MAIN_COURSE_CATEGORIES or category not in known:
+                main_courses.append(entry)
+
+    return MenuSnapshot(
+        language=language,
+        items=tuple(items),
+        appetizers=tuple(appetizers),
+        main_courses=tuple(main_courses),
+        desserts=tuple(desserts),
+        beverages=tuple(beverages),
+        grouped=tuple((label, tuple(entries)) for label, entries in grouped.items()),
+    )
+
+
+def get_menu_version() -> int:
+    """Return the current menu version, seeding the counter if it is missing."""
+    return cache_versions.get(VERSION_KEY)
+
+
+def _bump_menu_version() -> None:
+    cache_versions.bump(VERSION_KEY)
+
+
+def get_menu_snapshot(language: str | None = None) -> MenuSnapshot:
+    """Return the cached snapshot for ``language``, building it on a miss."""
+    language = language or translation.get_language() or settings.LANGUAGE_CODE
+    key = CACHE_KEY.format(version=get_menu_version(), language=language)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_menu_snapshot(language)
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def invalidate_menu_snapshots() -> None:
+    """Bump the menu version so every cached snapshot is superseded.
+
+    Runs immediately and again after the surrounding transaction commits, so
+    a request that rebuilt the snapshot from pre-commit data cannot leave a
+    stale copy behind.
+    """
+    _bump_menu_version()
+    transaction.on_commit(_bump_menu_version)
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+
+def backfill_order_totals(apps, schema_editor):
+    Order = apps.get_model("restaurant", "Order")
+    line_subtotal = ExpressionWrapper(F("items__item_price") * F("items__quantity"), output_field=DecimalField())
+    orders = (
+        Order.objects.filter(items__isnull=False)
+        .annotate(
+            line_count=Count("items"),
+            line_quantity=Sum("items__quantity"),
+            line_subtotal=Sum(line_subtotal),
+        )
+        .values("pk", "delivery_charge", "line_count", "line_quantity", "line_subtotal")
+    )
+    for row in orders.iterator():
+        subtotal = Decimal(str(row["line_subtotal"] or 0)).quantize(Decimal("0.01"))
+        tax = (subtotal * Decimal("0.21")).quantize(Decimal("0.01"))
+        Order.objects.filter(pk=row["pk"]).update(
+            item_count=row["line_count"],
+            quantity_sum=row["line_quantity"] or 0,
+            subtotal=subtotal,
+            tax=tax,
+            total_price=subtotal + tax + (row["delivery_charge"] or Decimal("0.00")),
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("restaurant", "0006_cartitem_compat"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Item Count"),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="quantity_sum",
+            field=models.PositiveIntegerField(default=0, verbose_name="Quantity Sum"),
+        ),
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+def link_orders_to_accounts(apps, schema_editor):
+    """Attach guest orders to the account with the same email address.
+
+    Order history used to be matched on ``guest_email``; it is now read
+    through ``Order.user``, so earlier orders keep showing up for their owner.
+    """
+    Order = apps.get_model("restaurant", "Order")
+    User = apps.get_model("auth", "User")
+
+    users_by_email = {}
+    for user_id, email in User.objects.exclude(email="").values_list("id", "email"):
+        users_by_email.setdefault(email.lower(), []).append(user_id)
+
+    for email, user_ids in users_by_email.items():
+        if len(user_ids) != 1:
+            # Ambiguous address: leave those orders unlinked.
+            continue
+        Order.objects.filter(user__isnull=True, guest_email__iexact=email).update(user_id=user_ids[0])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("restaurant", "0008_order_updated_feed_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["user", "-created_at"], name="order_user_created_idx"),
+        ),
+        migrations.RunPython(link_orders_to_accounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("restaurant", "0009_order_user_created_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SalesRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(verbose_name="Date")),
+                ("hour", models.PositiveSmallIntegerField(verbose_name="Hour")),
+                (
+                    "order_type",
+                    models.CharField(
+                        choices=[("seated", "Seated Customer"), ("pickup", "Pickup Order"), ("delivery", "Delivery Order")],
+                        max_length=20,
+                        verbose_name="Order Type",
+                    ),
+                ),
+                (
+                    "payment_method",
+                    models.CharField(
+                        choices=[
+                            ("cash", "Cash on Delivery/Pickup"),
+                            ("stripe", "Credit/Debit Card (Stripe)"),
+                            ("paypal", "PayPal"),
+                        ],
+                        max_length=20,
+                        verbose_name="Payment Method",
+                    ),
+                ),
+                ("order_count", models.IntegerField(default=0, verbose_name="Orders")),
+                ("item_quantity", models.IntegerField(default=0, verbose_name="Items Sold")),
+                ("subtotal", models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name="Subtotal")),
+                ("tax", models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name="Tax")),
+                (
+                    "delivery_charge",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name="Delivery Charges"),
+                ),
+                ("total", models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name="Total")),
+            ],
+            options={
+                "verbose_name": "Sales Rollup",
+                "verbose_name_plural": "Sales Rollups",
+                "ordering": ["-date", "hour"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "hour", "order_type", "payment_method"), name="sales_rollup_bucket_unique"
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="MenuItemSalesRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(verbose_name="Date")),
+                ("item_key", models.CharField(max_length=320, verbose_name="Item Key")),
+                ("item_name", models.CharField(max_length=300, verbose_name="Item Name")),
+                ("line_count", models.IntegerField(default=0, verbose_name="Order Lines")),
+                ("quantity", models.IntegerField(default=0, verbose_name="Quantity")),
+                ("revenue", models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name="Revenue")),
+                (
+                    "menu_item",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="restaurant.menuitem",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Menu Item Sales Rollup",
+                "verbose_name_plural": "Menu Item Sales Rollups",
+                "ordering": ["-date", "-quantity"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("date", "item_key"), name="item_sales_rollup_unique"),
+                ],
+            },
+        ),
+    ]
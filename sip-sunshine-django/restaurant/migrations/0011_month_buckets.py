@@ -0,0 +1,45 @@
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_buckets(apps, schema_editor):
+    MonthBucket = apps.get_model('restaurant', 'MonthBucket')
+    for label in ('restaurant.order', 'restaurant.contactmessage'):
+        model = apps.get_model(label)
+        counts = Counter(
+            timezone.localtime(value).date().replace(day=1) if timezone.is_aware(value) else value.date().replace(day=1)
+            for value in model.objects.order_by().values_list('created_at', flat=True).iterator(chunk_size=2000)
+            if value is not None
+        )
+        MonthBucket.objects.bulk_create(
+            [MonthBucket(model=label, month=month, count=count) for month, count in counts.items()]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("restaurant", "0010_sales_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthBucket",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("model", models.CharField(max_length=100, verbose_name="Model")),
+                ("month", models.DateField(help_text="First day of the month", verbose_name="Month")),
+                ("count", models.IntegerField(default=0, verbose_name="Count")),
+            ],
+            options={
+                "verbose_name": "Month Bucket",
+                "verbose_name_plural": "Month Buckets",
+                "ordering": ["model", "month"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("model", "month"), name="month_bucket_unique"),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("restaurant", "0012_order_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PickupSlot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("start", models.DateTimeField(unique=True, verbose_name="Slot Start")),
+                ("reserved_items", models.IntegerField(default=0, verbose_name="Reserved Items")),
+                ("order_count", models.IntegerField(default=0, verbose_name="Orders")),
+            ],
+            options={
+                "verbose_name": "Pickup Slot",
+                "verbose_name_plural": "Pickup Slots",
+                "ordering": ["start"],
+            },
+        ),
+        migrations.AddField(
+            model_name="deliverysettings",
+            name="pickup_slot_minutes",
+            field=models.PositiveIntegerField(
+                default=15, help_text="Length of one pickup time slot", verbose_name="Pickup Slot Length (minutes)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="deliverysettings",
+            name="pickup_slot_capacity",
+            field=models.PositiveIntegerField(
+                default=12,
+                help_text="Number of items the kitchen can prepare per pickup slot",
+                verbose_name="Pickup Slot Capacity (items)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="pickup_slot",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="orders",
+                to="restaurant.pickupslot",
+            ),
+        ),
+    ]
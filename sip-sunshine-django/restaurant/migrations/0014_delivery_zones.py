@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("restaurant", "0013_pickup_slots"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeliveryZone",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=100, verbose_name="Zone Name")),
+                (
+                    "country",
+                    models.CharField(
+                        choices=[("NL", "Netherlands"), ("BE", "Belgium")],
+                        default="NL",
+                        max_length=2,
+                        verbose_name="Country",
+                    ),
+                ),
+                (
+                    "postal_prefix",
+                    models.CharField(
+                        help_text="Digits (and letters) the postal code starts with, no spaces",
+                        max_length=10,
+                        verbose_name="Postal Code Prefix",
+                    ),
+                ),
+                ("distance_km", models.DecimalField(decimal_places=2, max_digits=5, verbose_name="Distance (km)")),
+                ("delivery_fee", models.DecimalField(decimal_places=2, max_digits=6, verbose_name="Delivery Fee")),
+                ("eta_minutes", models.PositiveIntegerField(default=30, verbose_name="Delivery Time (minutes)")),
+                ("is_active", models.BooleanField(default=True, verbose_name="Active")),
+            ],
+            options={
+                "verbose_name": "Delivery Zone",
+                "verbose_name_plural": "Delivery Zones",
+                "ordering": ["country", "postal_prefix"],
+                "constraints": [
+                    models.UniqueConstraint(fields=("country", "postal_prefix"), name="delivery_zone_prefix_unique")
+                ],
+            },
+        ),
+    ]
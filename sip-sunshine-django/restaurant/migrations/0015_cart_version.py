@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("restaurant", "0014_delivery_zones"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cart",
+            name="subtotal",
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name="Subtotal"),
+        ),
+        migrations.AddField(
+            model_name="cart",
+            name="version",
+            field=models.PositiveIntegerField(default=1, verbose_name="Version"),
+        ),
+    ]
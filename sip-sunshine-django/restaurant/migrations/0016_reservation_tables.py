@@ -0,0 +1,93 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("restaurant", "0015_cart_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReservationSettings",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("first_seating_time", models.TimeField(default="12:00", verbose_name="First Seating")),
+                ("last_seating_time", models.TimeField(default="21:00", verbose_name="Last Seating")),
+                (
+                    "dining_minutes",
+                    models.PositiveIntegerField(
+                        default=120,
+                        help_text="How long a table stays taken after the reservation time",
+                        verbose_name="Dining Duration (minutes)",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Reservation Settings",
+                "verbose_name_plural": "Reservation Settings",
+            },
+        ),
+        migrations.CreateModel(
+            name="DiningTable",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=50, unique=True, verbose_name="Table")),
+                ("seats", models.PositiveSmallIntegerField(verbose_name="Seats")),
+                (
+                    "min_party_size",
+                    models.PositiveSmallIntegerField(
+                        default=1, help_text="Smallest party this table is given to", verbose_name="Minimum Party Size"
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True, verbose_name="Active")),
+            ],
+            options={
+                "verbose_name": "Dining Table",
+                "verbose_name_plural": "Dining Tables",
+                "ordering": ["seats", "name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="reservation",
+            name="table",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="reservations",
+                to="restaurant.diningtable",
+                verbose_name="Table",
+            ),
+        ),
+        migrations.CreateModel(
+            name="TableSlot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(verbose_name="Date")),
+                ("slot", models.PositiveSmallIntegerField(verbose_name="Slot")),
+                (
+                    "reservation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="table_slots",
+                        to="restaurant.reservation",
+                    ),
+                ),
+                (
+                    "table",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="slots", to="restaurant.diningtable"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Table Slot",
+                "verbose_name_plural": "Table Slots",
+                "indexes": [models.Index(fields=["date"], name="table_slot_date_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("table", "date", "slot"), name="table_slot_unique")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("restaurant", "0016_reservation_tables"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RolledUpOrder",
+            fields=[
+                (
+                    "order",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="restaurant.order",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Date")),
+                ("hour", models.PositiveSmallIntegerField(verbose_name="Hour")),
+                (
+                    "order_type",
+                    models.CharField(
+                        choices=[("seated", "Seated Customer"), ("pickup", "Pickup Order"), ("delivery", "Delivery Order")],
+                        max_length=20,
+                        verbose_name="Order Type",
+                    ),
+                ),
+                (
+                    "payment_method",
+                    models.CharField(
+                        choices=[
+                            ("cash", "Cash on Delivery/Pickup"),
+                            ("stripe", "Credit/Debit Card (Stripe)"),
+                            ("paypal", "PayPal"),
+                        ],
+                        max_length=20,
+                        verbose_name="Payment Method",
+                    ),
+                ),
+                ("item_quantity", models.IntegerField(default=0, verbose_name="Items Sold")),
+                ("subtotal", models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name="Subtotal")),
+                ("tax", models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name="Tax")),
+                (
+                    "delivery_charge",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name="Delivery Charges"),
+                ),
+                ("total", models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name="Total")),
+                ("items", models.JSONField(default=list, verbose_name="Items")),
+            ],
+            options={
+                "verbose_name": "Rolled-up Order",
+                "verbose_name_plural": "Rolled-up Orders",
+                "indexes": [models.Index(fields=["date"], name="rolled_up_order_date_idx")],
+            },
+        ),
+    ]
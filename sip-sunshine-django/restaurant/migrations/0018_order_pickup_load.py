@@ -0,0 +1,23 @@
+from django.db import migrations, models
+from django.db.models.functions import Greatest
+
+
+def backfill_pickup_load(apps, schema_editor):
+    # Until now a slot held the order's item count at the time of release
+    Order = apps.get_model('restaurant', 'Order')
+    Order.objects.filter(pickup_slot__isnull=False).update(pickup_load=Greatest('quantity_sum', 1))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("restaurant", "0017_rolled_up_orders"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="pickup_load",
+            field=models.PositiveIntegerField(default=0, verbose_name="Pickup Load"),
+        ),
+        migrations.RunPython(backfill_pickup_load, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,18 @@
-from django.db import models
+from django.db import models, transaction
+import copy
 from datetime import timedelta
+from decimal import Decimal
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from parler.models import TranslatableModel, TranslatedFields
 from parler.fields import TranslatedField
 import json
 
+from .managers import TranslationPrefetchManager
+from .money import from_cents, percent_of, tax_cents, to_cents
+
 
 class Language(models.Model):
     """Supported languages for the website"""
@@ -78,6 +84,8 @@ class Page(TranslatableModel):
         meta_keywords=models.CharField(_('Meta Keywords'), max_length=500, blank=True),
         content=models.TextField(_('Content'), blank=True),
     )
+
+    objects = TranslationPrefetchManager()
     
     class Meta:
         verbose_name = _('Page')
@@ -110,6 +118,8 @@ class MenuItem(TranslatableModel):
         name=models.CharField(_('Item Name'), max_length=200),
         description=models.TextField(_('Description'), blank=True),
     )
+
+    objects = TranslationPrefetchManager()
     
     class Meta:
         verbose_name = _('Menu Item')
@@ -151,6 +161,8 @@ class ContentBlock(TranslatableModel):
         button_text=models.CharField(_('Button Text'), max_length=100, blank=True),
         button_url=models.CharField(_('Button URL'), max_length=500, blank=True),
     )
+
+    objects = TranslationPrefetchManager()
     
     class Meta:
         verbose_name = _('Content Block')
@@ -178,6 +190,8 @@ class BlogPost(TranslatableModel):
         excerpt=models.TextField(_('Excerpt')),
         content=models.TextField(_('Content')),
     )
+
+    objects = TranslationPrefetchManager()
     
     class Meta:
         verbose_name = _('Blog Post')
@@ -207,6 +221,15 @@ class Reservation(models.Model):
     number_of_guests = models.IntegerField(_('Number of Guests'))
     special_requests = models.TextField(_('Special Requests'), blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Assigned by restaurant.reservations when tables are configured
+    table = models.ForeignKey(
+        'DiningTable',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reservations',
+        verbose_name=_('Table'),
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -217,6 +240,38 @@ class Reservation(models.Model):
     def __str__(self):
         return f"{self.name} - {self.reservation_date} {self.reservation_time}"
 
+    # Changing any of these moves the reservation off its table
+    SEATING_FIELDS = ('reservation_date', 'reservation_time', 'number_of_guests', 'status')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded_seating = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_seating = instance._seating_state()
+        return instance
+
+    def _seating_state(self):
+        if any(name not in self.__dict__ for name in self.SEATING_FIELDS):
+            return None
+        return (
+            self.reservation_date, self.reservation_time, self.number_of_guests, self.status == 'cancelled'
+        )
+
+    @property
+    def seating_changed(self):
+        """True if the date, time, party size or cancellation changed since loading."""
+        return self._loaded_seating is None or self._seating_state() != self._loaded_seating
+
+    def save(self, *args, **kwargs):
+        # The post_save hook claims (or gives back) the table; if no table is
+        # free the row change is rolled back with it (restaurant.reservations)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._loaded_seating = self._seating_state()
+
 
 class ContactMessage(models.Model):
     """Contact form messages"""
@@ -273,6 +328,14 @@ class CustomerProfile(models.Model):
         return f"CustomerProfile({self.user_id})"
 
 
+class OrderConflict(Exception):
+    """An Order UPDATE lost a race: the row's version moved on since it was read."""
+
+
+class InvalidStatusTransition(ValueError):
+    """The Order status table does not allow this change."""
+
+
 class Order(models.Model):
     """Order management for seated, pickup, and delivery orders"""
     ORDER_TYPE_CHOICES = [
@@ -291,6 +354,17 @@ class Order(models.Model):
         ('cancelled', _('Cancelled')),
     ]
     
+    # status -> statuses it may move to; completed and cancelled are final
+    STATUS_TRANSITIONS = {
+        'pending': ('confirmed', 'cancelled'),
+        'confirmed': ('preparing', 'cancelled'),
+        'preparing': ('ready', 'cancelled'),
+        'ready': ('out_for_delivery', 'completed', 'cancelled'),
+        'out_for_delivery': ('completed',),
+        'completed': (),
+        'cancelled': (),
+    }
+
     PAYMENT_METHOD_CHOICES = [
         ('cash', _('Cash on Delivery/Pickup')),
         ('stripe', _('Credit/Debit Card (Stripe)')),
@@ -339,6 +413,9 @@ class Order(models.Model):
     subtotal = models.DecimalField(_('Subtotal'), max_digits=10, decimal_places=2, default=0)
     tax = models.DecimalField(_('Tax'), max_digits=10, decimal_places=2, default=0)
     total_price = models.DecimalField(_('Total Price'), max_digits=10, decimal_places=2, default=0)
+    # Line aggregates, kept current by OrderItem (see apply_line_delta)
+    item_count = models.PositiveIntegerField(_('Item Count'), default=0)
+    quantity_sum = models.PositiveIntegerField(_('Quantity Sum'), default=0)
     
     # Order Status & Timing
     status = models.CharField(
@@ -348,6 +425,14 @@ class Order(models.Model):
     )
     promised_time = models.DateTimeField(_('Promised Completion Time'), null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    # Kitchen capacity reserved for this pickup order (restaurant.pickup_slots)
+    pickup_slot = models.ForeignKey(
+        'PickupSlot', on_delete=models.SET_NULL, null=True, blank=True, related_name='orders'
+    )
+    # Items reserved in that slot; released as is, whatever the lines become
+    pickup_load = models.PositiveIntegerField(_('Pickup Load'), default=0)
+    # Bumped by every UPDATE; saves and status changes compare-and-swap on it
+    version = models.PositiveIntegerField(_('Version'), default=1)
     
     # Payment Information
     payment_method = models.CharField(
@@ -381,6 +466,10 @@ class Order(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['order_type']),
             models.Index(fields=['payment_status']),
+            # Cursor for the kitchen change feed (restaurant.kitchen)
+            models.Index(fields=['updated_at', 'id'], name='order_updated_feed_idx'),
+            # Customer order history (restaurant.order_history)
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
         ]
 
     def __init__(self, *args, **kwargs):
@@ -388,14 +477,125 @@ class Order(models.Model):
         if 'total_amount' in kwargs and 'total_price' not in kwargs:
             kwargs['total_price'] = kwargs.pop('total_amount')
         super().__init__(*args, **kwargs)
+        self._loaded_totals = None
+        self._loaded_status = None
+
+    # Stored money and line aggregates; TOTAL_INPUT_FIELDS feed calculate_total().
+    TOTAL_FIELDS = ('subtotal', 'tax', 'delivery_charge', 'total_price', 'item_count', 'quantity_sum')
+    TOTAL_INPUT_FIELDS = ('subtotal', 'tax', 'delivery_charge')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_saved_state()
+        return instance
+
+    def _totals_state(self):
+        if any(name not in self.__dict__ for name in self.TOTAL_FIELDS):
+            return None
+        return tuple(self.__dict__[name] for name in self.TOTAL_FIELDS)
+
+    def _remember_saved_state(self):
+        self._loaded_totals = self._totals_state()
+        self._loaded_status = self.__dict__.get('status')
+
+    def can_transition_to(self, status):
+        return status in self.STATUS_TRANSITIONS.get(self.status, ())
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # Optimistic concurrency: the UPDATE only matches the version this
+        # instance holds and bumps it, so a concurrent edit makes it miss.
+        version_field = self._meta.get_field('version')
+        expected = self.version
+        values = [value for value in values if value[0] is not version_field]
+        values.append((version_field, None, models.F('version') + 1))
+        updated = super()._do_update(
+            base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update
+        )
+        if updated:
+            self.version = expected + 1
+        elif base_qs.filter(pk=pk_val).exists():
+            raise OrderConflict(
+                f'Order #{pk_val} was changed by someone else (expected version {expected})'
+            )
+        return updated
+
+    @property
+    def status_changed(self):
+        """True if ``status`` differs from the value last loaded or saved."""
+        return self.__dict__.get('status') != self._loaded_status
 
     def save(self, *args, **kwargs):
-        # Keep tax/total consistent for orders created in tests that set subtotal.
-        try:
-            self.calculate_total()
-        except Exception:
-            pass
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            recompute = bool(set(update_fields) & set(self.TOTAL_INPUT_FIELDS))
+            if recompute:
+                kwargs['update_fields'] = set(update_fields) | {'tax', 'total_price'}
+        elif (
+            not args
+            and not kwargs.get('force_insert')
+            and not self._state.adding
+            and self._loaded_totals is not None
+            and self._totals_state() == self._loaded_totals
+        ):
+            # Nothing money-related changed (e.g. a status update): skip the
+            # recomputation and leave the stored totals out of the UPDATE so
+            # line-item changes made meanwhile are not overwritten.
+            recompute = False
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.TOTAL_FIELDS
+            ]
+        else:
+            recompute = True
+
+        if recompute:
+            # Keep tax/total consistent for orders created in tests that set subtotal.
+            try:
+                self.calculate_total()
+            except Exception:
+                pass
         super().save(*args, **kwargs)
+        self._remember_saved_state()
+
+    @classmethod
+    def apply_line_delta(cls, order_id, *, item_count=0, quantity_sum=0, subtotal=Decimal('0.00'), instance=None):
+        """Fold a line-item change into the stored totals of one order.
+
+        The order row is locked, adjusted by the given deltas and written back
+        with a single UPDATE; the items themselves are never re-read. When the
+        caller holds the order ``instance`` it is updated in place as well.
+        """
+        with transaction.atomic():
+            row = (
+                cls.objects.select_for_update()
+                .filter(pk=order_id)
+                .values('subtotal', 'delivery_charge', 'item_count', 'quantity_sum', 'version')
+                .first()
+            )
+            if row is None:
+                return
+            subtotal_cents = to_cents(row['subtotal']) + to_cents(subtotal)
+            tax = tax_cents(subtotal_cents)
+            values = {
+                'subtotal': from_cents(subtotal_cents),
+                'tax': from_cents(tax),
+                'total_price': from_cents(subtotal_cents + tax + to_cents(row['delivery_charge'])),
+                'item_count': max(row['item_count'] + item_count, 0),
+                'quantity_sum': max(row['quantity_sum'] + quantity_sum, 0),
+                'updated_at': timezone.now(),
+            }
+            # Bumping the version makes a save() from an older copy conflict
+            # instead of overwriting the new totals
+            cls.objects.filter(pk=order_id).update(version=models.F('version') + 1, **values)
+
+        if instance is not None:
+            for name, value in values.items():
+                setattr(instance, name, value)
+            instance.delivery_charge = row['delivery_charge']
+            instance._loaded_totals = instance._totals_state()
+            if instance.version == row['version']:
+                instance.version += 1
 
     @property
     def order_number(self):
@@ -424,13 +624,15 @@ class Order(models.Model):
         if not getattr(self, 'created_at', None):
             return None
 
+        from .settings_cache import get_delivery_settings
+
         if self.order_type == 'pickup':
             if getattr(self, 'preferred_pickup_time', None):
                 return self.preferred_pickup_time
 
             minutes = None
             try:
-                settings = DeliverySettings.objects.first()
+                settings = get_delivery_settings()
                 if settings and settings.estimated_pickup_time is not None:
                     minutes = int(settings.estimated_pickup_time)
             except Exception:
@@ -442,7 +644,7 @@ class Order(models.Model):
         if self.order_type == 'delivery':
             minutes = None
             try:
-                settings = DeliverySettings.objects.first()
+                settings = get_delivery_settings()
                 if settings and settings.estimated_delivery_time is not None:
                     minutes = int(settings.estimated_delivery_time)
             except Exception:
@@ -467,41 +669,24 @@ class Order(models.Model):
     
     def get_item_count(self):
         """Get total number of items in order"""
-        return self.items.count()
+        return self.item_count
     
     def get_item_quantity_sum(self):
         """Get sum of all item quantities"""
-        return sum(item.quantity for item in self.items.all())
+        return self.quantity_sum
     
     def calculate_total(self):
-        """Calculate total from items and charges"""
-        from decimal import Decimal
-
-        items = None
-        if self.pk is not None:
-            items = self.items.all()
-
-        if items is not None and items.exists():
-            # Calculate subtotal from items if they exist
-            subtotal = sum(
-                (item.get_subtotal() for item in items), 
-                Decimal('0.00')
-            )
-            self.subtotal = subtotal
-            # Calculate tax as Decimal (21% VAT for Netherlands)
-            self.tax = (subtotal * Decimal('0.21')).quantize(Decimal('0.01'))
-        else:
-            # Use preset subtotal and tax if no items (e.g., for testing)
-            subtotal = Decimal(str(self.subtotal)) if self.subtotal else Decimal('0.00')
-            # If tax wasn't provided, compute it from subtotal.
-            if not self.tax:
-                self.tax = (subtotal * Decimal('0.21')).quantize(Decimal('0.01'))
-        
-        # Ensure delivery_charge is a Decimal
-        delivery = Decimal(str(self.delivery_charge)) if self.delivery_charge else Decimal('0.00')
-        
-        # Sum all charges as Decimals
-        self.total_price = subtotal + self.tax + delivery
+        """Calculate total from the stored subtotal and charges.
+
+        ``subtotal`` is maintained as line items change (see
+        ``apply_line_delta``), so the items are not queried here. Tax always
+        follows the subtotal, as in ``apply_line_delta``.
+        """
+        subtotal = to_cents(self.subtotal)
+        # 21% VAT for the Netherlands
+        tax = tax_cents(subtotal)
+        self.tax = from_cents(tax)
+        self.total_price = from_cents(subtotal + tax + to_cents(self.delivery_charge))
         return self.total_price
     
     def is_paid(self):
@@ -533,13 +718,20 @@ class OrderItem(models.Model):
         ordering = ['order', 'created_at']
     
     def __str__(self):
-        return f"{self.item_name} x{self.quantity} (Order #{self.order.id})"
+        return f"{self.item_name} x{self.quantity} (Order #{self.order_id})"
 
     def __init__(self, *args, **kwargs):
         # Backwards-compatibility: older code/tests used `item` for menu item.
         if 'item' in kwargs and 'menu_item' not in kwargs:
             kwargs['menu_item'] = kwargs.pop('item')
         super().__init__(*args, **kwargs)
+        self._saved_line = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_line = instance._line_totals()
+        return instance
 
     @property
     def item(self):
@@ -551,12 +743,22 @@ class OrderItem(models.Model):
 
     def save(self, *args, **kwargs):
         # Auto-fill captured fields if not provided (tests often set only menu_item).
-        if self.menu_item is not None:
+        # Checked via menu_item_id first so fully captured lines skip the fetch.
+        needs_capture = not self.item_name or self.item_price in (None, '')
+        if needs_capture and self.menu_item_id is not None:
             if not self.item_name:
                 self.item_name = getattr(self.menu_item, 'name', '') or ''
             if self.item_price in (None, ''):
                 self.item_price = getattr(self.menu_item, 'price', 0) or 0
-        super().save(*args, **kwargs)
+
+        previous = None
+        if not self._state.adding:
+            previous = self._saved_line or self._stored_line_totals()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            current = self._line_totals()
+            self._apply_to_order_totals(previous, current)
+        self._saved_line = current
     
     def get_subtotal(self):
         """Get subtotal for this order item"""
@@ -564,11 +766,56 @@ class OrderItem(models.Model):
             return 0
         return self.item_price * self.quantity
 
+    def _line_totals(self):
+        """``(order_id, quantity, subtotal)`` this line contributes, if loaded."""
+        if any(name not in self.__dict__ for name in ('order_id', 'item_price', 'quantity')):
+            return None
+        price = Decimal(str(self.item_price)) if self.item_price not in (None, '') else Decimal('0.00')
+        quantity = int(self.quantity or 0)
+        return (self.order_id, quantity, price * quantity)
+
+    def _stored_line_totals(self):
+        row = OrderItem.objects.filter(pk=self.pk).values_list('order_id', 'item_price', 'quantity').first()
+        if row is None:
+            return None
+        order_id, price, quantity = row
+        return (order_id, quantity, (price or Decimal('0.00')) * quantity)
+
+    def _apply_to_order_totals(self, previous, current):
+        """Move this line's contribution from ``previous`` to ``current`` on the order(s)."""
+        deltas = {}
+        for line, sign in ((previous, -1), (current, 1)):
+            if line is None or line[0] is None:
+                continue
+            order_id, quantity, subtotal = line
+            count_delta, quantity_delta, subtotal_delta = deltas.get(order_id, (0, 0, Decimal('0.00')))
+            deltas[order_id] = (count_delta + sign, quantity_delta + sign * quantity, subtotal_delta + sign * subtotal)
+
+        cached_order = self._state.fields_cache.get('order')
+        for order_id, (count_delta, quantity_delta, subtotal_delta) in deltas.items():
+            if not (count_delta or quantity_delta or subtotal_delta):
+                continue
+            Order.apply_line_delta(
+                order_id,
+                item_count=count_delta,
+                quantity_sum=quantity_delta,
+                subtotal=subtotal_delta,
+                instance=cached_order if cached_order is not None and cached_order.pk == order_id else None,
+            )
+
+    def remove_from_order_totals(self):
+        """Take a deleted line back out of its order's stored totals."""
+        self._apply_to_order_totals(self._saved_line or self._line_totals(), None)
+        self._saved_line = None
+
 class Cart(models.Model):
     """Shopping cart for customers"""
     session_key = models.CharField(_('Session Key'), max_length=40, unique=True)
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True, related_name='shopping_cart')
     items = models.JSONField(_('Cart Items'), default=list, help_text='Stored as JSON for flexibility')
+    # Subtotal of ``items`` as of the last write; ``version`` counts writes (see restaurant.carts)
+    subtotal = models.DecimalField(_('Subtotal'), max_digits=10, decimal_places=2, null=True, blank=True)
+    version = models.PositiveIntegerField(_('Version'), default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -578,21 +825,31 @@ class Cart(models.Model):
     
     def __str__(self):
         return f"Cart - {self.user.username if self.user else self.session_key}"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Copy of ``items`` that ``subtotal`` was computed for
+        self._subtotal_items = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'items' in instance.__dict__ and 'subtotal' in instance.__dict__:
+            instance._remember_subtotal()
+        return instance
+
+    def _remember_subtotal(self):
+        self._subtotal_items = copy.deepcopy(self.items)
     
     def add_item(self, item_data):
         """Add or update item in cart"""
-        from decimal import Decimal
+        from .carts import CartChange, apply_changes
 
         def normalize(value):
             if isinstance(value, Decimal):
                 return str(value)
             return value
 
-        try:
-            items = json.loads(json.dumps(self.items)) if isinstance(self.items, str) else (self.items or [])
-        except Exception:
-            items = []
-
         normalized = {
             'id': item_data.get('id'),
             'name': item_data.get('name', ''),
@@ -604,19 +861,8 @@ class Cart(models.Model):
         for key in ['description', 'image', 'category', 'special_instructions']:
             if key in item_data:
                 normalized[key] = normalize(item_data.get(key))
-        
-        # Check if item already exists
-        for item in items:
-            if item.get('id') == normalized.get('id'):
-                item['quantity'] = int(item.get('quantity', 1) or 1) + int(normalized.get('quantity', 1) or 1)
-                self.items = items
-                self.save()
-                return True
-        
-        # Add new item
-        items.append(normalized)
-        self.items = items
-        self.save()
+
+        apply_changes(self, [CartChange('add', item_id=normalized['id'], quantity=normalized['quantity'], item=normalized)])
         return True
 
     def get_items(self):
@@ -625,22 +871,29 @@ class Cart(models.Model):
             return json.loads(self.items) if isinstance(self.items, str) else (self.items or [])
         except Exception:
             return []
-    
+
     def remove_item(self, item_id):
         """Remove item from cart"""
-        try:
-            items = json.loads(json.dumps(self.items)) if isinstance(self.items, str) else self.items
-        except:
-            items = []
-        
-        self.items = [item for item in items if item.get('id') != item_id]
-        self.save()
+        from .carts import CartChange, apply_changes
+        apply_changes(self, [CartChange('remove', item_id=item_id)])
 
     def clear_cart(self):
         """Remove all items from the cart."""
-        self.items = []
-        self.save()
-    
+        from .carts import CartChange, apply_changes
+        apply_changes(self, [CartChange('clear')])
+
+    def save(self, *args, **kwargs):
+        # Direct writes of ``items`` keep the cached subtotal in step
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'items' in update_fields:
+            from .carts import CartLines
+            self.subtotal = CartLines(self.get_items()).subtotal
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'subtotal'}
+        super().save(*args, **kwargs)
+        if update_fields is None or 'items' in update_fields:
+            self._remember_subtotal()
+
     def get_total(self):
         """Calculate cart total.
 
@@ -648,24 +901,18 @@ class Cart(models.Model):
         - If prices were provided as Decimal, return VAT-inclusive Decimal (Phase 3 unit tests).
         - If prices were provided as float/int, return subtotal as float (Phase 3 unit_FIXED tests).
         """
-        from decimal import Decimal, ROUND_HALF_UP
-
         items = self.get_items()
-        subtotal = Decimal('0.00')
-        saw_decimal = False
-
-        for item in items:
-            raw_price = item.get('price', 0)
-            if isinstance(raw_price, (Decimal, str)):
-                saw_decimal = True
-                price = Decimal(str(raw_price or 0))
-            else:
-                price = Decimal(str(raw_price or 0))
-            qty = int(item.get('quantity', 1) or 1)
-            subtotal += price * qty
+        # The stored subtotal only holds while ``items`` is as written
+        if self.subtotal is not None and self._subtotal_items == self.items:
+            subtotal = self.subtotal
+        else:
+            from .carts import CartLines
+            subtotal = CartLines(items).subtotal
+        saw_decimal = any(isinstance(item.get('price', 0), (Decimal, str)) for item in items)
 
         if saw_decimal:
-            return (subtotal * Decimal('1.21')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            cents = to_cents(subtotal)
+            return from_cents(cents + tax_cents(cents))
 
         return float(subtotal)
 
@@ -749,6 +996,18 @@ class DeliverySettings(models.Model):
         help_text='Maximum distance for delivery'
     )
     
+    # Kitchen throughput for the pickup slot scheduler (restaurant.pickup_slots)
+    pickup_slot_minutes = models.PositiveIntegerField(
+        _('Pickup Slot Length (minutes)'),
+        default=15,
+        help_text='Length of one pickup time slot'
+    )
+    pickup_slot_capacity = models.PositiveIntegerField(
+        _('Pickup Slot Capacity (items)'),
+        default=12,
+        help_text='Number of items the kitchen can prepare per pickup slot'
+    )
+
     # Operating hours
     delivery_start_time = models.TimeField(_('Delivery Start Time'), default='11:00')
     delivery_end_time = models.TimeField(_('Delivery End Time'), default='22:00')
@@ -798,10 +1057,42 @@ class DeliverySettings(models.Model):
     
     def calculate_delivery_charge(self, order_total):
         """Calculate delivery charge based on order total"""
-        charge = self.delivery_charge_fixed
+        charge = to_cents(self.delivery_charge_fixed)
         if self.delivery_charge_percent > 0:
-            charge += (order_total * self.delivery_charge_percent) / 100
-        return round(charge, 2)
+            charge += percent_of(to_cents(order_total), self.delivery_charge_percent)
+        return from_cents(charge)
+
+
+class DeliveryZone(models.Model):
+    """Delivery zone for a postal code prefix (e.g. NL "1012", BE "1000").
+
+    The longest matching prefix wins; see ``restaurant.delivery_zones``.
+    """
+    COUNTRY_CHOICES = [
+        ('NL', _('Netherlands')),
+        ('BE', _('Belgium')),
+    ]
+
+    name = models.CharField(_('Zone Name'), max_length=100)
+    country = models.CharField(_('Country'), max_length=2, choices=COUNTRY_CHOICES, default='NL')
+    postal_prefix = models.CharField(
+        _('Postal Code Prefix'), max_length=10, help_text='Digits (and letters) the postal code starts with, no spaces'
+    )
+    distance_km = models.DecimalField(_('Distance (km)'), max_digits=5, decimal_places=2)
+    delivery_fee = models.DecimalField(_('Delivery Fee'), max_digits=6, decimal_places=2)
+    eta_minutes = models.PositiveIntegerField(_('Delivery Time (minutes)'), default=30)
+    is_active = models.BooleanField(_('Active'), default=True)
+
+    class Meta:
+        verbose_name = _('Delivery Zone')
+        verbose_name_plural = _('Delivery Zones')
+        ordering = ['country', 'postal_prefix']
+        constraints = [
+            models.UniqueConstraint(fields=['country', 'postal_prefix'], name='delivery_zone_prefix_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.country} {self.postal_prefix}* ({self.name})"
 
 
 class PaymentSettings(models.Model):
@@ -845,4 +1136,202 @@ class PaymentSettings(models.Model):
         kwargs.pop('cash_enabled', None)
         kwargs.pop('stripe_enabled', None)
         kwargs.pop('paypal_enabled', None)
-        super().__init__(*args, **kwargs)
\ No newline at end of file
+        super().__init__(*args, **kwargs)
+
+class SalesRollup(models.Model):
+    """Completed-order totals per local day, hour, order type and payment method.
+
+    Maintained by ``restaurant.rollups``; reports read these rows instead of
+    aggregating Order from scratch.
+    """
+    date = models.DateField(_('Date'))
+    hour = models.PositiveSmallIntegerField(_('Hour'))
+    order_type = models.CharField(_('Order Type'), max_length=20, choices=Order.ORDER_TYPE_CHOICES)
+    payment_method = models.CharField(_('Payment Method'), max_length=20, choices=Order.PAYMENT_METHOD_CHOICES)
+    order_count = models.IntegerField(_('Orders'), default=0)
+    item_quantity = models.IntegerField(_('Items Sold'), default=0)
+    subtotal = models.DecimalField(_('Subtotal'), max_digits=12, decimal_places=2, default=0)
+    tax = models.DecimalField(_('Tax'), max_digits=12, decimal_places=2, default=0)
+    delivery_charge = models.DecimalField(_('Delivery Charges'), max_digits=12, decimal_places=2, default=0)
+    total = models.DecimalField(_('Total'), max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = _('Sales Rollup')
+        verbose_name_plural = _('Sales Rollups')
+        ordering = ['-date', 'hour']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'hour', 'order_type', 'payment_method'],
+                name='sales_rollup_bucket_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.hour:02d}:00 {self.order_type}/{self.payment_method}"
+
+
+class MenuItemSalesRollup(models.Model):
+    """Completed-order quantities and revenue per menu item and local day."""
+    date = models.DateField(_('Date'))
+    # Menu item id, or "name:<item name>" for lines without a menu item
+    item_key = models.CharField(_('Item Key'), max_length=320)
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    item_name = models.CharField(_('Item Name'), max_length=300)
+    line_count = models.IntegerField(_('Order Lines'), default=0)
+    quantity = models.IntegerField(_('Quantity'), default=0)
+    revenue = models.DecimalField(_('Revenue'), max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = _('Menu Item Sales Rollup')
+        verbose_name_plural = _('Menu Item Sales Rollups')
+        ordering = ['-date', '-quantity']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'item_key'], name='item_sales_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.item_name} x{self.quantity}"
+
+
+class RolledUpOrder(models.Model):
+    """What one completed order added to the sales rollups.
+
+    Written by ``restaurant.rollups`` when the order is counted, so taking it
+    out again subtracts exactly these amounts, even if the order or its lines
+    were edited since.
+    """
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    date = models.DateField(_('Date'))
+    hour = models.PositiveSmallIntegerField(_('Hour'))
+    order_type = models.CharField(_('Order Type'), max_length=20, choices=Order.ORDER_TYPE_CHOICES)
+    payment_method = models.CharField(_('Payment Method'), max_length=20, choices=Order.PAYMENT_METHOD_CHOICES)
+    item_quantity = models.IntegerField(_('Items Sold'), default=0)
+    subtotal = models.DecimalField(_('Subtotal'), max_digits=12, decimal_places=2, default=0)
+    tax = models.DecimalField(_('Tax'), max_digits=12, decimal_places=2, default=0)
+    delivery_charge = models.DecimalField(_('Delivery Charges'), max_digits=12, decimal_places=2, default=0)
+    total = models.DecimalField(_('Total'), max_digits=12, decimal_places=2, default=0)
+    # One entry per menu item rollup row: item_key, menu_item_id, item_name, line_count, quantity, revenue
+    items = models.JSONField(_('Items'), default=list)
+
+    class Meta:
+        verbose_name = _('Rolled-up Order')
+        verbose_name_plural = _('Rolled-up Orders')
+        indexes = [
+            models.Index(fields=['date'], name='rolled_up_order_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id} in {self.date} {self.hour:02d}:00"
+
+
+class MonthBucket(models.Model):
+    """Row count per model and local calendar month of ``created_at``.
+
+    Maintained by ``restaurant.date_buckets``; the admin date hierarchy lists
+    years and months from these rows instead of scanning the whole table.
+    """
+    model = models.CharField(_('Model'), max_length=100)
+    month = models.DateField(_('Month'), help_text='First day of the month')
+    count = models.IntegerField(_('Count'), default=0)
+
+    class Meta:
+        verbose_name = _('Month Bucket')
+        verbose_name_plural = _('Month Buckets')
+        ordering = ['model', 'month']
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'month'], name='month_bucket_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.month:%Y-%m}: {self.count}"
+
+
+class PickupSlot(models.Model):
+    """Kitchen occupancy of one pickup time slot.
+
+    Rows are created on first reservation; ``reserved_items`` only changes
+    through conditional UPDATEs in ``restaurant.pickup_slots``.
+    """
+    start = models.DateTimeField(_('Slot Start'), unique=True)
+    reserved_items = models.IntegerField(_('Reserved Items'), default=0)
+    order_count = models.IntegerField(_('Orders'), default=0)
+
+    class Meta:
+        verbose_name = _('Pickup Slot')
+        verbose_name_plural = _('Pickup Slots')
+        ordering = ['start']
+
+    def __str__(self):
+        return f"{timezone.localtime(self.start):%Y-%m-%d %H:%M} ({self.reserved_items} items)"
+
+
+class ReservationSettings(models.Model):
+    """Seating hours and dining duration for table reservations"""
+    first_seating_time = models.TimeField(_('First Seating'), default='12:00')
+    last_seating_time = models.TimeField(_('Last Seating'), default='21:00')
+    dining_minutes = models.PositiveIntegerField(
+        _('Dining Duration (minutes)'),
+        default=120,
+        help_text='How long a table stays taken after the reservation time'
+    )
+
+    class Meta:
+        verbose_name = _('Reservation Settings')
+        verbose_name_plural = _('Reservation Settings')
+
+    def __str__(self):
+        return f"Seating {self.first_seating_time:%H:%M}-{self.last_seating_time:%H:%M}, {self.dining_minutes} min"
+
+    def clean(self):
+        first, last = self.first_seating_time, self.last_seating_time
+        if first and last and first > last:
+            raise ValidationError({'last_seating_time': _('Last seating must not be before the first seating.')})
+        if last and self.dining_minutes and last.hour * 60 + last.minute + self.dining_minutes > 24 * 60:
+            raise ValidationError(
+                {'dining_minutes': _('The last sitting must end by midnight; move the last seating earlier.')}
+            )
+
+
+class DiningTable(models.Model):
+    """A table that reservations can be seated at"""
+    name = models.CharField(_('Table'), max_length=50, unique=True)
+    seats = models.PositiveSmallIntegerField(_('Seats'))
+    min_party_size = models.PositiveSmallIntegerField(
+        _('Minimum Party Size'), default=1, help_text='Smallest party this table is given to'
+    )
+    is_active = models.BooleanField(_('Active'), default=True)
+
+    class Meta:
+        verbose_name = _('Dining Table')
+        verbose_name_plural = _('Dining Tables')
+        ordering = ['seats', 'name']
+
+    def __str__(self):
+        return f"{self.name} ({self.seats} seats)"
+
+
+class TableSlot(models.Model):
+    """One 15-minute slot of a table taken by a reservation.
+
+    The unique constraint is what makes claiming a table atomic; see
+    ``restaurant.reservations``.
+    """
+    table = models.ForeignKey(DiningTable, on_delete=models.CASCADE, related_name='slots')
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='table_slots')
+    date = models.DateField(_('Date'))
+    # Minutes since midnight // 15
+    slot = models.PositiveSmallIntegerField(_('Slot'))
+
+    class Meta:
+        verbose_name = _('Table Slot')
+        verbose_name_plural = _('Table Slots')
+        constraints = [
+            models.UniqueConstraint(fields=['table', 'date', 'slot'], name='table_slot_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='table_slot_date_idx'),
+        ]
+
+    def __str__(self):
+        minutes = self.slot * 15
+        return f"{self.table_id} {self.date} {minutes // 60:02d}:{minutes % 60:02d}"
@@ -0,0 +1,91 @@
+"""Money arithmetic in integer cents.
+
+Prices arrive as Decimals from the database, as floats or strings from the
+browser cart and as ints from tests. Each amount is converted to integer
+cents once (``to_cents``); sums, line totals, VAT and percentage charges
+are then plain integer arithmetic, with one rounding rule for every derived
+amount: to the cent, half to even (so VAT on 12.50 is 2.62, as the orders
+have always been priced). Amounts go back to two-place Decimals
+(``from_cents``) only where they are stored or shown.
+"""
+
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+
+CENT = Decimal('0.01')
+TAX_RATE = Decimal('0.21')  # VAT for the Netherlands
+TAX_PERCENT = TAX_RATE * 100
+
+
+def to_cents(value) -> int:
+    """Whole cents of an amount in euros."""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, float):
+        # repr() is the shortest string that round-trips: 0.1 -> "0.1"
+        value = repr(value)
+    try:
+        amount = value if isinstance(value, Decimal) else Decimal(value)
+        if amount.as_tuple().exponent == -2:
+            return int(amount.scaleb(2))
+        return int(amount.quantize(CENT, rounding=ROUND_HALF_EVEN).scaleb(2))
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError(f'Invalid amount: {value!r}')
+
+
+def from_cents(cents: int) -> Decimal:
+    """Two-place Decimal euros for ``cents``."""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def round_money(value) -> Decimal:
+    """``value`` rounded to the cent, as a two-place Decimal."""
+    return from_cents(to_cents(value))
+
+
+def percent_of(cents: int, percent) -> int:
+    """``percent`` % of ``cents``, rounded to a whole cent."""
+    # Percentages carry at most two decimals (DecimalField(5, 2)), so work in
+    # hundredths of a percent and stay in integers.
+    basis_points = to_cents(percent)
+    rounded, remainder = divmod(abs(cents) * basis_points, 10000)
+    if remainder * 2 > 10000 or (remainder * 2 == 10000 and rounded % 2):
+        rounded += 1
+    return rounded if cents >= 0 else -rounded
+
+
+def tax_cents(subtotal_cents: int) -> int:
+    return percent_of(subtotal_cents, TAX_PERCENT)
+
+
+def subtotal_cents(prices, quantities) -> int:
+    """Sum of ``price * quantity`` over parallel sequences, in one pass."""
+    return sum(map(operator.mul, prices, quantities))
+
+
+@dataclass(frozen=True)
+class Totals:
+    subtotal: int
+    tax: int
+    delivery_charge: int
+
+    @property
+    def total(self) -> int:
+        return self.subtotal + self.tax + self.delivery_charge
+
+    def as_decimals(self) -> dict[str, Decimal]:
+        return {
+            'subtotal': from_cents(self.subtotal),
+            'tax': from_cents(self.tax),
+            'delivery_charge': from_cents(self.delivery_charge),
+            'total_price': from_cents(self.total),
+        }
+
+
+def order_totals(prices, quantities, delivery_charge: int = 0) -> Totals:
+    """Subtotal, VAT and total of an order's lines given in cents."""
+    subtotal = subtotal_cents(prices, quantities)
+    return Totals(subtotal=subtotal, tax=tax_cents(subtotal), delivery_charge=delivery_charge)
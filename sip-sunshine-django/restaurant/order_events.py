@@ -0,0 +1,145 @@
+"""Live order status updates over Server-Sent Events.
+
+``notifier`` is an in-process broker: ``Order`` status saves publish to it
+(see ``restaurant.signals``) and each open tracking stream waits on it for
+its own order. A stream sends the current status once, then one event per
+transition, with a comment line as heartbeat in between. On each heartbeat
+the status is re-read from the database, which also picks up transitions
+made by other worker processes.
+
+Each worker serves at most ``MAX_STREAMS`` streams at a time; callers get
+``None`` from ``open_stream()`` when no slot is free.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .models import Order
+
+HEARTBEAT_SECONDS = 15
+# Browsers reconnect EventSource automatically; cap how long one request runs.
+MAX_STREAM_SECONDS = 10 * 60
+MAX_STREAMS = 50
+# Statuses after which nothing more can happen to an order.
+FINAL_STATUSES = frozenset({'completed', 'cancelled'})
+
+
+class OrderStatusNotifier:
+    """Fan out order status changes to waiting streams in this process."""
+
+    # Only the latest change per order is kept, for this many orders.
+    MAX_TRACKED_ORDERS = 1024
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._sequence = 0
+        self._latest: OrderedDict[int, tuple[int, str]] = OrderedDict()
+
+    def publish(self, order_id: int, status: str) -> None:
+        with self._condition:
+            self._sequence += 1
+            self._latest[order_id] = (self._sequence, status)
+            self._latest.move_to_end(order_id)
+            while len(self._latest) > self.MAX_TRACKED_ORDERS:
+                self._latest.popitem(last=False)
+            self._condition.notify_all()
+
+    def publish_many(self, order_ids, status: str) -> None:
+        """Record the same change for several orders with one wake-up."""
+        with self._condition:
+            for order_id in order_ids:
+                self._sequence += 1
+                self._latest[order_id] = (self._sequence, status)
+                self._latest.move_to_end(order_id)
+            while len(self._latest) > self.MAX_TRACKED_ORDERS:
+                self._latest.popitem(last=False)
+            self._condition.notify_all()
+
+    def position(self, order_id: int) -> int:
+        """Sequence number of the last change seen for ``order_id`` (0 if none)."""
+        with self._condition:
+            return self._latest.get(order_id, (0, ''))[0]
+
+    def wait(self, order_id: int, after: int, timeout: float) -> tuple[int, str] | None:
+        """Block until ``order_id`` changes past sequence ``after``, or time out."""
+        def changed():
+            return self._latest.get(order_id, (0, ''))[0] > after
+
+        with self._condition:
+            if self._condition.wait_for(changed, timeout):
+                return self._latest[order_id]
+        return None
+
+
+notifier = OrderStatusNotifier()
+_slots = threading.BoundedSemaphore(MAX_STREAMS)
+
+
+def format_event(order_id: int, status: str, event_id: int | None = None) -> str:
+    data = json.dumps({
+        'order_id': order_id,
+        'status': status,
+        'status_display': str(dict(Order.STATUS_CHOICES).get(status, status)),
+    })
+    lines = ['event: status']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {data}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class OrderStatusStream:
+    """Iterable SSE body for one order; ``close()`` releases its slot."""
+
+    def __init__(self, order_id: int, status: str, *, heartbeat=HEARTBEAT_SECONDS, max_duration=MAX_STREAM_SECONDS):
+        self.order_id = order_id
+        self.status = status
+        self.heartbeat = heartbeat
+        self.max_duration = max_duration
+        self._closed = False
+
+    def __iter__(self):
+        position = notifier.position(self.order_id)
+        deadline = time.monotonic() + self.max_duration
+        yield 'retry: 5000\n' + format_event(self.order_id, self.status, position)
+
+        while self.status not in FINAL_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            change = notifier.wait(self.order_id, position, min(self.heartbeat, remaining))
+            if change is not None:
+                position, status = change
+            else:
+                status = Order.objects.filter(pk=self.order_id).values_list('status', flat=True).first()
+                if status is None:
+                    return
+            if status != self.status:
+                self.status = status
+                yield format_event(self.order_id, status, position)
+            else:
+                yield ': keep-alive\n\n'
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            _slots.release()
+
+
+def open_stream(order_id: int, status: str, **options) -> OrderStatusStream | None:
+    """Reserve a stream slot for ``order_id``; ``None`` if this worker is full."""
+    if not _slots.acquire(blocking=False):
+        return None
+    return OrderStatusStream(order_id, status, **options)
+
+
+def publish_status(order_id: int, status: str) -> None:
+    notifier.publish(order_id, status)
+
+
+def publish_statuses(order_ids, status: str) -> None:
+    notifier.publish_many(order_ids, status)
@@ -0,0 +1,48 @@
+"""A signed-in customer's orders, for the profile page and its JSON feed.
+
+History is read through ``Order.user`` with the ``order_user_created_idx``
+``(user, -created_at)`` index and keyset pagination, so each page is one
+short index range scan regardless of how many orders a regular has placed.
+"""
+
+from __future__ import annotations
+
+from django.urls import reverse
+
+from .models import Order
+from .pagination import KeysetPage, keyset_page
+
+HISTORY_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+ACTIVE_STATUSES = ('pending', 'confirmed', 'preparing', 'ready', 'out_for_delivery')
+
+HISTORY_FIELDS = ('id', 'user_id', 'order_type', 'status', 'total_price', 'created_at')
+
+
+def get_current_order(user) -> Order | None:
+    """The customer's most recent order that is still in progress."""
+    return (
+        Order.objects.filter(user=user, status__in=ACTIVE_STATUSES)
+        .order_by('-created_at', '-id')
+        .first()
+    )
+
+
+def get_order_history(user, cursor: str | None = None, limit: int = HISTORY_PAGE_SIZE) -> KeysetPage:
+    """One page of the customer's orders, newest first."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    orders = Order.objects.filter(user=user).only(*HISTORY_FIELDS)
+    return keyset_page(orders, 'created_at', cursor, limit, descending=True)
+
+
+def serialize_order(order: Order) -> dict:
+    return {
+        'id': order.id,
+        'order_number': order.order_number,
+        'order_type': order.order_type,
+        'status': order.status,
+        'status_display': str(order.get_status_display()),
+        'total_price': str(order.total_price),
+        'created_at': order.created_at.isoformat(),
+        'tracking_url': f"{reverse('restaurant:order_tracking')}?order_id={order.id}",
+    }
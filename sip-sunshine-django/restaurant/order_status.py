@@ -0,0 +1,130 @@
+"""Order status transitions.
+
+Allowed changes come from ``Order.STATUS_TRANSITIONS``. Every status change
+here is a compare-and-swap UPDATE: it only matches rows still in the status
+(and, for a single order, the version) the caller read, and bumps
+``Order.version``. A lost race therefore fails fast with ``OrderConflict``
+instead of silently reverting someone else's change, and no row is locked
+or re-read beforehand.
+
+``transition_orders()`` moves whole batches at once (everything "ready",
+everything "completed" at closing time) with one set-based UPDATE; orders
+whose status does not allow the transition are reported back as skipped.
+
+Because no model signals fire, the follow-up work the signals would do is
+done here after commit: one live status notification for all changed
+orders, and the sales rollups for orders that became completed. Cancelled
+orders give their pickup slot capacity back in the same transaction.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import InvalidStatusTransition, Order, OrderConflict
+from .order_events import publish_statuses
+from .pickup_slots import release_slots
+from .rollups import COMPLETED, sync_orders
+
+CANCELLED = 'cancelled'
+
+# bulk action -> resulting status
+TRANSITIONS = {
+    'confirm': 'confirmed',
+    'start_preparing': 'preparing',
+    'ready': 'ready',
+    'complete': COMPLETED,
+    'cancel': CANCELLED,
+}
+
+
+class TransitionError(ValueError):
+    """Raised for an unknown bulk transition."""
+
+
+@dataclass(frozen=True)
+class TransitionResult:
+    action: str
+    status: str
+    updated: list[int]
+    skipped: list[int]
+
+
+def sources_for(status: str) -> tuple[str, ...]:
+    """Statuses from which an order may move to ``status``."""
+    return tuple(source for source, targets in Order.STATUS_TRANSITIONS.items() if status in targets)
+
+
+def _changes(status: str) -> dict:
+    now = timezone.now()
+    changes = {'status': status, 'version': F('version') + 1, 'updated_at': now}
+    if status == COMPLETED:
+        changes['completed_at'] = now
+    return changes
+
+
+def _after_commit(order_ids: list[int], status: str) -> None:
+    transaction.on_commit(lambda: publish_statuses(order_ids, status))
+    if status == COMPLETED:
+        transaction.on_commit(lambda: sync_orders(order_ids))
+
+
+def transition_order(order: Order, status: str) -> Order:
+    """Move one order to ``status`` if nobody changed it since it was read.
+
+    Raises ``InvalidStatusTransition`` if the status table forbids the change
+    and ``OrderConflict`` if the stored version or status moved on.
+    """
+    if not order.can_transition_to(status):
+        raise InvalidStatusTransition(f'Order #{order.pk} cannot go from {order.status} to {status}')
+    changes = _changes(status)
+    with transaction.atomic():
+        updated = Order.objects.filter(pk=order.pk, version=order.version, status=order.status).update(**changes)
+        if not updated:
+            raise OrderConflict(f'Order #{order.pk} was changed by someone else (expected version {order.version})')
+        order.version += 1
+        if status == CANCELLED and order.pickup_slot_id and release_slots([order.pk]):
+            order.pickup_slot = None
+            order.version += 1
+        _after_commit([order.pk], status)
+
+    order.status = status
+    order.updated_at = changes['updated_at']
+    if 'completed_at' in changes:
+        order.completed_at = changes['completed_at']
+    order._remember_saved_state()
+    return order
+
+
+def transition_orders(orders, action: str) -> TransitionResult:
+    """Apply ``action`` to every order in the ``orders`` queryset that allows it."""
+    if action not in TRANSITIONS:
+        raise TransitionError(f'Unknown action. Must be one of: {", ".join(TRANSITIONS)}')
+    target = TRANSITIONS[action]
+    sources = sources_for(target)
+    orders = orders.order_by()
+
+    with transaction.atomic():
+        rows = list(orders.values_list('pk', 'status'))
+        eligible = [pk for pk, status in rows if status in sources]
+        skipped = [pk for pk, status in rows if status not in sources]
+        if eligible:
+            # The status guard is the compare-and-swap: an order moved by
+            # someone else in between is not updated again. Only then do we
+            # re-read which ones went through.
+            count = Order.objects.filter(pk__in=eligible, status__in=sources).update(**_changes(target))
+            if count != len(eligible):
+                moved = set(eligible)
+                eligible = list(
+                    Order.objects.filter(pk__in=eligible, status=target).values_list('pk', flat=True)
+                )
+                skipped += sorted(moved - set(eligible))
+            if target == CANCELLED:
+                release_slots(eligible)
+            _after_commit(eligible, target)
+
+    return TransitionResult(action=action, status=target, updated=eligible, skipped=skipped)
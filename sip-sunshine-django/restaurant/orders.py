@@ -0,0 +1,130 @@
+"""Order construction.
+
+``OrderBuilder`` collects the order fields and its priced lines in memory,
+validates the complete order, computes subtotal, tax, delivery charge and
+total once (delivery is priced by postal-code zone, see
+``restaurant.delivery_zones``), and then writes the Order plus all of its OrderItem rows with a
+single bulk insert. Pickup orders reserve kitchen capacity in a pickup slot
+in the same transaction (see ``restaurant.pickup_slots``). Both the JSON
+checkout API and the legacy form view go through it.
+"""
+
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .delivery_zones import DeliveryZoneError, quote_delivery
+from .models import Order, OrderItem
+from .money import from_cents, order_totals, to_cents
+from .pricing import ResolvedLine
+from .settings_cache import get_delivery_settings, get_delivery_zones
+
+DEFAULT_DELIVERY_CHARGE = Decimal('2.50')
+
+REQUIRED_DELIVERY_FIELDS = ('delivery_address', 'delivery_city', 'delivery_postal_code')
+
+
+class OrderValidationError(ValueError):
+    """Raised when an order cannot be placed as submitted."""
+
+
+class OrderBuilder:
+    """Assemble and persist an order with all of its lines in a few statements."""
+
+    def __init__(self, **fields):
+        self.order = Order(**fields)
+        self.lines: list[ResolvedLine] = []
+
+    def add_line(self, line: ResolvedLine) -> 'OrderBuilder':
+        self.lines.append(line)
+        return self
+
+    def add_lines(self, lines) -> 'OrderBuilder':
+        self.lines.extend(lines)
+        return self
+
+    def validate(self) -> None:
+        order = self.order
+
+        valid_order_types = [key for key, _label in Order.ORDER_TYPE_CHOICES]
+        if order.order_type not in valid_order_types:
+            raise OrderValidationError(f'Invalid order type. Must be one of: {", ".join(valid_order_types)}')
+
+        valid_payment_methods = [key for key, _label in Order.PAYMENT_METHOD_CHOICES]
+        if order.payment_method not in valid_payment_methods:
+            raise OrderValidationError(
+                f'Invalid payment method. Must be one of: {", ".join(valid_payment_methods)}'
+            )
+
+        if order.order_type == 'delivery':
+            for field in REQUIRED_DELIVERY_FIELDS:
+                if not getattr(order, field):
+                    raise OrderValidationError(f'Missing delivery field: {field}')
+
+        if not self.lines:
+            raise OrderValidationError('Order must contain at least one item')
+        for line in self.lines:
+            if line.quantity < 1:
+                raise OrderValidationError('Invalid item quantity')
+
+    def _delivery_charge(self, subtotal: Decimal) -> Decimal:
+        order = self.order
+        try:
+            settings = get_delivery_settings()
+            zones = get_delivery_zones()
+        except Exception:
+            return DEFAULT_DELIVERY_CHARGE
+        if not settings and not zones:
+            return Decimal('0.00')
+        try:
+            quote = quote_delivery(order.delivery_postal_code, order.delivery_country, subtotal, settings, zones)
+        except DeliveryZoneError as exc:
+            raise OrderValidationError(str(exc)) from exc
+        if quote.zone is not None and order.promised_time is None:
+            order.promised_time = timezone.now() + timedelta(minutes=quote.eta_minutes)
+        return quote.delivery_charge
+
+    def compute_totals(self) -> Decimal:
+        """Set subtotal, tax, delivery charge and total on the pending order."""
+        order = self.order
+        totals = order_totals(
+            [to_cents(line.unit_price) for line in self.lines], [line.quantity for line in self.lines]
+        )
+        if order.order_type == 'delivery':
+            delivery_charge = to_cents(self._delivery_charge(from_cents(totals.subtotal)))
+            totals = replace(totals, delivery_charge=delivery_charge)
+        for name, value in totals.as_decimals().items():
+            setattr(order, name, value)
+        # bulk_create skips OrderItem.save(), so the line aggregates are set here
+        order.item_count = len(self.lines)
+        order.quantity_sum = sum(line.quantity for line in self.lines)
+        return order.total_price
+
+    def save(self) -> Order:
+        """Validate, price and write the order with a single bulk insert of its lines."""
+        self.validate()
+        self.compute_totals()
+
+        with transaction.atomic():
+            if self.order.order_type == 'pickup' and self.order.pickup_slot_id is None:
+                # Imported here: pickup_slots builds on this module's errors
+                from .pickup_slots import reserve_slot
+                reserve_slot(self.order, self.order.quantity_sum, self.order.preferred_pickup_time)
+            self.order.save()
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=self.order,
+                    menu_item_id=line.menu_item_id,
+                    item_name=line.name,
+                    item_price=line.unit_price,
+                    quantity=line.quantity,
+                    special_instructions=line.special_instructions,
+                )
+                for line in self.lines
+            ])
+        return self.order
@@ -0,0 +1,119 @@
+"""Keyset (cursor) pagination helpers.
+
+Pages are read with ``WHERE (field, id) > position ORDER BY field, id LIMIT n``
+instead of ``OFFSET``, so every page costs the same index range scan however
+deep the client has scrolled. The position of the last row is handed back to
+the client as an opaque cursor string.
+
+``EstimatedCountPaginator`` is the admin-side counterpart for changelists,
+which need page numbers and therefore a total count.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class CursorError(ValueError):
+    """Raised for a malformed pagination cursor."""
+
+
+def encode_cursor(value: datetime, pk: int) -> str:
+    micros = (value - EPOCH) // timedelta(microseconds=1)
+    return f'{micros}-{pk}'
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        micros, pk = cursor.split('-')
+        return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (ValueError, OverflowError):
+        raise CursorError('Invalid cursor')
+
+
+def after(queryset, field: str, position: tuple[datetime, int] | None, *, descending: bool = False):
+    """Order ``queryset`` by ``(field, id)`` and keep only rows past ``position``."""
+    if descending:
+        queryset = queryset.order_by(f'-{field}', '-id')
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+    else:
+        queryset = queryset.order_by(field, 'id')
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk}))
+    return queryset
+
+
+@dataclass(frozen=True)
+class KeysetPage:
+    items: list
+    next_cursor: str | None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def keyset_page(queryset, field: str, cursor: str | None, limit: int, *, descending: bool = False) -> KeysetPage:
+    """Return up to ``limit`` rows after ``cursor`` and the cursor for the next page."""
+    position = decode_cursor(cursor) if cursor else None
+    rows = list(after(queryset, field, position, descending=descending)[:limit + 1])
+    if len(rows) <= limit:
+        return KeysetPage(rows, None)
+    rows = rows[:limit]
+    last = rows[-1]
+    return KeysetPage(rows, encode_cursor(getattr(last, field), last.pk))
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin paginator that avoids repeated ``COUNT(*)`` on large tables.
+
+    Counts of at least ``threshold`` rows are cached per query for
+    ``cache_timeout`` seconds, so a busy changelist counts a big result at
+    most once per timeout. On PostgreSQL an unfiltered list is counted from
+    the planner's row estimate instead. Small results are always exact.
+    """
+    threshold = 10000
+    cache_timeout = 300
+
+    def _cache_key(self) -> str:
+        sql, params = self.object_list.query.sql_with_params()
+        digest = hashlib.md5(repr((sql, params)).encode(), usedforsecurity=False).hexdigest()
+        return f'changelist_count:{digest}'
+
+    def _estimate(self) -> int | None:
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql' or queryset.query.where:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # -1 until the table has been analyzed
+        return int(row[0]) if row and row[0] >= 0 else None
+
+    @cached_property
+    def count(self) -> int:
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        key = self._cache_key()
+        count = cache.get(key)
+        if count is not None:
+            return count
+        estimate = self._estimate()
+        count = estimate if estimate is not None and estimate >= self.threshold else self.object_list.count()
+        if count >= self.threshold:
+            cache.set(key, count, self.cache_timeout)
+        return count
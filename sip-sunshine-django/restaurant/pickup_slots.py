@@ -0,0 +1,241 @@
+"""Kitchen-capacity-aware pickup slots.
+
+The pickup window (``DeliverySettings.pickup_start_time`` to
+``pickup_end_time``) is cut into slots of ``pickup_slot_minutes``; the
+kitchen can prepare ``pickup_slot_capacity`` items per slot. An order
+reserves its item count in the first slot that has room, no earlier than
+the preparation lead time (``estimated_pickup_time``) and no earlier than
+the customer's preferred time. Its ``promised_time`` is the later of that
+slot's start and the earliest time the order can be ready.
+
+Occupancy lives in ``PickupSlot`` rows and changes only through a
+conditional UPDATE (``reserved_items + load <= capacity``), so two
+concurrent checkouts can never overbook a slot, and the reservation
+commits or rolls back together with the order. ``occupancy`` is a
+short-lived, process-local copy of those rows that answers slot listings
+and lets reservations skip slots already known to be full without a query;
+it only learns about a reservation once the order's transaction commits.
+"""
+
+from __future__ import annotations
+
+import threading
+import time as monotonic_time
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Order, PickupSlot
+from .orders import OrderValidationError
+from .settings_cache import get_delivery_settings
+
+# Days (starting with the requested one) searched for a free slot
+SCHEDULE_DAYS = 2
+DEFAULT_SLOT_MINUTES = 15
+DEFAULT_SLOT_CAPACITY = 12
+DEFAULT_LEAD_MINUTES = 15
+
+
+class PickupSlotUnavailable(OrderValidationError):
+    """No pickup slot with enough kitchen capacity is left."""
+
+
+@dataclass(frozen=True)
+class SlotConfig:
+    minutes: int
+    capacity: int
+    lead: timedelta
+    opens: time
+    closes: time
+
+    @classmethod
+    def current(cls) -> 'SlotConfig':
+        settings = get_delivery_settings()
+        if settings is None:
+            return cls(DEFAULT_SLOT_MINUTES, DEFAULT_SLOT_CAPACITY, timedelta(minutes=DEFAULT_LEAD_MINUTES),
+                       time(11, 0), time(22, 0))
+        return cls(
+            minutes=settings.pickup_slot_minutes or DEFAULT_SLOT_MINUTES,
+            capacity=settings.pickup_slot_capacity or DEFAULT_SLOT_CAPACITY,
+            lead=timedelta(minutes=settings.estimated_pickup_time or 0),
+            opens=settings.pickup_start_time,
+            closes=settings.pickup_end_time,
+        )
+
+    def starts(self, day: date) -> list[datetime]:
+        """Aware slot start times of ``day`` (local), in order."""
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.combine(day, self.opens), tz)
+        end = timezone.make_aware(datetime.combine(day, self.closes), tz)
+        step = timedelta(minutes=self.minutes)
+        starts = []
+        while start < end:
+            starts.append(start)
+            start += step
+        return starts
+
+
+class OccupancyIndex:
+    """Process-local reserved item counts per slot start, loaded per day."""
+
+    TTL_SECONDS = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days: dict[date, tuple[float, dict[datetime, int]]] = {}
+
+    def day(self, day: date) -> dict[datetime, int]:
+        now = monotonic_time.monotonic()
+        with self._lock:
+            cached = self._days.get(day)
+            if cached and cached[0] > now:
+                return cached[1]
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.combine(day, time.min), tz)
+        end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min), tz)
+        reserved = dict(
+            PickupSlot.objects.filter(start__gte=start, start__lt=end).values_list('start', 'reserved_items')
+        )
+        with self._lock:
+            self._days[day] = (now + self.TTL_SECONDS, reserved)
+        return reserved
+
+    def reserved(self, start: datetime) -> int:
+        return self.day(timezone.localtime(start).date()).get(start, 0)
+
+    def record(self, start: datetime, reserved: int) -> None:
+        with self._lock:
+            cached = self._days.get(timezone.localtime(start).date())
+            if cached:
+                cached[1][start] = reserved
+
+    def record_on_commit(self, start: datetime, reserved: int) -> None:
+        # A rolled-back checkout must not leave its load behind
+        transaction.on_commit(lambda: self.record(start, reserved))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._days.clear()
+
+
+occupancy = OccupancyIndex()
+
+
+def _fits(reserved: int, load: int, capacity: int) -> bool:
+    # An order bigger than a whole slot still gets an empty slot to itself
+    return reserved == 0 or reserved + load <= capacity
+
+
+def candidate_starts(config: SlotConfig, earliest: datetime):
+    """Slot starts from the one containing ``earliest`` onwards."""
+    first_day = timezone.localtime(earliest).date()
+    slot = timedelta(minutes=config.minutes)
+    for offset in range(SCHEDULE_DAYS):
+        for start in config.starts(first_day + timedelta(days=offset)):
+            if start + slot > earliest:
+                yield start
+
+
+def _earliest(config: SlotConfig, preferred: datetime | None) -> datetime:
+    earliest = timezone.now() + config.lead
+    if preferred is not None and preferred > earliest:
+        return preferred
+    return earliest
+
+
+def available_slots(items: int = 1, day: date | None = None) -> list[dict]:
+    """Slots of ``day`` (default: from now on) that can still take ``items``.
+
+    A day in the past has no slots.
+    """
+    config = SlotConfig.current()
+    earliest = timezone.now() + config.lead
+    if day is not None:
+        if day < timezone.localdate():
+            return []
+        day_start = timezone.make_aware(datetime.combine(day, time.min))
+        if day_start > earliest:
+            earliest = day_start
+    last_day = timezone.localtime(earliest).date()
+    slot = timedelta(minutes=config.minutes)
+    offers = []
+    for start in config.starts(last_day):
+        if start + slot <= earliest:
+            continue
+        reserved = occupancy.reserved(start)
+        offers.append({
+            'start': timezone.localtime(start).isoformat(),
+            'end': timezone.localtime(start + slot).isoformat(),
+            'remaining': max(0, config.capacity - reserved),
+            'available': _fits(reserved, items, config.capacity),
+        })
+    return offers
+
+
+def _claim(start: datetime, load: int, capacity: int) -> int | None:
+    """Reserve ``load`` items in the slot at ``start``; its pk, or None if full."""
+    fits = Q(reserved_items=0) | Q(reserved_items__lte=capacity - load)
+    slot_id = PickupSlot.objects.filter(start=start).values_list('pk', flat=True).first()
+    if slot_id is None:
+        try:
+            with transaction.atomic():
+                slot = PickupSlot.objects.create(start=start, reserved_items=load, order_count=1)
+            occupancy.record_on_commit(start, load)
+            return slot.pk
+        except IntegrityError:
+            # Someone else created the row first: fall through to the UPDATE
+            slot_id = PickupSlot.objects.filter(start=start).values_list('pk', flat=True).first()
+    if PickupSlot.objects.filter(fits, pk=slot_id).update(
+        reserved_items=F('reserved_items') + load, order_count=F('order_count') + 1
+    ):
+        occupancy.record_on_commit(start, occupancy.reserved(start) + load)
+        return slot_id
+    occupancy.record_on_commit(start, capacity)
+    return None
+
+
+def reserve_slot(order: Order, items: int, preferred: datetime | None = None) -> None:
+    """Reserve kitchen capacity for ``order`` and set its promised time.
+
+    Must run inside the transaction that saves the order.
+    """
+    config = SlotConfig.current()
+    load = max(1, items)
+    earliest = _earliest(config, preferred)
+    for start in candidate_starts(config, earliest):
+        if not _fits(occupancy.reserved(start), load, config.capacity):
+            continue
+        slot_id = _claim(start, load, config.capacity)
+        if slot_id is not None:
+            order.pickup_slot_id = slot_id
+            order.pickup_load = load
+            # Never earlier than the customer asked for or the kitchen can manage
+            order.promised_time = max(start, earliest)
+            return
+    raise PickupSlotUnavailable('No pickup times are available, please try again later')
+
+
+def release_slots(order_ids) -> list[int]:
+    """Give back the capacity held by the given orders (e.g. on cancel).
+
+    Each order gives back the load it reserved, even if its lines changed
+    since. Returns the ids of the orders that held a slot; their ``version`` was
+    bumped.
+    """
+    held = list(
+        Order.objects.filter(pk__in=order_ids, pickup_slot__isnull=False)
+        .values_list('pk', 'pickup_slot_id', 'pickup_load')
+    )
+    if not held:
+        return []
+    for _pk, slot_id, load in held:
+        PickupSlot.objects.filter(pk=slot_id).update(
+            reserved_items=F('reserved_items') - load, order_count=F('order_count') - 1
+        )
+    released = [pk for pk, _slot, _load in held]
+    Order.objects.filter(pk__in=released).update(pickup_slot=None, pickup_load=0, version=F('version') + 1)
+    occupancy.clear()
+    return released
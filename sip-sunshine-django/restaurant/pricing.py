@@ -0,0 +1,119 @@
+"""Server-side catalog pricing for order intake.
+
+Clients send menu item ids and quantities; names and prices are taken from an
+in-process price map instead of the request payload. The map is rebuilt only
+when the menu version (see ``restaurant.menu_snapshot``) changes, so resolving
+an order of any size costs no catalog queries in the steady state.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils.translation import get_language
+
+from .menu_snapshot import get_menu_version
+from .models import MenuItem
+
+
+class PricingError(ValueError):
+    """Raised when an order line cannot be priced from the catalog."""
+
+
+@dataclass(frozen=True)
+class CatalogPrice:
+    id: int
+    price: Decimal
+    names: dict[str, str] = field(default_factory=dict)
+
+    def name_for(self, language: str | None = None) -> str:
+        language = language or get_language() or settings.LANGUAGE_CODE
+        return (
+            self.names.get(language)
+            or self.names.get(settings.LANGUAGE_CODE)
+            or next(iter(self.names.values()), '')
+        )
+
+
+@dataclass(frozen=True)
+class ResolvedLine:
+    """An order line priced from the catalog."""
+    menu_item_id: int | None
+    name: str
+    unit_price: Decimal
+    quantity: int
+    special_instructions: str = ''
+
+    @property
+    def subtotal(self) -> Decimal:
+        return self.unit_price * self.quantity
+
+
+_lock = threading.Lock()
+_price_map: tuple[int | None, dict[int, CatalogPrice]] = (None, {})
+
+
+def _build_price_map() -> dict[int, CatalogPrice]:
+    prices = {}
+    for item in MenuItem.objects.filter(is_active=True).prefetch_related('translations'):
+        names = {t.language_code: t.name for t in item.translations.all() if t.name}
+        prices[item.pk] = CatalogPrice(id=item.pk, price=item.price, names=names)
+    return prices
+
+
+def get_price_map() -> dict[int, CatalogPrice]:
+    """Return ``{menu_item_id: CatalogPrice}`` for active items at the current menu version."""
+    global _price_map
+    version = get_menu_version()
+    cached_version, prices = _price_map
+    if cached_version == version:
+        return prices
+    with _lock:
+        cached_version, prices = _price_map
+        if cached_version != version:
+            prices = _build_price_map()
+            _price_map = (version, prices)
+    return prices
+
+
+def _parse_quantity(raw) -> int:
+    if isinstance(raw, int) and not isinstance(raw, bool):
+        quantity = raw
+    elif isinstance(raw, str) and raw.strip().isdigit():
+        quantity = int(raw)
+    else:
+        raise PricingError('Invalid item quantity')
+    if quantity < 1:
+        raise PricingError('Invalid item quantity')
+    return quantity
+
+
+def resolve_line_items(items_data, language: str | None = None) -> list[ResolvedLine]:
+    """Price client-submitted order lines from the catalog.
+
+    Each line must reference an active menu item by ``id``; any ``name`` or
+    ``price`` sent by the client is ignored.
+    """
+    prices = get_price_map()
+    lines = []
+    for item_data in items_data:
+        if not isinstance(item_data, dict):
+            raise PricingError('Invalid item data')
+        item_id = item_data.get('id')
+        try:
+            entry = prices.get(int(item_id))
+        except (TypeError, ValueError):
+            raise PricingError('Invalid item data')
+        if entry is None:
+            raise PricingError(f'Menu item {item_id} is not available')
+        lines.append(ResolvedLine(
+            menu_item_id=entry.id,
+            name=entry.name_for(language),
+            unit_price=entry.price,
+            quantity=_parse_quantity(item_data.get('quantity', 1)),
+            special_instructions=item_data.get('special_instructions', '') or '',
+        ))
+    return lines
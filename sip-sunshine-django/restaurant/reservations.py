@@ -0,0 +1,308 @@
+"""Table reservations: availability and atomic table assignment.
+
+The day is cut into 15-minute slots (slot ``n`` starts at ``n * 15``
+minutes past midnight). A reservation takes one ``DiningTable`` from the
+slot of its time for ``ReservationSettings.dining_minutes``; each taken
+slot is a ``TableSlot`` row, and the unique ``(table, date, slot)``
+constraint is what stops two concurrent bookings from sharing a table.
+Claiming is one bulk insert in a savepoint: it either takes every slot of
+the sitting or, on a conflict, none of them.
+
+``occupancy`` keeps each loaded day in memory as one integer bitmask of
+taken slots per table. "Is table T free from 19:00 for two hours" is then a
+single ``mask & sitting == 0`` test, and listing the times that can seat a
+party is one pass over the seating slots and the (few) tables that fit it,
+with no queries while the day is warm. Days are reloaded after a short TTL
+so bookings made by other processes show up; a lost race on claiming
+reloads the day at once.
+
+Seating follows the reservation row: saving a new reservation claims a
+table, changing its date, time or party size moves it to a table free at
+the new time, cancelling gives the table back, and un-cancelling claims one
+again (see ``restaurant.signals``). A sitting never runs past midnight: the
+last seating is brought forward if the dining duration would cross it.
+
+When no tables are configured, reservations are accepted as requests
+without a table, as before.
+"""
+
+from __future__ import annotations
+
+import threading
+import time as monotonic_time
+from dataclasses import dataclass
+from datetime import date, datetime, time
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import DiningTable, Reservation, TableSlot
+from .settings_cache import get_reservation_settings
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DEFAULT_FIRST_SEATING = time(12, 0)
+DEFAULT_LAST_SEATING = time(21, 0)
+DEFAULT_DINING_MINUTES = 120
+
+
+NO_TABLE_MESSAGE = 'No table is available for your party at that time'
+
+
+class ReservationUnavailable(ValueError):
+    """No table can seat the party at the requested time."""
+
+
+def slot_of(moment: time) -> int:
+    """Index of the slot ``moment`` falls in."""
+    return (moment.hour * 60 + moment.minute) // SLOT_MINUTES
+
+
+def slot_time(slot: int) -> time:
+    minutes = slot * SLOT_MINUTES
+    return time(minutes // 60, minutes % 60)
+
+
+def sitting_mask(start: int, length: int) -> int:
+    """Bitmask of the ``length`` slots from ``start``."""
+    return ((1 << length) - 1) << start
+
+
+@dataclass(frozen=True)
+class SeatingConfig:
+    first_slot: int
+    last_slot: int
+    # Slots a sitting takes
+    length: int
+
+    @classmethod
+    def current(cls) -> 'SeatingConfig':
+        settings = get_reservation_settings()
+        first = settings.first_seating_time if settings else DEFAULT_FIRST_SEATING
+        last = settings.last_seating_time if settings else DEFAULT_LAST_SEATING
+        minutes = (settings.dining_minutes if settings else 0) or DEFAULT_DINING_MINUTES
+        length = min(max(1, -(-minutes // SLOT_MINUTES)), SLOTS_PER_DAY)
+        return cls(
+            first_slot=slot_of(first),
+            # The last sitting has to end by midnight
+            last_slot=min(slot_of(last), SLOTS_PER_DAY - length),
+            length=length,
+        )
+
+    def starts(self):
+        return range(self.first_slot, self.last_slot + 1)
+
+    def start_of(self, moment: time) -> int:
+        """Slot of a sitting at ``moment``; raises if outside the seating hours."""
+        start = slot_of(moment)
+        if not self.first_slot <= start <= self.last_slot:
+            raise ReservationUnavailable(
+                f'We seat guests between {slot_time(self.first_slot):%H:%M} and {slot_time(self.last_slot):%H:%M}'
+            )
+        return start
+
+
+@dataclass(frozen=True)
+class Table:
+    id: int
+    seats: int
+    min_party_size: int
+
+    def fits(self, party: int) -> bool:
+        return self.min_party_size <= party <= self.seats
+
+
+class DayOccupancy:
+    """Taken slots of one day, as one bitmask per table."""
+
+    def __init__(self, tables: list[Table], taken: dict[int, int]):
+        # Smallest tables first, so a party gets the tightest free fit
+        self.tables = sorted(tables, key=lambda table: (table.seats, table.id))
+        self.taken = taken
+
+    def free_tables(self, party: int, start: int, length: int) -> list[int]:
+        sitting = sitting_mask(start, length)
+        return [
+            table.id for table in self.tables
+            if table.fits(party) and not self.taken.get(table.id, 0) & sitting
+        ]
+
+    def available_starts(self, party: int, config: SeatingConfig) -> list[int]:
+        masks = [self.taken.get(table.id, 0) for table in self.tables if table.fits(party)]
+        if not masks:
+            return []
+        sitting = sitting_mask(0, config.length)
+        return [
+            start for start in config.starts()
+            if any(not mask & (sitting << start) for mask in masks)
+        ]
+
+    def mark(self, table_id: int, start: int, length: int) -> None:
+        self.taken[table_id] = self.taken.get(table_id, 0) | sitting_mask(start, length)
+
+
+class OccupancyIndex:
+    """Process-local ``DayOccupancy`` per date, reloaded after a short TTL."""
+
+    TTL_SECONDS = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days: dict[date, tuple[float, DayOccupancy]] = {}
+
+    def day(self, day: date) -> DayOccupancy:
+        now = monotonic_time.monotonic()
+        with self._lock:
+            cached = self._days.get(day)
+            if cached and cached[0] > now:
+                return cached[1]
+        tables = [
+            Table(id=pk, seats=seats, min_party_size=min_party_size)
+            for pk, seats, min_party_size in DiningTable.objects.filter(is_active=True)
+            .values_list('pk', 'seats', 'min_party_size')
+        ]
+        taken: dict[int, int] = {}
+        for table_id, slot in TableSlot.objects.filter(date=day).values_list('table_id', 'slot'):
+            taken[table_id] = taken.get(table_id, 0) | (1 << slot)
+        occupancy_day = DayOccupancy(tables, taken)
+        with self._lock:
+            self._days[day] = (now + self.TTL_SECONDS, occupancy_day)
+        return occupancy_day
+
+    def mark(self, day: date, table_id: int, start: int, length: int) -> None:
+        """Add a committed claim to the cached day, if it is loaded."""
+        with self._lock:
+            cached = self._days.get(day)
+            if cached:
+                cached[1].mark(table_id, start, length)
+
+    def forget(self, day: date) -> None:
+        with self._lock:
+            self._days.pop(day, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._days.clear()
+
+
+occupancy = OccupancyIndex()
+
+
+def available_times(day: date, party: int) -> list[time]:
+    """Seating times on ``day`` at which a table for ``party`` is free."""
+    config = SeatingConfig.current()
+    occupancy_day = occupancy.day(day)
+    if not occupancy_day.tables:
+        return [slot_time(start) for start in config.starts()]
+    return [slot_time(start) for start in occupancy_day.available_starts(party, config)]
+
+
+def _claim(reservation: Reservation, table_id: int, start: int, length: int) -> bool:
+    try:
+        with transaction.atomic():
+            TableSlot.objects.bulk_create([
+                TableSlot(table_id=table_id, reservation=reservation, date=reservation.reservation_date, slot=slot)
+                for slot in range(start, start + length)
+            ])
+        return True
+    except IntegrityError:
+        return False
+
+
+def reserve_table(reservation: Reservation) -> None:
+    """Seat a saved ``reservation`` at the smallest free table that fits.
+
+    Must run inside the transaction that saves the reservation. Raises
+    ``ReservationUnavailable`` if the time is outside the seating hours or
+    every fitting table is taken. Without any tables this does nothing.
+    """
+    day = reservation.reservation_date
+    if not occupancy.day(day).tables:
+        return
+    config = SeatingConfig.current()
+    start = config.start_of(reservation.reservation_time)
+    party = int(reservation.number_of_guests)
+    for _attempt in range(2):
+        occupancy_day = occupancy.day(day)
+        for table_id in occupancy_day.free_tables(party, start, config.length):
+            if _claim(reservation, table_id, start, config.length):
+                # Only a committed claim may show up in the shared index
+                transaction.on_commit(lambda table_id=table_id: occupancy.mark(day, table_id, start, config.length))
+                reservation.table_id = table_id
+                Reservation.objects.filter(pk=reservation.pk).update(table_id=table_id)
+                return
+        # Our copy of the day was stale: look again with fresh data once
+        occupancy.forget(day)
+    raise ReservationUnavailable(NO_TABLE_MESSAGE)
+
+
+def check_seating(day: date, at: time, party: int, reservation_id: int | None = None) -> None:
+    """Raise ``ReservationUnavailable`` unless a table could seat ``party`` then.
+
+    A read-only check for forms; the slots already held by
+    ``reservation_id`` count as free. Without any tables this does nothing.
+    """
+    occupancy_day = occupancy.day(day)
+    if not occupancy_day.tables:
+        return
+    config = SeatingConfig.current()
+    start = config.start_of(at)
+    taken = dict(occupancy_day.taken)
+    if reservation_id is not None:
+        for table_id, slot in TableSlot.objects.filter(reservation_id=reservation_id, date=day).values_list(
+            'table_id', 'slot'
+        ):
+            taken[table_id] = taken.get(table_id, 0) & ~(1 << slot)
+    if not DayOccupancy(occupancy_day.tables, taken).free_tables(party, start, config.length):
+        raise ReservationUnavailable(NO_TABLE_MESSAGE)
+
+
+def reseat(reservation: Reservation) -> None:
+    """Move a reservation whose date, time or party changed to a free table.
+
+    Must run inside the transaction that saves the reservation; raises
+    ``ReservationUnavailable`` like ``reserve_table``.
+    """
+    release_reservations([reservation.pk])
+    reservation.table_id = None
+    reserve_table(reservation)
+
+
+def release_reservations(reservation_ids) -> None:
+    """Free the tables held by the given reservations (e.g. on cancel)."""
+    Reservation.objects.filter(pk__in=reservation_ids, table__isnull=False).update(table=None)
+    days = set(TableSlot.objects.filter(reservation_id__in=reservation_ids).values_list('date', flat=True))
+    if not days:
+        return
+    TableSlot.objects.filter(reservation_id__in=reservation_ids).delete()
+
+    def forget():
+        for day in days:
+            occupancy.forget(day)
+
+    # Now, so a re-claim in this transaction sees the freed slots, and again
+    # once committed, for requests that loaded the day in between
+    forget()
+    transaction.on_commit(forget)
+
+
+def parse_request(day, at, guests) -> tuple[date, time, int]:
+    """Validate raw form or query values; raises ``ValueError`` with a message."""
+    try:
+        day = day if isinstance(day, date) else date.fromisoformat(day or '')
+    except ValueError:
+        raise ValueError('Reservation date must be in YYYY-MM-DD format')
+    if day < timezone.localdate():
+        raise ValueError('Reservation date must not be in the past')
+    if at is not None and not isinstance(at, time):
+        try:
+            at = datetime.strptime(at[:5], '%H:%M').time()
+        except (TypeError, ValueError):
+            raise ValueError('Reservation time must be in HH:MM format')
+    try:
+        guests = int(guests)
+    except (TypeError, ValueError):
+        raise ValueError('Number of guests must be a whole number')
+    if guests < 1:
+        raise ValueError('Number of guests must be at least 1')
+    return day, at, guests
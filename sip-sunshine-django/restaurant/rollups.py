@@ -0,0 +1,351 @@
+"""Daily sales rollups.
+
+``SalesRollup`` keeps completed-order counts and money totals per local day,
+hour, order type and payment method; ``MenuItemSalesRollup`` keeps quantities
+and revenue per menu item and day. An order is added when its status becomes
+``completed`` and taken out again if it leaves that status or is deleted
+(see ``restaurant.signals``). What each order added is kept in a
+``RolledUpOrder`` row, and that is what gets subtracted: edits to a completed
+order or its lines are applied as "take out the old amounts, add the new
+ones". ``rebuild()`` recomputes any date range from the raw Order and
+OrderItem rows (``manage.py rebuild_sales_rollups``).
+
+Reports read only the rollup tables, so their cost depends on the number of
+days asked for, not on the number of orders placed.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from .models import MenuItemSalesRollup, Order, OrderItem, RolledUpOrder, SalesRollup
+from .money import round_money
+
+COMPLETED = 'completed'
+GROUPINGS = ('day', 'hour', 'order_type', 'payment_method')
+REBUILD_BATCH_SIZE = 500
+
+
+def _money(value) -> Decimal:
+    # SQLite hands back float-ish sums; keep rollups and reports in cents
+    return round_money(value or 0)
+
+
+def item_key(menu_item_id, item_name: str) -> str:
+    if menu_item_id:
+        return str(menu_item_id)
+    return f'name:{item_name}'[:320]
+
+
+def _increment(model, lookup: dict, deltas: dict, defaults: dict | None = None) -> None:
+    row, _created = model.objects.get_or_create(**lookup, defaults=defaults or {})
+    model.objects.filter(pk=row.pk).update(**{name: F(name) + value for name, value in deltas.items()})
+
+
+SALES_FIELDS = ('item_quantity', 'subtotal', 'tax', 'delivery_charge', 'total')
+
+
+def _lines_by_order(order_ids) -> dict[int, list[dict]]:
+    lines_by_order = {}
+    for line in OrderItem.objects.filter(order_id__in=order_ids).values(
+        'order_id', 'menu_item_id', 'item_name', 'item_price', 'quantity'
+    ):
+        lines_by_order.setdefault(line['order_id'], []).append(line)
+    return lines_by_order
+
+
+def _contribution(order: dict, lines: list[dict]) -> RolledUpOrder:
+    """The ``RolledUpOrder`` for one completed order and its lines."""
+    local = timezone.localtime(order['created_at'])
+    items = {}
+    for line in lines:
+        key = item_key(line['menu_item_id'], line['item_name'])
+        entry = items.setdefault(key, {
+            'item_key': key,
+            'menu_item_id': line['menu_item_id'],
+            'item_name': line['item_name'],
+            'line_count': 0,
+            'quantity': 0,
+            'revenue': Decimal('0.00'),
+        })
+        entry['line_count'] += 1
+        entry['quantity'] += line['quantity']
+        entry['revenue'] += (line['item_price'] or Decimal('0.00')) * line['quantity']
+    for entry in items.values():
+        entry['revenue'] = str(_money(entry['revenue']))
+    return RolledUpOrder(
+        order_id=order['id'],
+        date=local.date(),
+        hour=local.hour,
+        order_type=order['order_type'],
+        payment_method=order['payment_method'],
+        item_quantity=sum(line['quantity'] for line in lines),
+        subtotal=_money(order['subtotal']),
+        tax=_money(order['tax']),
+        delivery_charge=_money(order['delivery_charge']),
+        total=_money(order['total_price']),
+        items=list(items.values()),
+    )
+
+
+def _same(a: RolledUpOrder, b: RolledUpOrder) -> bool:
+    fields = ('date', 'hour', 'order_type', 'payment_method') + SALES_FIELDS
+    return all(getattr(a, name) == getattr(b, name) for name in fields) and a.items == b.items
+
+
+def apply_entries(entries, sign: int = 1) -> None:
+    """Add (``sign=1``) or subtract (``sign=-1``) orders' recorded contributions.
+
+    One row update per rollup bucket touched.
+    """
+    sales = {}
+    items = {}
+    for entry in entries:
+        bucket = sales.setdefault(
+            (entry.date, entry.hour, entry.order_type, entry.payment_method),
+            dict.fromkeys(('order_count',) + SALES_FIELDS, 0),
+        )
+        bucket['order_count'] += 1
+        for name in SALES_FIELDS:
+            bucket[name] += getattr(entry, name)
+        for line in entry.items:
+            item = items.setdefault((entry.date, line['item_key']), {
+                'menu_item_id': line['menu_item_id'],
+                'item_name': line['item_name'],
+                'line_count': 0,
+                'quantity': 0,
+                'revenue': Decimal('0.00'),
+            })
+            item['line_count'] += line['line_count']
+            item['quantity'] += line['quantity']
+            item['revenue'] += Decimal(line['revenue'])
+    if not sales:
+        return
+
+    with transaction.atomic():
+        for (day, hour, order_type, payment_method), deltas in sales.items():
+            _increment(
+                SalesRollup,
+                {'date': day, 'hour': hour, 'order_type': order_type, 'payment_method': payment_method},
+                {name: sign * value for name, value in deltas.items()},
+            )
+        for (day, key), entry in items.items():
+            _increment(
+                MenuItemSalesRollup,
+                {'date': day, 'item_key': key},
+                {'line_count': sign * entry['line_count'], 'quantity': sign * entry['quantity'], 'revenue': sign * entry['revenue']},
+                defaults={'menu_item_id': entry['menu_item_id'], 'item_name': entry['item_name']},
+            )
+
+
+def sync_order(order_id: int) -> None:
+    sync_orders([order_id])
+
+
+def sync_orders(order_ids) -> None:
+    """Bring the rollups in line with the current state of some orders.
+
+    Whatever an order added before is taken out and, if it is completed now,
+    its current amounts are added. Orders whose amounts did not change are
+    left alone, so calling this for an unchanged order costs two reads.
+    """
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update().filter(pk__in=order_ids, status=COMPLETED)
+            .values('id', 'created_at', 'order_type', 'payment_method', 'subtotal', 'tax', 'delivery_charge', 'total_price')
+        )
+        previous = {entry.order_id: entry for entry in RolledUpOrder.objects.filter(order_id__in=order_ids)}
+        if not orders and not previous:
+            return
+        lines_by_order = _lines_by_order([order['id'] for order in orders])
+        current = {}
+        for order in orders:
+            entry = _contribution(order, lines_by_order.get(order['id'], []))
+            if order['id'] in previous and _same(previous[order['id']], entry):
+                del previous[order['id']]
+            else:
+                current[order['id']] = entry
+
+        apply_entries(previous.values(), -1)
+        apply_entries(current.values(), 1)
+        RolledUpOrder.objects.filter(order_id__in=list(previous) + list(current)).delete()
+        RolledUpOrder.objects.bulk_create(current.values())
+
+
+def _in_range(queryset, field: str, start: date | None, end: date | None):
+    if start:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end:
+        queryset = queryset.filter(**{f'{field}__lte': end})
+    return queryset
+
+
+def rebuild(start: date | None = None, end: date | None = None) -> tuple[int, int]:
+    """Recompute the rollups for local dates ``start``..``end`` (inclusive).
+
+    Returns the number of sales and menu item rollup rows written.
+    """
+    tz = timezone.get_current_timezone()
+    orders = _in_range(Order.objects.filter(status=COMPLETED), 'created_at__date', start, end)
+    bucket = {
+        'day': TruncDate('created_at', tzinfo=tz),
+        'hour': ExtractHour('created_at', tzinfo=tz),
+    }
+    order_rows = (
+        orders.annotate(**bucket)
+        .values('day', 'hour', 'order_type', 'payment_method')
+        .annotate(
+            order_count=Count('id'),
+            sum_subtotal=Sum('subtotal'),
+            sum_tax=Sum('tax'),
+            sum_delivery=Sum('delivery_charge'),
+            sum_total=Sum('total_price'),
+        )
+        .order_by()
+    )
+
+    lines = OrderItem.objects.filter(order__in=orders)
+    quantities = {
+        (row['day'], row['hour'], row['order__order_type'], row['order__payment_method']): row['sum_quantity']
+        for row in lines.annotate(
+            day=TruncDate('order__created_at', tzinfo=tz),
+            hour=ExtractHour('order__created_at', tzinfo=tz),
+        )
+        .values('day', 'hour', 'order__order_type', 'order__payment_method')
+        .annotate(sum_quantity=Sum('quantity'))
+        .order_by()
+    }
+
+    sales = [
+        SalesRollup(
+            date=row['day'],
+            hour=row['hour'],
+            order_type=row['order_type'],
+            payment_method=row['payment_method'],
+            order_count=row['order_count'],
+            item_quantity=quantities.get((row['day'], row['hour'], row['order_type'], row['payment_method'])) or 0,
+            subtotal=_money(row['sum_subtotal']),
+            tax=_money(row['sum_tax']),
+            delivery_charge=_money(row['sum_delivery']),
+            total=_money(row['sum_total']),
+        )
+        for row in order_rows
+    ]
+
+    line_revenue = ExpressionWrapper(F('item_price') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2))
+    item_rows = (
+        lines.annotate(day=TruncDate('order__created_at', tzinfo=tz))
+        .values('day', 'menu_item_id', 'item_name')
+        .annotate(lines=Count('id'), sum_quantity=Sum('quantity'), sum_revenue=Sum(line_revenue))
+        .order_by()
+    )
+    items = {}
+    for row in item_rows:
+        key = (row['day'], item_key(row['menu_item_id'], row['item_name']))
+        rollup = items.get(key)
+        if rollup is None:
+            rollup = items[key] = MenuItemSalesRollup(
+                date=row['day'], item_key=key[1], menu_item_id=row['menu_item_id'], item_name=row['item_name'],
+                line_count=0, quantity=0, revenue=Decimal('0.00'),
+            )
+        rollup.line_count += row['lines']
+        rollup.quantity += row['sum_quantity'] or 0
+        rollup.revenue += _money(row['sum_revenue'])
+
+    with transaction.atomic():
+        _in_range(SalesRollup.objects.all(), 'date', start, end).delete()
+        _in_range(MenuItemSalesRollup.objects.all(), 'date', start, end).delete()
+        SalesRollup.objects.bulk_create(sales, batch_size=500)
+        MenuItemSalesRollup.objects.bulk_create(items.values(), batch_size=500)
+        _rebuild_contributions(orders, start, end)
+    return len(sales), len(items)
+
+
+def _rebuild_contributions(orders, start: date | None, end: date | None) -> None:
+    """Rewrite the ``RolledUpOrder`` rows to match freshly rebuilt rollups."""
+    _in_range(RolledUpOrder.objects.all(), 'date', start, end).delete()
+    rows = orders.order_by('pk').values(
+        'id', 'created_at', 'order_type', 'payment_method', 'subtotal', 'tax', 'delivery_charge', 'total_price'
+    )
+    batch = []
+    for order in rows.iterator(chunk_size=REBUILD_BATCH_SIZE):
+        batch.append(order)
+        if len(batch) == REBUILD_BATCH_SIZE:
+            _write_contributions(batch)
+            batch = []
+    _write_contributions(batch)
+
+
+def _write_contributions(orders: list[dict]) -> None:
+    if not orders:
+        return
+    lines_by_order = _lines_by_order([order['id'] for order in orders])
+    RolledUpOrder.objects.bulk_create(
+        [_contribution(order, lines_by_order.get(order['id'], [])) for order in orders]
+    )
+
+
+def sales_report(start: date, end: date, group_by: str = 'day') -> list[dict]:
+    """Sum the sales rollups for ``start``..``end`` grouped by one dimension."""
+    if group_by not in GROUPINGS:
+        raise ValueError(f'group_by must be one of: {", ".join(GROUPINGS)}')
+    column = 'date' if group_by == 'day' else group_by
+    rows = (
+        _in_range(SalesRollup.objects.all(), 'date', start, end)
+        .values(column)
+        .annotate(
+            orders=Sum('order_count'),
+            items=Sum('item_quantity'),
+            sum_subtotal=Sum('subtotal'),
+            sum_tax=Sum('tax'),
+            sum_delivery=Sum('delivery_charge'),
+            sum_total=Sum('total'),
+        )
+        .order_by(column)
+    )
+    return [
+        {
+            group_by: row[column].isoformat() if group_by == 'day' else row[column],
+            'orders': row['orders'],
+            'items': row['items'],
+            'subtotal': str(_money(row['sum_subtotal'])),
+            'tax': str(_money(row['sum_tax'])),
+            'delivery_charge': str(_money(row['sum_delivery'])),
+            'total': str(_money(row['sum_total'])),
+        }
+        for row in rows
+    ]
+
+
+def top_items(start: date, end: date, limit: int = 20) -> list[dict]:
+    """Best-selling items by quantity over ``start``..``end``."""
+    rows = (
+        _in_range(MenuItemSalesRollup.objects.all(), 'date', start, end)
+        .values('item_key')
+        .annotate(quantity=Sum('quantity'), lines=Sum('line_count'), sum_revenue=Sum('revenue'))
+        .order_by('-quantity', 'item_key')[:limit]
+    )
+    rows = list(rows)
+    # Latest name seen in the range wins
+    names = dict(
+        _in_range(MenuItemSalesRollup.objects.all(), 'date', start, end)
+        .filter(item_key__in=[row['item_key'] for row in rows])
+        .order_by('item_key', 'date')
+        .values_list('item_key', 'item_name')
+    )
+    return [
+        {
+            'item_key': row['item_key'],
+            'name': names.get(row['item_key'], ''),
+            'quantity': row['quantity'],
+            'order_lines': row['lines'],
+            'revenue': str(_money(row['sum_revenue'])),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,144 @@
+"""Cached access to the site-wide settings rows.
+
+SiteSetting, DeliverySettings, PaymentSettings, ReservationSettings, the
+active Language list and the delivery zone index change rarely but are read
+on nearly every request (context processors, chatbot FAQ, checkout). Each is
+loaded once, stored in the shared cache and mirrored in a process-local dict.
+
+Every entry has its own version counter in the shared cache, bumped by the
+save/delete signals in ``restaurant.signals``. A read compares the local copy
+against that counter, so a change made in one process is picked up by all of
+them without any database query in the steady state.
+
+Cached objects are shared between requests: treat them as read-only and load
+a fresh row from the ORM before changing and saving it.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import cache_versions
+from .delivery_zones import ZoneIndex, build_zone_index
+from .models import DeliverySettings, DeliveryZone, Language, PaymentSettings, ReservationSettings, SiteSetting
+
+VERSION_KEY = 'settings_version:{name}'
+CACHE_KEY = 'settings:{name}:{version}'
+# Entries of superseded versions (see restaurant.cache_versions) expire after this
+SETTINGS_TIMEOUT = 60 * 60 * 24
+
+SITE = 'site'
+DELIVERY = 'delivery'
+PAYMENT = 'payment'
+LANGUAGES = 'languages'
+DELIVERY_ZONES = 'delivery_zones'
+RESERVATIONS = 'reservations'
+
+
+def _load_site_settings() -> Optional[SiteSetting]:
+    return SiteSetting.objects.first()
+
+
+def _load_delivery_settings() -> Optional[DeliverySettings]:
+    return DeliverySettings.objects.first()
+
+
+def _load_reservation_settings() -> Optional[ReservationSettings]:
+    return ReservationSettings.objects.first()
+
+
+def _load_payment_settings() -> dict[str, PaymentSettings]:
+    return {gateway.gateway: gateway for gateway in PaymentSettings.objects.all()}
+
+
+def _load_active_languages() -> list[Language]:
+    return list(Language.objects.filter(is_active=True).order_by('-is_default'))
+
+
+LOADERS: dict[str, Callable] = {
+    SITE: _load_site_settings,
+    DELIVERY: _load_delivery_settings,
+    PAYMENT: _load_payment_settings,
+    LANGUAGES: _load_active_languages,
+    DELIVERY_ZONES: build_zone_index,
+    RESERVATIONS: _load_reservation_settings,
+}
+
+MODEL_ENTRIES = {
+    SiteSetting: SITE,
+    DeliverySettings: DELIVERY,
+    PaymentSettings: PAYMENT,
+    Language: LANGUAGES,
+    DeliveryZone: DELIVERY_ZONES,
+    ReservationSettings: RESERVATIONS,
+}
+
+_local: dict[str, tuple[int, object]] = {}
+
+
+def _get_version(name: str) -> int:
+    return cache_versions.get(VERSION_KEY.format(name=name))
+
+
+def _get(name: str):
+    version = _get_version(name)
+    local = _local.get(name)
+    if local is not None and local[0] == version:
+        return local[1]
+
+    key = CACHE_KEY.format(name=name, version=version)
+    cached = cache.get(key)
+    if cached is None:
+        # Wrapped so that a missing row (None) is cached too.
+        cached = (LOADERS[name](),)
+        cache.set(key, cached, SETTINGS_TIMEOUT)
+    _local[name] = (version, cached[0])
+    return cached[0]
+
+
+def get_site_settings() -> Optional[SiteSetting]:
+    """Return the SiteSetting row, or None if none exists."""
+    return _get(SITE)
+
+
+def get_delivery_settings() -> Optional[DeliverySettings]:
+    """Return the DeliverySettings row, or None if none exists."""
+    return _get(DELIVERY)
+
+
+def get_payment_settings(gateway: str | None = None):
+    """Return ``{gateway: PaymentSettings}``, or the entry for one gateway."""
+    gateways = _get(PAYMENT)
+    if gateway is None:
+        return gateways
+    return gateways.get(gateway)
+
+
+def get_reservation_settings() -> Optional[ReservationSettings]:
+    """Return the ReservationSettings row, or None if none exists."""
+    return _get(RESERVATIONS)
+
+
+def get_delivery_zones() -> ZoneIndex:
+    """Return the ``ZoneIndex`` of active delivery zones."""
+    return _get(DELIVERY_ZONES)
+
+
+def get_active_languages() -> list[Language]:
+    """Return active languages, default language first."""
+    return _get(LANGUAGES)
+
+
+def _bump_version(name: str) -> None:
+    cache_versions.bump(VERSION_KEY.format(name=name))
+    _local.pop(name, None)
+
+
+def invalidate_settings(model) -> None:
+    """Supersede the cached entry for ``model`` now and after commit."""
+    name = MODEL_ENTRIES[model]
+    _bump_version(name)
+    transaction.on_commit(lambda: _bump_version(name))
@@ -0,0 +1,142 @@
+"""Signal handlers that keep cached, derived data in sync with the models.
+
+Connected from ``RestaurantConfig.ready()``.
+"""
+
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import date_buckets
+from .cart_expiry import maybe_collect_expired_carts
+from .menu_snapshot import invalidate_menu_snapshots
+from .order_events import publish_status
+from .pickup_slots import release_slots
+from .reservations import occupancy as table_occupancy, release_reservations, reseat, reserve_table
+from .rollups import COMPLETED, apply_entries, sync_order
+from .models import (
+    ContactMessage, DeliverySettings, DeliveryZone, DiningTable, Language, MenuItem, Order, OrderItem,
+    PaymentSettings, Reservation, ReservationSettings, RolledUpOrder, SiteSetting,
+)
+from .settings_cache import invalidate_settings
+
+MenuItemTranslation = MenuItem._parler_meta.root_model
+
+
+@receiver(post_save, sender=MenuItem, dispatch_uid='menu_item_saved')
+@receiver(post_delete, sender=MenuItem, dispatch_uid='menu_item_deleted')
+@receiver(post_save, sender=MenuItemTranslation, dispatch_uid='menu_item_translation_saved')
+@receiver(post_delete, sender=MenuItemTranslation, dispatch_uid='menu_item_translation_deleted')
+def menu_changed(sender, **kwargs):
+    invalidate_menu_snapshots()
+
+
+@receiver(post_save, sender=SiteSetting, dispatch_uid='site_setting_saved')
+@receiver(post_delete, sender=SiteSetting, dispatch_uid='site_setting_deleted')
+@receiver(post_save, sender=DeliverySettings, dispatch_uid='delivery_settings_saved')
+@receiver(post_delete, sender=DeliverySettings, dispatch_uid='delivery_settings_deleted')
+@receiver(post_save, sender=PaymentSettings, dispatch_uid='payment_settings_saved')
+@receiver(post_delete, sender=PaymentSettings, dispatch_uid='payment_settings_deleted')
+@receiver(post_save, sender=DeliveryZone, dispatch_uid='delivery_zone_saved')
+@receiver(post_delete, sender=DeliveryZone, dispatch_uid='delivery_zone_deleted')
+@receiver(post_save, sender=ReservationSettings, dispatch_uid='reservation_settings_saved')
+@receiver(post_delete, sender=ReservationSettings, dispatch_uid='reservation_settings_deleted')
+@receiver(post_save, sender=Language, dispatch_uid='language_saved')
+@receiver(post_delete, sender=Language, dispatch_uid='language_deleted')
+def settings_changed(sender, **kwargs):
+    invalidate_settings(sender)
+
+
+@receiver(post_delete, sender=OrderItem, dispatch_uid='order_item_deleted')
+def order_item_deleted(sender, instance, origin=None, **kwargs):
+    # Also fires for queryset and admin bulk deletes. Lines removed because
+    # their order is being deleted have nothing left to update.
+    # ``origin`` is the deleted instance or queryset.
+    if getattr(origin, 'model', type(origin)) is Order:
+        return
+    instance.remove_from_order_totals()
+    order_lines_changed(sender, instance)
+
+
+@receiver(post_save, sender=OrderItem, dispatch_uid='order_item_saved')
+def order_lines_changed(sender, instance, **kwargs):
+    # Keeps the sales rollups right when a completed order's lines are edited
+    order_id = instance.order_id
+    if order_id:
+        transaction.on_commit(lambda: sync_order(order_id))
+
+
+@receiver(post_save, sender=Order, dispatch_uid='order_status_saved')
+def order_status_saved(sender, instance, created, **kwargs):
+    if created or not instance.status_changed:
+        return
+    order_id, status = instance.pk, instance.status
+    transaction.on_commit(lambda: publish_status(order_id, status))
+
+
+@receiver(post_save, sender=Order, dispatch_uid='order_sales_rollup')
+def order_completion_changed(sender, instance, created, **kwargs):
+    # Completed before or after this save: add, take out or re-apply its sales
+    was_completed = not created and instance._loaded_status == COMPLETED
+    if not was_completed and instance.status != COMPLETED:
+        return
+    order_id = instance.pk
+    transaction.on_commit(lambda: sync_order(order_id))
+
+
+@receiver(post_delete, sender=RolledUpOrder, dispatch_uid='rolled_up_order_deleted')
+def rolled_up_order_deleted(sender, instance, origin=None, **kwargs):
+    # A completed order (or its owner) was deleted: take its sales back out.
+    # Deletes made by restaurant.rollups itself have already been applied.
+    if getattr(origin, 'model', type(origin)) is RolledUpOrder:
+        return
+    apply_entries([instance], -1)
+
+
+@receiver(post_save, sender=Order, dispatch_uid='order_month_bucket_saved')
+@receiver(post_save, sender=ContactMessage, dispatch_uid='contact_month_bucket_saved')
+def dated_row_created(sender, instance, created, **kwargs):
+    if created:
+        date_buckets.add(sender, getattr(instance, date_buckets.TRACKED[sender]))
+
+
+@receiver(post_delete, sender=Order, dispatch_uid='order_month_bucket_deleted')
+@receiver(post_delete, sender=ContactMessage, dispatch_uid='contact_month_bucket_deleted')
+def dated_row_deleted(sender, instance, **kwargs):
+    date_buckets.add(sender, getattr(instance, date_buckets.TRACKED[sender]), -1)
+
+
+@receiver(post_save, sender=Order, dispatch_uid='order_pickup_slot_release')
+def order_cancelled(sender, instance, created, **kwargs):
+    if created or not instance.status_changed or instance.status != 'cancelled' or not instance.pickup_slot_id:
+        return
+    if release_slots([instance.pk]):
+        instance.pickup_slot = None
+        instance.version += 1
+
+
+@receiver(post_save, sender=Reservation, dispatch_uid='reservation_seating')
+def reservation_seating_changed(sender, instance, created, **kwargs):
+    # Runs inside Reservation.save()'s transaction; ReservationUnavailable
+    # rolls the save back
+    if instance.status == 'cancelled':
+        if not created and instance.seating_changed:
+            release_reservations([instance.pk])
+            instance.table = None
+    elif created:
+        reserve_table(instance)
+    elif instance.seating_changed:
+        reseat(instance)
+
+
+@receiver(post_save, sender=DiningTable, dispatch_uid='dining_table_saved')
+@receiver(post_delete, sender=DiningTable, dispatch_uid='dining_table_deleted')
+def dining_tables_changed(sender, **kwargs):
+    table_occupancy.clear()
+
+
+@receiver(request_finished, dispatch_uid='expire_carts_periodically')
+def expire_carts_periodically(sender, **kwargs):
+    # No-op unless CART_GC_INTERVAL is set; see restaurant.cart_expiry
+    maybe_collect_expired_carts()
@@ -0,0 +1,66 @@
+"""Admin date hierarchy that lists years and months from ``MonthBucket``."""
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.utils import formats
+from django.utils.text import capfirst
+from django.utils.translation import gettext as _
+
+from restaurant import date_buckets
+
+register = template.Library()
+
+
+def bucketed_date_hierarchy(cl):
+    """Like Django's ``date_hierarchy``, but years and months come from the
+    buckets, so neither level scans the changelist table. The day level is
+    left to Django: it is already limited to one month by the filter.
+
+    Buckets count all rows, so other active filters do not narrow the
+    years and months offered.
+    """
+    if not cl.date_hierarchy:
+        return None
+    field_name = cl.date_hierarchy
+    year_field = f'{field_name}__year'
+    month_field = f'{field_name}__month'
+    year_lookup = cl.params.get(year_field)
+    month_lookup = cl.params.get(month_field)
+
+    if month_lookup or f'{field_name}__day' in cl.params:
+        return date_hierarchy(cl)
+
+    def link(filters):
+        return cl.get_query_string(filters, [f'{field_name}__'])
+
+    months = date_buckets.months(cl.model)
+    if year_lookup:
+        return {
+            'show': True,
+            'back': {'link': link({}), 'title': _('All dates')},
+            'choices': [
+                {
+                    'link': link({year_field: year_lookup, month_field: month.month}),
+                    'title': capfirst(formats.date_format(month, 'YEAR_MONTH_FORMAT')),
+                }
+                for month in months if str(month.year) == str(year_lookup)
+            ],
+        }
+    years = sorted({month.year for month in months})
+    return {
+        'show': True,
+        'back': None,
+        'choices': [{'link': link({year_field: str(year)}), 'title': str(year)} for year in years],
+    }
+
+
+@register.tag(name='bucketed_date_hierarchy')
+def bucketed_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=bucketed_date_hierarchy,
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
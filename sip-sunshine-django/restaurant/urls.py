@@ -1,4 +1,5 @@
 from django.urls import path
+from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.generic import TemplateView
 from . import views, api
 from .checkout_views import CheckoutView, OrderConfirmationView, OrderTrackingView, CreateOrderView
@@ -10,8 +11,8 @@ urlpatterns = [
     path('', views.HomePageView.as_view(), name='home'),
     path('about/', views.AboutPageView.as_view(), name='about'),
     path('menu/', views.MenuPageView.as_view(), name='menu'),
-    path('terms/', TemplateView.as_view(template_name='pages/terms.html'), name='terms'),
-    path('privacy/', TemplateView.as_view(template_name='pages/privacy.html'), name='privacy'),
+    path('terms/', ensure_csrf_cookie(TemplateView.as_view(template_name='pages/terms.html')), name='terms'),
+    path('privacy/', ensure_csrf_cookie(TemplateView.as_view(template_name='pages/privacy.html')), name='privacy'),
     path('blog/', views.BlogListView.as_view(), name='blog'),
     path('blog/<slug:slug>/', views.BlogDetailView.as_view(), name='blog-detail'),
     path('contact/', views.ContactView.as_view(), name='contact'),
@@ -32,7 +33,17 @@ urlpatterns = [
     
     # API Endpoints
     path('api/settings/delivery/', api.get_delivery_settings, name='api_delivery_settings'),
+    path('api/menu/', api.menu_catalog, name='api_menu'),
     path('api/orders/create/', api.create_order, name='api_create_order'),
+    path('api/orders/status/bulk/', api.bulk_order_status, name='api_bulk_order_status'),
     path('api/orders/<int:order_id>/', api.get_order_status, name='api_order_status'),
+    path('api/orders/<int:order_id>/events/', api.order_status_stream, name='api_order_status_stream'),
+    path('api/cart/sync/', api.cart_sync, name='api_cart_sync'),
+    path('api/delivery/quote/', api.delivery_quote, name='api_delivery_quote'),
+    path('api/pickup/slots/', api.pickup_slots, name='api_pickup_slots'),
+    path('api/reservations/availability/', api.reservation_availability, name='api_reservation_availability'),
+    path('api/kitchen/changes/', api.kitchen_changes, name='api_kitchen_changes'),
+    path('api/profile/orders/', api.profile_orders, name='api_profile_orders'),
+    path('api/reports/sales/', api.sales_report_api, name='api_sales_report'),
     path('api/chatbot/', api.chatbot_message, name='api_chatbot'),
 ]
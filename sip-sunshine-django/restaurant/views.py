@@ -1,30 +1,58 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, DetailView, TemplateView, View
-from django.http import JsonResponse, Http404
+from django.http import Http404
 from django.core.mail import send_mail
 from django.contrib import messages
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
+from django.db import IntegrityError
 from django.db.utils import OperationalError, ProgrammingError
 from django.db.models import Q
 from django.utils.decorators import method_decorator
-from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
 from django.utils.translation import gettext_lazy as _
+import logging
+
 from .models import (
     Page, MenuItem, ContentBlock, BlogPost, 
     Reservation, ContactMessage, SiteSetting, Order, OrderItem, CustomerProfile
 )
+from .carts import CartError, merge_session_cart
 from .checkout_views import CheckoutView, OrderConfirmationView, OrderTrackingView, CreateOrderView
+from .menu_snapshot import get_menu_snapshot
+from .order_history import get_current_order, get_order_history
+from .pagination import CursorError
+from .reservations import ReservationUnavailable, available_times, parse_request as parse_reservation_request
+from .settings_cache import get_site_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _merge_guest_cart(user, session_key):
+    """Bring the guest cart along at login; a failed merge must not fail the login."""
+    try:
+        merge_session_cart(user, session_key)
+    except (CartError, IntegrityError):
+        logger.exception('Could not merge the guest cart into the cart of user %s', user.pk)
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class PageView(TemplateView):
     """Display any page by template name"""
     
+    def get_page(self):
+        # Looked up once per request; both the template and the context need it.
+        if not hasattr(self, '_page'):
+            slug = self.kwargs.get('slug', 'home')
+            self._page = get_object_or_404(
+                Page.objects.prefetch_translations(), slug=slug, is_active=True
+            )
+        return self._page
+
     def get_template_names(self):
-        slug = self.kwargs.get('slug', 'home')
-        page = get_object_or_404(Page, slug=slug, is_active=True)
+        page = self.get_page()
         
         # Map template names
         template_map = {
@@ -39,32 +67,32 @@ class PageView(TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        slug = self.kwargs.get('slug', 'home')
-        page = get_object_or_404(Page, slug=slug, is_active=True)
-        
-        context['page'] = page
-        context['content_blocks'] = ContentBlock.objects.filter(is_active=True)
+        context['page'] = self.get_page()
+        context['content_blocks'] = ContentBlock.objects.prefetch_translations().filter(is_active=True)
         
         return context
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class HomePageView(TemplateView):
     """Home page view"""
     template_name = 'pages/index.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['page'] = get_object_or_404(Page, slug='home', is_active=True)
-        context['content_blocks'] = ContentBlock.objects.filter(is_active=True)
-        context['menu_items'] = MenuItem.objects.filter(is_active=True)[:6]
-        context['featured_menu_items'] = MenuItem.objects.filter(is_active=True)[:6]
+        context['page'] = get_object_or_404(Page.objects.prefetch_translations(), slug='home', is_active=True)
+        context['content_blocks'] = ContentBlock.objects.prefetch_translations().filter(is_active=True)
+        menu_items = list(MenuItem.objects.prefetch_translations().filter(is_active=True)[:6])
+        context['menu_items'] = menu_items
+        context['featured_menu_items'] = menu_items
         # Get published blog posts
-        blog_posts = BlogPost.objects.filter(is_published=True)[:3]
+        blog_posts = BlogPost.objects.prefetch_translations().filter(is_published=True)[:3]
         # Filter to only include posts with valid slugs (this happens in the template too)
         context['blog_posts'] = [post for post in blog_posts if post.slug]
         return context
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class MenuPageView(TemplateView):
     """Menu page with categorized items"""
     template_name = 'pages/menu.html'
@@ -72,35 +100,24 @@ class MenuPageView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Do not hard-fail if CMS pages haven't been seeded yet (tests/first-run).
-        context['page'] = Page.objects.filter(slug='menu', is_active=True).first()
+        context['page'] = Page.objects.prefetch_translations().filter(slug='menu', is_active=True).first()
 
-        # Get all active menu items
-        menu_items = MenuItem.objects.filter(is_active=True).order_by('category', 'order', 'id')
-        context['menu_items'] = menu_items
-
-        # Provide the variables expected by the existing template.
-        # Anything not matching known categories is treated as main courses.
-        known = {key for key, _label in getattr(MenuItem, 'CATEGORY_CHOICES', [])}
-        context['appetizers'] = menu_items.filter(category__in=['appetizers', 'Appetizers'])
-        context['desserts'] = menu_items.filter(category__in=['desserts', 'Desserts'])
-        context['beverages'] = menu_items.filter(category__in=['beverages', 'Beverages', 'drinks', 'Drinks'])
-        main_known = menu_items.filter(category__in=['main_courses', 'main', 'Main', 'Side', 'main courses', 'Main Courses'])
-        fallback = menu_items.exclude(category__in=list(known))
-        context['main_courses'] = (main_known | fallback).distinct()
+        # All groupings come from one cached, per-language snapshot.
+        snapshot = get_menu_snapshot()
+        context['menu_items'] = snapshot.items
+        context['appetizers'] = snapshot.appetizers
+        context['main_courses'] = snapshot.main_courses
+        context['desserts'] = snapshot.desserts
+        context['beverages'] = snapshot.beverages
 
         # Keep older grouping structure too (used elsewhere)
-        categories = {}
-        for item in menu_items:
-            category = item.get_category_display() if hasattr(item, 'get_category_display') else (item.category or '')
-            if category not in categories:
-                categories[category] = []
-            categories[category].append(item)
-        context['categories'] = categories
-        context['featured_items'] = menu_items[:6]
-        
+        context['categories'] = snapshot.categories
+        context['featured_items'] = snapshot.featured_items
+
         return context
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class BlogListView(ListView):
     """Blog listing page"""
     model = BlogPost
@@ -110,14 +127,15 @@ class BlogListView(ListView):
     
     def get_queryset(self):
         # Get all published blog posts
-        return BlogPost.objects.filter(is_published=True).order_by('-published_at')
+        return BlogPost.objects.prefetch_translations().filter(is_published=True).order_by('-published_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['page'] = get_object_or_404(Page, slug='blog', is_active=True)
+        context['page'] = get_object_or_404(Page.objects.prefetch_translations(), slug='blog', is_active=True)
         return context
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class BlogDetailView(DetailView):
     """Blog post detail page"""
     model = BlogPost
@@ -154,20 +172,22 @@ class BlogDetailView(DetailView):
         return context
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class AboutPageView(TemplateView):
     """About page view"""
     template_name = 'pages/about.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['page'] = get_object_or_404(Page, slug='about', is_active=True)
-        context['content_blocks'] = ContentBlock.objects.filter(
+        context['page'] = get_object_or_404(Page.objects.prefetch_translations(), slug='about', is_active=True)
+        context['content_blocks'] = ContentBlock.objects.prefetch_translations().filter(
             block_type='about',
             is_active=True
         )
         return context
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class ReservationView(TemplateView):
     """Reservation page"""
     template_name = 'pages/reservation.html'
@@ -176,7 +196,7 @@ class ReservationView(TemplateView):
         context = super().get_context_data(**kwargs)
         context['page'] = get_object_or_404(Page, slug='reservation', is_active=True)
         try:
-            context['site_settings'] = SiteSetting.objects.first()
+            context['site_settings'] = get_site_settings()
         except:
             pass
         return context
@@ -184,22 +204,40 @@ class ReservationView(TemplateView):
     def post(self, request, *args, **kwargs):
         """Handle reservation form submission"""
         try:
-            reservation = Reservation.objects.create(
+            day, at, guests = parse_reservation_request(
+                request.POST.get('reservation_date'),
+                request.POST.get('reservation_time'),
+                request.POST.get('number_of_guests'),
+            )
+            # Saving claims a table, or raises ReservationUnavailable and saves nothing
+            Reservation.objects.create(
                 name=request.POST.get('name'),
                 email=request.POST.get('email'),
                 phone=request.POST.get('phone'),
-                reservation_date=request.POST.get('reservation_date'),
-                reservation_time=request.POST.get('reservation_time'),
-                number_of_guests=request.POST.get('number_of_guests'),
+                reservation_date=day,
+                reservation_time=at,
+                number_of_guests=guests,
                 special_requests=request.POST.get('special_requests', ''),
             )
             messages.success(request, 'Reservation request submitted successfully!')
-            return redirect('reservation')
+            return redirect('restaurant:reservation')
+        except ReservationUnavailable as e:
+            times = available_times(day, guests)
+            if times:
+                suggestions = ', '.join(f'{moment:%H:%M}' for moment in times[:6])
+                messages.error(request, f'{e}. Available times that day: {suggestions}')
+            else:
+                messages.error(request, f'{e}. Please choose another day.')
+            return redirect('restaurant:reservation')
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('restaurant:reservation')
         except Exception as e:
             messages.error(request, 'Error submitting reservation. Please try again.')
-            return redirect('reservation')
+            return redirect('restaurant:reservation')
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class ContactView(TemplateView):
     """Contact page"""
     template_name = 'pages/contact.html'
@@ -208,7 +246,7 @@ class ContactView(TemplateView):
         context = super().get_context_data(**kwargs)
         context['page'] = get_object_or_404(Page, slug='contact', is_active=True)
         try:
-            context['site_settings'] = SiteSetting.objects.first()
+            context['site_settings'] = get_site_settings()
         except:
             pass
         return context
@@ -230,99 +268,9 @@ class ContactView(TemplateView):
             return redirect('contact')
 
 
-class CreateOrderView(View):
-    """Handle order creation from menu page"""
-    
-    @method_decorator(csrf_exempt)
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
-    
-    def post(self, request):
-        """Create a new order"""
-        try:
-            guest_name = request.POST.get('guest_name', '').strip()
-            item_name = request.POST.get('item_name', '').strip()
-            item_price = request.POST.get('item_price', 0)
-            quantity = int(request.POST.get('quantity', 1))
-            order_type = request.POST.get('order_type', 'seated')
-            special_instructions = request.POST.get('special_instructions', '').strip()
-            
-            # Validation
-            if not guest_name or not item_name:
-                return JsonResponse({
-                    'success': False,
-                    'message': 'Guest name and item name are required'
-                })
-            
-            # Create order
-            order = Order.objects.create(
-                guest_name=guest_name,
-                order_type=order_type,
-                special_requests=special_instructions,
-                total_price=0
-            )
-            
-            # Add order details based on type
-            if order_type == 'seated':
-                table_number = request.POST.get('table_number', '')
-                if table_number:
-                    try:
-                        order.table_number = int(table_number)
-                    except (ValueError, TypeError):
-                        pass
-                    order.save()
-            else:  # online
-                guest_email = request.POST.get('guest_email', '').strip()
-                guest_phone = request.POST.get('guest_phone', '').strip()
-                delivery_address = request.POST.get('delivery_address', '').strip()
-                delivery_city = request.POST.get('delivery_city', '').strip()
-                delivery_postal_code = request.POST.get('delivery_postal_code', '').strip()
-                delivery_country = request.POST.get('delivery_country', '').strip()
-                
-                if guest_email:
-                    order.guest_email = guest_email
-                if guest_phone:
-                    order.guest_phone = guest_phone
-                if delivery_address:
-                    order.delivery_address = delivery_address
-                if delivery_city:
-                    order.delivery_city = delivery_city
-                if delivery_postal_code:
-                    order.delivery_postal_code = delivery_postal_code
-                if delivery_country:
-                    order.delivery_country = delivery_country
-                
-                order.save()
-            
-            # Create order item
-            subtotal = float(item_price) * quantity
-            order_item = OrderItem.objects.create(
-                order=order,
-                item_name=item_name,
-                item_price=float(item_price),
-                quantity=quantity,
-                special_instructions=special_instructions
-            )
-            
-            # Update order total
-            order.total_price = subtotal
-            order.save()
-            
-            return JsonResponse({
-                'success': True,
-                'order_id': order.id,
-                'message': f'Order created successfully'
-            })
-        
-        except Exception as e:
-            return JsonResponse({
-                'success': False,
-                'message': str(e)
-            })
-
-
 # ==================== Customer Authentication Views ====================
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class CustomerRegisterView(View):
     """Customer registration for valued customers"""
     
@@ -382,8 +330,10 @@ class CustomerRegisterView(View):
                 # Example: "no such table: restaurant_customerprofile" on fresh DB.
                 pass
             
-            # Auto-login after registration
+            # Auto-login after registration, keeping what the guest put in the cart
+            guest_session = request.session.session_key
             login(request, user)
+            _merge_guest_cart(user, guest_session)
             messages.success(request, f'Welcome, {first_name}! Your account has been created.')
             return redirect('restaurant:menu')
         
@@ -395,6 +345,7 @@ class CustomerRegisterView(View):
             }, status=400)
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class CustomerLoginView(View):
     """Customer login for valued customers"""
     
@@ -418,7 +369,10 @@ class CustomerLoginView(View):
         user = authenticate(request, username=email, password=password)
         
         if user is not None:
+            # login() rotates the session key; remember the guest cart's first
+            guest_session = request.session.session_key
             login(request, user)
+            _merge_guest_cart(user, guest_session)
             messages.success(request, f'Welcome back, {user.first_name}!')
             return redirect('restaurant:menu')
         else:
@@ -437,6 +391,7 @@ class CustomerLogoutView(View):
         return redirect('restaurant:menu')
 
 
+@method_decorator(ensure_csrf_cookie, name='dispatch')
 class CustomerProfileView(View):
     """View customer profile and order history"""
     
@@ -447,12 +402,12 @@ class CustomerProfileView(View):
             profile, _ = CustomerProfile.objects.get_or_create(user=user)
         except (OperationalError, ProgrammingError):
             profile = None
-        orders = Order.objects.filter(
-            guest_email=user.email
-        ).order_by('-created_at')
+        try:
+            history = get_order_history(user, request.GET.get('cursor') or None)
+        except CursorError:
+            return redirect('restaurant:customer_profile')
 
-        active_statuses = ['pending', 'confirmed', 'preparing', 'ready', 'out_for_delivery']
-        current_order = orders.filter(status__in=active_statuses).first()
+        current_order = get_current_order(user)
         estimated_time = None
         if current_order and getattr(current_order, 'estimated_completion_time', None):
             try:
@@ -465,7 +420,8 @@ class CustomerProfileView(View):
             'profile': profile,
             'current_order': current_order,
             'current_order_estimated_time': estimated_time,
-            'orders': orders,
+            'orders': history.items,
+            'next_cursor': history.next_cursor,
             'page_title': 'My Profile - Sip and Sunshine'
         })
 
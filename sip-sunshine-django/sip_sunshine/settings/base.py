@@ -154,3 +154,9 @@ CACHES = {
         'LOCATION': 'sip-sunshine-cache',
     }
 }
+
+# Carts not updated for this many days are deleted by `manage.py expire_carts`
+CART_TTL_DAYS = 30
+# Seconds between small cart expiry runs triggered by finished requests;
+# None leaves expiry to the management command (e.g. from cron)
+CART_GC_INTERVAL = None
@@ -5,10 +5,18 @@
 
 const CART_STORAGE_KEY = 'sip_sunshine_cart';
 const CART_API_URL = '/api/cart/';
+const CART_SYNC_URL = '/api/cart/sync/';
+// Changes made within this window go to the server as one batch
+const CART_SYNC_DELAY_MS = 800;
+// Wait before resending changes the server could not take just now
+const CART_SYNC_RETRY_MS = 5000;
 
 class ShoppingCart {
     constructor() {
         this.items = this.loadFromStorage();
+        this.pendingChanges = [];
+        this.syncTimer = null;
+        this.serverVersion = null;
         this.init();
     }
 
@@ -16,7 +24,7 @@ class ShoppingCart {
      * Initialize cart system
      */
     init() {
-        this.syncWithServer();
+        this.loadFromServer();
         this.updateCartUI();
         this.setupEventListeners();
     }
@@ -76,6 +84,7 @@ class ShoppingCart {
             });
         }
 
+        this.queueChange({op: 'add', id: itemData.id, quantity: quantity});
         this.saveToStorage();
         this.updateCartUI();
         this.showNotification(`${itemData.name} added to cart!`);
@@ -88,6 +97,7 @@ class ShoppingCart {
      */
     removeFromCart(itemId) {
         this.items = this.items.filter(item => item.id !== itemId);
+        this.queueChange({op: 'remove', id: itemId});
         this.saveToStorage();
         this.updateCartUI();
         this.showNotification('Item removed from cart');
@@ -106,6 +116,7 @@ class ShoppingCart {
                 this.removeFromCart(itemId);
             } else {
                 item.quantity = parseInt(quantity);
+                this.queueChange({op: 'set', id: itemId, quantity: item.quantity});
                 this.saveToStorage();
                 this.updateCartUI();
             }
@@ -121,6 +132,7 @@ class ShoppingCart {
         const item = this.items.find(item => item.id === itemId);
         if (item) {
             item.special_instructions = instructions;
+            this.queueChange({op: 'set', id: itemId, quantity: item.quantity, special_instructions: instructions});
             this.saveToStorage();
         }
     }
@@ -149,6 +161,7 @@ class ShoppingCart {
     clearCart() {
         if (confirm('Clear entire cart?')) {
             this.items = [];
+            this.queueChange({op: 'clear'});
             this.saveToStorage();
             this.updateCartUI();
             this.showNotification('Cart cleared');
@@ -293,6 +306,9 @@ class ShoppingCart {
                 this.openCartModal();
             }
         });
+
+        // Flush changes that are still waiting when the page goes away
+        window.addEventListener('pagehide', () => this.syncWithServer(true));
     }
 
     /**
@@ -353,11 +369,130 @@ class ShoppingCart {
     }
 
     /**
-     * Sync cart with server
+     * Queue a cart change for the server, merged with the pending ones
+     * @param {Object} change - {op: 'add'|'set'|'remove'|'clear', id, quantity}
+     */
+    queueChange(change) {
+        if (change.op === 'clear') {
+            this.pendingChanges = [change];
+        } else {
+            const last = this.pendingChanges[this.pendingChanges.length - 1];
+            if (change.op === 'add' && last && last.op === 'add' && last.id === change.id) {
+                last.quantity += change.quantity;
+            } else {
+                if (change.op !== 'add') {
+                    // A remove supersedes everything pending for the item, a set
+                    // supersedes earlier sets (a pending add must still create the line)
+                    this.pendingChanges = this.pendingChanges.filter(pending =>
+                        pending.id !== change.id || (change.op === 'set' && pending.op === 'add'));
+                }
+                this.pendingChanges.push(change);
+            }
+        }
+        clearTimeout(this.syncTimer);
+        this.syncTimer = setTimeout(() => this.syncWithServer(), CART_SYNC_DELAY_MS);
+    }
+
+    /**
+     * Adopt the server cart (e.g. merged at login), or seed it from this browser
+     * @param {Boolean} replace - Take the server cart even if it is empty
+     */
+    loadFromServer(replace = false) {
+        return fetch(CART_SYNC_URL, {credentials: 'same-origin'})
+            .then(response => response.ok ? response.json() : null)
+            .then(data => {
+                if (!data || !data.success || this.pendingChanges.length > 0) return;
+                if (data.items.length > 0 || replace) {
+                    this.adoptServerCart(data);
+                } else if (this.items.length > 0) {
+                    // Cart only kept in localStorage so far: send it up once
+                    this.items.forEach(item => this.queueChange({
+                        op: 'add',
+                        id: item.id,
+                        quantity: item.quantity,
+                        special_instructions: item.special_instructions || ''
+                    }));
+                }
+            })
+            .catch(error => console.error('Error loading cart:', error));
+    }
+
+    /**
+     * Replace the local cart with the server's copy
+     * @param {Object} data - Response of the cart sync API
+     */
+    adoptServerCart(data) {
+        this.serverVersion = data.version;
+        this.items = data.items.map(item => ({
+            description: '',
+            image: '',
+            category: '',
+            special_instructions: '',
+            ...item,
+            id: String(item.id),
+            price: parseFloat(item.price),
+            quantity: parseInt(item.quantity)
+        }));
+        this.saveToStorage();
+        this.updateCartUI();
+    }
+
+    /**
+     * Send the pending changes to the server cart in one request
+     * @param {Boolean} keepalive - Let the request outlive the page
+     */
+    syncWithServer(keepalive = false) {
+        clearTimeout(this.syncTimer);
+        if (this.pendingChanges.length === 0) return Promise.resolve();
+        const changes = this.pendingChanges;
+        this.pendingChanges = [];
+
+        return fetch(CART_SYNC_URL, {
+            method: 'POST',
+            credentials: 'same-origin',
+            keepalive: keepalive,
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': this.getCsrfToken()
+            },
+            body: JSON.stringify({changes: changes})
+        })
+            .then(response => {
+                if (response.ok) {
+                    return response.json().then(data => {
+                        if (data && data.success) this.serverVersion = data.version;
+                    });
+                }
+                const failed = new Error(`Cart sync failed (${response.status})`);
+                if (response.status !== 400) throw failed;
+                return response.json()
+                    .catch(() => null)
+                    .then(data => {
+                        // Anything but the API's own rejection (e.g. a proxy
+                        // error page) says nothing about the cart: try again
+                        if (!data || data.success !== false || !data.message) throw failed;
+                        // Rejected (e.g. an item is no longer sold): the server
+                        // cart is unchanged, so say why and show that cart instead
+                        this.showNotification(data.message, 'error');
+                        return this.loadFromServer(true);
+                    });
+            })
+            .catch(error => {
+                // 403, 5xx or offline: keep the local cart and the changes for
+                // the next attempt
+                this.pendingChanges = changes.concat(this.pendingChanges);
+                console.error('Error syncing cart:', error);
+                clearTimeout(this.syncTimer);
+                this.syncTimer = setTimeout(() => this.syncWithServer(), CART_SYNC_RETRY_MS);
+            });
+    }
+
+    /**
+     * Read the CSRF token from its cookie
      */
-    syncWithServer() {
-        // This can be used to backup cart to database for logged-in users
-        // Implement when needed
+    getCsrfToken() {
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
     }
 
     /**
@@ -0,0 +1,72 @@
+"""Query-count regression tests for the order and cart admin changelists."""
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from restaurant.models import Cart, Order, OrderItem
+
+
+class ChangelistQueryCountTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.created = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            self.created += 1
+            n = self.created
+            user = User.objects.create_user(f"customer{n}", email=f"c{n}@example.com")
+            order = Order.objects.create(order_type="pickup", guest_name=f"Guest {n}", user=user)
+            OrderItem.objects.create(order=order, item_name="Soup", item_price=Decimal("4.50"), quantity=2)
+            Cart.objects.create(
+                session_key=f"session-{n}", user=user,
+                items=[{"id": 1, "name": "Soup", "price": "4.50", "quantity": 2}],
+            )
+
+    def count_queries(self, url):
+        self.client.get(url)  # warm per-process caches (content types, settings)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant(self, url):
+        self.add_rows(3)
+        small = self.count_queries(url)
+        self.add_rows(12)
+        large = self.count_queries(url)
+        self.assertEqual(small, large, f"{url} ran {small} queries for 3 rows but {large} for 15")
+
+    def test_order_changelist(self):
+        self.assert_constant("/admin/restaurant/order/")
+
+    def test_order_item_changelist(self):
+        self.assert_constant("/admin/restaurant/orderitem/")
+
+    def test_cart_changelist(self):
+        self.assert_constant("/admin/restaurant/cart/")
+
+    def test_order_item_subtotal_comes_from_sql(self):
+        self.add_rows(1)
+
+        response = self.client.get("/admin/restaurant/orderitem/")
+
+        self.assertContains(response, "9.00</span>")
+
+    def test_cart_changelist_survives_malformed_quantities(self):
+        Cart.objects.create(session_key="odd", items=[
+            {"id": 1, "price": "4.50", "quantity": "two"},
+            {"id": 2, "price": "3.00", "quantity": 0},
+            {"id": 3, "price": "1.00"},
+        ])
+
+        response = self.client.get("/admin/restaurant/cart/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<td class="field-get_item_count">1</td>', html=False)
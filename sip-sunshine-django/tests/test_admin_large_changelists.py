@@ -0,0 +1,118 @@
+"""Tests for the estimated-count admin paginator and month buckets."""
+
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from restaurant import date_buckets
+from restaurant.models import ContactMessage, MonthBucket, Order
+from restaurant.pagination import EstimatedCountPaginator
+
+
+def make_order(year, month):
+    order = Order.objects.create(order_type="pickup", guest_name="Guest")
+    stamp = timezone.make_aware(datetime(year, month, 15, 12))
+    Order.objects.filter(pk=order.pk).update(created_at=stamp)
+    return order
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        for _ in range(5):
+            Order.objects.create(order_type="pickup", guest_name="Guest")
+
+    def test_small_counts_are_exact_and_not_cached(self):
+        paginator = EstimatedCountPaginator(Order.objects.order_by("pk"), 2)
+        self.assertEqual(paginator.count, 5)
+
+        Order.objects.create(order_type="pickup", guest_name="Guest")
+
+        self.assertEqual(EstimatedCountPaginator(Order.objects.order_by("pk"), 2).count, 6)
+
+    def test_large_counts_are_cached_per_query(self):
+        class Paginator(EstimatedCountPaginator):
+            threshold = 3
+
+        self.assertEqual(Paginator(Order.objects.order_by("pk"), 2).count, 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(Paginator(Order.objects.order_by("pk"), 2).count, 5)
+
+        # A different filter is counted separately
+        self.assertEqual(Paginator(Order.objects.filter(status="completed").order_by("pk"), 2).count, 0)
+
+
+class MonthBucketTest(TestCase):
+    def test_create_and_delete_maintain_buckets(self):
+        order = Order.objects.create(order_type="pickup", guest_name="Guest")
+        ContactMessage.objects.create(name="A", email="a@example.com", subject="Hi", message="Hello")
+        this_month = timezone.localdate().replace(day=1)
+
+        self.assertEqual(date_buckets.months(Order), [this_month])
+        self.assertEqual(date_buckets.months(ContactMessage), [this_month])
+
+        order.delete()
+        self.assertEqual(date_buckets.months(Order), [])
+
+    def test_rebuild_recounts_from_table(self):
+        make_order(2023, 11)
+        make_order(2024, 2)
+        make_order(2024, 2)
+
+        out = StringIO()
+        call_command("rebuild_month_buckets", stdout=out)
+
+        buckets = dict(MonthBucket.objects.filter(model="restaurant.order").values_list("month", "count"))
+        self.assertEqual(buckets, {datetime(2023, 11, 1).date(): 1, datetime(2024, 2, 1).date(): 2})
+        self.assertIn("restaurant.order: 2 months", out.getvalue())
+
+
+class OrderChangelistDateHierarchyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        make_order(2023, 11)
+        make_order(2024, 2)
+        make_order(2024, 5)
+        date_buckets.rebuild(Order)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q["sql"] for q in queries]
+
+    def test_years_come_from_buckets(self):
+        response, queries = self.get("/admin/restaurant/order/")
+
+        self.assertContains(response, "?created_at__year=2023")
+        self.assertContains(response, "?created_at__year=2024")
+        table_scans = [sql for sql in queries if "MIN(" in sql or "django_datetime_trunc" in sql]
+        self.assertEqual(table_scans, [])
+
+    def test_months_come_from_buckets(self):
+        response, queries = self.get("/admin/restaurant/order/?created_at__year=2024")
+
+        self.assertContains(response, "created_at__month=2")
+        self.assertContains(response, "created_at__month=5")
+        self.assertNotContains(response, "created_at__month=11")
+        self.assertFalse([sql for sql in queries if "django_datetime_trunc" in sql])
+
+    def test_days_still_drill_down(self):
+        response, _queries = self.get("/admin/restaurant/order/?created_at__year=2024&created_at__month=2")
+
+        self.assertContains(response, "created_at__day=15")
+        self.assertEqual(len(response.context["cl"].result_list), 1)
+
+    def test_no_full_count_query(self):
+        _response, queries = self.get("/admin/restaurant/order/?status=pending")
+
+        self.assertEqual(len([sql for sql in queries if "COUNT(" in sql]), 1)
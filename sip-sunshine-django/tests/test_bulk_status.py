@@ -0,0 +1,113 @@
+"""Tests for bulk order status transitions (admin actions and API)."""
+
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+
+from restaurant import order_events
+from restaurant.models import Order, OrderItem, SalesRollup
+from restaurant.order_status import TransitionError, transition_orders
+
+
+class TransitionOrdersTest(TestCase):
+    def make_order(self, status):
+        order = Order.objects.create(order_type="pickup", guest_name="Guest", status=status)
+        OrderItem.objects.create(order=order, item_name="Soup", item_price=Decimal("4.50"), quantity=2)
+        return order
+
+    def test_only_allowed_sources_move(self):
+        preparing = [self.make_order("preparing") for _ in range(3)]
+        pending = self.make_order("pending")
+
+        result = transition_orders(Order.objects.all(), "ready")
+
+        self.assertEqual(sorted(result.updated), [o.pk for o in preparing])
+        self.assertEqual(result.skipped, [pending.pk])
+        self.assertEqual(Order.objects.filter(status="ready").count(), 3)
+        self.assertEqual(Order.objects.get(pk=pending.pk).status, "pending")
+
+    def test_single_update_statement(self):
+        for _ in range(10):
+            self.make_order("ready")
+
+        # select the candidates, then one UPDATE (plus the savepoint pair)
+        with self.assertNumQueries(4):
+            transition_orders(Order.objects.all(), "complete")
+
+    def test_complete_sets_timestamps_and_keeps_totals(self):
+        order = self.make_order("ready")
+        total, updated_at = order.total_price, Order.objects.get(pk=order.pk).updated_at
+
+        transition_orders(Order.objects.filter(pk=order.pk), "complete")
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, "completed")
+        self.assertIsNotNone(order.completed_at)
+        self.assertGreater(order.updated_at, updated_at)
+        self.assertEqual(order.total_price, total)
+
+    def test_one_notification_and_rollups_after_commit(self):
+        orders = [self.make_order("ready") for _ in range(3)]
+        before = order_events.notifier.position(orders[-1].pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_orders(Order.objects.all(), "complete")
+
+        self.assertGreater(order_events.notifier.position(orders[-1].pk), before)
+        rollup = SalesRollup.objects.get()
+        self.assertEqual((rollup.order_count, rollup.item_quantity), (3, 6))
+
+    def test_unknown_action(self):
+        with self.assertRaises(TransitionError):
+            transition_orders(Order.objects.all(), "teleport")
+
+
+class BulkStatusApiTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.staff = User.objects.create_user("host", password="pw", is_staff=True)
+        self.orders = [Order.objects.create(order_type="pickup", guest_name="Guest") for _ in range(2)]
+
+    def post(self, payload):
+        return self.client.post("/api/orders/status/bulk/", json.dumps(payload), content_type="application/json")
+
+    def test_requires_staff(self):
+        self.assertEqual(self.post({"action": "confirm", "order_ids": [1]}).status_code, 403)
+
+    def test_confirms_orders(self):
+        self.client.force_login(self.staff)
+        Order.objects.filter(pk=self.orders[1].pk).update(status="cancelled")
+
+        data = self.post({"action": "confirm", "order_ids": [o.pk for o in self.orders] + [999999]}).json()
+
+        self.assertEqual(data["updated"], [self.orders[0].pk])
+        self.assertEqual(data["skipped"], [self.orders[1].pk])
+        self.assertEqual(data["not_found"], [999999])
+        self.assertEqual(data["status"], "confirmed")
+
+    def test_bad_requests(self):
+        self.client.force_login(self.staff)
+
+        self.assertEqual(self.post({"action": "teleport", "order_ids": [1]}).status_code, 400)
+        self.assertEqual(self.post({"action": "confirm", "order_ids": []}).status_code, 400)
+        self.assertEqual(self.post({"action": "confirm", "order_ids": ["1"]}).status_code, 400)
+        self.assertEqual(self.post({"action": "confirm", "order_ids": list(range(1, 502))}).status_code, 400)
+
+
+class BulkStatusAdminActionTest(TestCase):
+    def test_admin_action(self):
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        client = Client()
+        client.force_login(admin_user)
+        orders = [Order.objects.create(order_type="pickup", guest_name="Guest") for _ in range(3)]
+
+        response = client.post(
+            "/admin/restaurant/order/",
+            {"action": "mark_confirmed", "_selected_action": [o.pk for o in orders]},
+            follow=True,
+        )
+
+        self.assertContains(response, "3 order(s) moved to")
+        self.assertEqual(Order.objects.filter(status="confirmed").count(), 3)
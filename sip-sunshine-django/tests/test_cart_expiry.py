@@ -0,0 +1,82 @@
+"""Tests for abandoned cart expiry."""
+
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from restaurant.cart_expiry import collect_expired_carts, maybe_collect_expired_carts
+from restaurant.models import Cart, CartItem, MenuItem
+
+
+class CartExpiryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        item = MenuItem.objects.create(name='Soup', price=Decimal('6.00'), category='starters')
+        self.old = []
+        for number in range(5):
+            cart = Cart.objects.create(session_key=f'old-{number}', items=[{'id': 1, 'price': '6.00', 'quantity': 1}])
+            CartItem.objects.create(cart=cart, item=item)
+            self.old.append(cart)
+        self.fresh = Cart.objects.create(session_key='fresh')
+        self.customer = Cart.objects.create(session_key='customer', user=User.objects.create_user('eva'))
+        Cart.objects.exclude(pk=self.fresh.pk).update(updated_at=timezone.now() - timedelta(days=45))
+
+    def test_expired_guest_carts_go_in_batches(self):
+        result = collect_expired_carts(batch_size=2)
+
+        self.assertEqual(result.carts, 5)
+        self.assertEqual(result.cart_items, 5)
+        self.assertEqual(result.batches, 3)
+        self.assertGreater(result.bytes, 0)
+        self.assertEqual(set(Cart.objects.values_list('session_key', flat=True)), {'fresh', 'customer'})
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_include_users(self):
+        collect_expired_carts(include_users=True)
+
+        self.assertEqual(list(Cart.objects.values_list('session_key', flat=True)), ['fresh'])
+
+    def test_batch_statements(self):
+        with CaptureQueriesContext(connection) as queries:
+            collect_expired_carts(batch_size=10)
+
+        statements = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        # bounds; then per range: expired ids, pks for the cascade, items, carts
+        self.assertEqual(len(statements), 5)
+        self.assertNotIn('"restaurant_cart"."items", ', statements[2])
+
+    def test_max_batches_stops_early(self):
+        result = collect_expired_carts(batch_size=2, max_batches=1)
+
+        self.assertEqual(result.carts, 2)
+        self.assertEqual(Cart.objects.count(), 5)
+
+    def test_command_dry_run_deletes_nothing(self):
+        out = io.StringIO()
+        call_command('expire_carts', '--dry-run', stdout=out)
+
+        self.assertIn('Would delete 5 carts and 5 cart items', out.getvalue())
+        self.assertEqual(Cart.objects.count(), 7)
+
+    def test_command_reports_reclaimed_rows(self):
+        out = io.StringIO()
+        call_command('expire_carts', '--days', '40', '--batch-size', '3', stdout=out)
+
+        self.assertIn('Deleted 5 carts and 5 cart items', out.getvalue())
+
+    @override_settings(CART_GC_INTERVAL=3600)
+    def test_periodic_hook_runs_once_per_interval(self):
+        self.assertEqual(maybe_collect_expired_carts().carts, 5)
+        self.assertIsNone(maybe_collect_expired_carts())
+
+    def test_periodic_hook_is_off_by_default(self):
+        self.assertIsNone(maybe_collect_expired_carts())
+        self.assertEqual(Cart.objects.count(), 7)
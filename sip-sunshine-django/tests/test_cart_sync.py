@@ -0,0 +1,248 @@
+"""Tests for the batched cart service, POST /api/cart/sync/ and the login merge."""
+
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from restaurant.carts import CartChange, CartError, CartLines, apply_changes, merge_session_cart, parse_changes
+from restaurant.models import Cart, MenuItem
+from restaurant.pricing import get_price_map
+
+
+class CartLinesTest(TestCase):
+    def test_lines_are_merged_by_id(self):
+        lines = CartLines([
+            {'id': 1, 'name': 'Burger', 'price': '10.00', 'quantity': 1},
+            {'id': '1', 'name': 'Burger', 'price': '10.00', 'quantity': 2},
+        ])
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines.get(1)['quantity'], 3)
+        self.assertEqual(lines.subtotal, Decimal('30.00'))
+
+    def test_subtotal_follows_changes(self):
+        lines = CartLines([{'id': 1, 'price': 4.5, 'quantity': 2}, {'id': 2, 'price': '3.00', 'quantity': 1}])
+        self.assertEqual(lines.subtotal, Decimal('12.00'))
+
+        lines.set_quantity(1, 1)
+        lines.remove(2)
+
+        self.assertEqual(lines.subtotal, Decimal('4.50'))
+        self.assertEqual(lines.item_count, 1)
+
+    def test_parse_rejects_bad_changes(self):
+        for payload in ({'op': 'add'}, [{'op': 'drop', 'id': 1}], [{'op': 'set', 'id': 1, 'quantity': -1}]):
+            with self.assertRaises(CartError):
+                parse_changes(payload)
+
+
+class ApplyChangesTest(TestCase):
+    def setUp(self):
+        self.cart = Cart.objects.create(session_key='cart-session')
+
+    def test_batch_is_one_write(self):
+        changes = [
+            CartChange('add', item_id=1, quantity=2, item={'id': 1, 'name': 'Burger', 'price': '10.00'}),
+            CartChange('add', item_id=2, quantity=1, item={'id': 2, 'name': 'Fries', 'price': '3.50'}),
+            CartChange('set', item_id=1, quantity=3),
+            CartChange('remove', item_id=2),
+        ]
+        with self.assertNumQueries(1):
+            apply_changes(self.cart, changes)
+
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.items, [{'id': 1, 'name': 'Burger', 'price': '10.00', 'quantity': 3}])
+        self.assertEqual(self.cart.subtotal, Decimal('30.00'))
+        self.assertEqual(self.cart.version, 2)
+
+    def test_concurrent_write_is_replayed(self):
+        stale = Cart.objects.get(pk=self.cart.pk)
+        self.cart.add_item({'id': 1, 'name': 'Burger', 'price': '10.00'})
+
+        apply_changes(stale, [CartChange('add', item_id=2, quantity=1, item={'id': 2, 'name': 'Fries', 'price': '3.50'})])
+
+        self.cart.refresh_from_db()
+        self.assertEqual([line['id'] for line in self.cart.items], [1, 2])
+        self.assertEqual(self.cart.version, 3)
+
+    def test_direct_save_keeps_subtotal(self):
+        self.cart.items = [{'id': 1, 'price': '2.00', 'quantity': 2}]
+        self.cart.save()
+
+        self.cart.refresh_from_db()
+        self.assertEqual(self.cart.subtotal, Decimal('4.00'))
+
+    def test_total_follows_unsaved_item_changes(self):
+        self.cart.add_item({'id': 1, 'name': 'Burger', 'price': '10.00'})
+        cart = Cart.objects.get(pk=self.cart.pk)
+
+        cart.items[0]['quantity'] = 2
+        cart.items.append({'id': 2, 'price': '5.00', 'quantity': 1})
+
+        self.assertEqual(cart.get_total(), Decimal('30.25'))
+
+
+class CartSyncApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.burger = MenuItem.objects.create(name='Burger', price=Decimal('12.50'), category='main_courses')
+        self.client = Client()
+
+    def sync(self, changes):
+        return self.client.post('/api/cart/sync/', data=json.dumps({'changes': changes}),
+                                content_type='application/json')
+
+    def test_changes_are_priced_from_the_menu(self):
+        response = self.sync([
+            {'op': 'add', 'id': str(self.burger.id), 'quantity': 1},
+            {'op': 'add', 'id': str(self.burger.id), 'quantity': 1, 'special_instructions': 'No pickles'},
+        ])
+
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['item_count'], 2)
+        self.assertEqual(data['subtotal'], '25.00')
+        self.assertEqual(data['items'][0]['name'], 'Burger')
+        self.assertEqual(data['items'][0]['special_instructions'], 'No pickles')
+
+    def test_cart_persists_in_the_session(self):
+        self.sync([{'op': 'add', 'id': self.burger.id, 'quantity': 2}])
+        self.sync([{'op': 'set', 'id': self.burger.id, 'quantity': 1}])
+
+        data = self.client.get('/api/cart/sync/').json()
+
+        self.assertEqual(data['item_count'], 1)
+        self.assertEqual(data['version'], 3)
+        self.assertEqual(Cart.objects.count(), 1)
+
+    def test_unknown_item_is_rejected(self):
+        response = self.sync([{'op': 'add', 'id': 999999}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/cart/sync/').json()['items'], [])
+
+    def test_new_visitor_gets_a_csrf_cookie_to_sync_with(self):
+        client = Client(enforce_csrf_checks=True)
+
+        client.get('/menu/')
+        response = client.post(
+            '/api/cart/sync/', data=json.dumps({'changes': [{'op': 'add', 'id': self.burger.id}]}),
+            content_type='application/json', HTTP_X_CSRFTOKEN=client.cookies['csrftoken'].value,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['item_count'], 1)
+
+
+class LoginCartMergeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.burger = MenuItem.objects.create(name='Burger', price=Decimal('12.50'), category='main_courses')
+        self.fries = MenuItem.objects.create(name='Fries', price=Decimal('3.50'), category='sides')
+        self.user = User.objects.create_user('eva@example.com', 'eva@example.com', 'secret-pass', first_name='Eva')
+        self.client = Client()
+
+    def sync(self, changes):
+        return self.client.post('/api/cart/sync/', data=json.dumps({'changes': changes}),
+                                content_type='application/json')
+
+    def log_in(self):
+        return self.client.post('/auth/login/', {'email': 'eva@example.com', 'password': 'secret-pass'})
+
+    def test_guest_cart_is_merged_and_repriced(self):
+        Cart.objects.create(session_key='old-device', user=self.user, items=[
+            {'id': self.burger.id, 'name': 'Burger', 'price': '9.99', 'quantity': 1},
+        ])
+        self.sync([{'op': 'add', 'id': self.burger.id, 'quantity': 2}, {'op': 'add', 'id': self.fries.id}])
+
+        self.log_in()
+
+        cart = Cart.objects.get()
+        self.assertEqual(cart.user, self.user)
+        self.assertEqual({line['name']: line['quantity'] for line in cart.items}, {'Burger': 3, 'Fries': 1})
+        self.assertEqual(cart.subtotal, Decimal('41.00'))
+        self.assertEqual(self.client.get('/api/cart/sync/').json()['item_count'], 4)
+
+    def test_customer_without_cart_adopts_the_guest_cart(self):
+        self.sync([{'op': 'add', 'id': self.fries.id}])
+        guest = Cart.objects.get()
+
+        self.log_in()
+
+        guest.refresh_from_db()
+        self.assertEqual(guest.user, self.user)
+
+    def test_merge_is_one_read_and_one_write(self):
+        guest = Cart.objects.create(session_key='guest', items=[{'id': self.fries.id, 'price': '3.50', 'quantity': 1}])
+        Cart.objects.create(session_key='own', user=self.user)
+        prices = get_price_map()
+
+        with CaptureQueriesContext(connection) as queries:
+            merge_session_cart(self.user, guest.session_key, prices)
+
+        statements = [query['sql'].split()[0] for query in queries if 'SAVEPOINT' not in query['sql']]
+        # read both carts, write the merged one, delete the guest cart (cascade lookup + delete)
+        self.assertEqual(statements[:2], ['SELECT', 'UPDATE'])
+        self.assertEqual(statements.count('UPDATE'), 1)
+
+    def test_items_no_longer_sold_are_dropped(self):
+        guest = Cart.objects.create(session_key='guest', items=[{'id': self.fries.id, 'price': '3.50', 'quantity': 1}])
+        self.fries.is_active = False
+        self.fries.save()
+
+        cart = merge_session_cart(self.user, guest.session_key)
+
+        self.assertEqual(cart.items, [])
+
+    def test_failed_merge_does_not_fail_the_login(self):
+        self.sync([{'op': 'add', 'id': self.fries.id}])
+
+        with mock.patch('restaurant.views.merge_session_cart', side_effect=CartError('busy')), \
+                self.assertLogs('restaurant.views', level='ERROR'):
+            response = self.log_in()
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.client.session['_auth_user_id'], str(self.user.pk))
+
+    def race(self, change):
+        """Run ``change`` once between the merge's read and its write."""
+        reprice = CartLines.reprice
+        done = []
+
+        def racing_reprice(lines, prices):
+            if not done:
+                done.append(True)
+                change()
+            return reprice(lines, prices)
+
+        return mock.patch.object(CartLines, 'reprice', autospec=True, side_effect=racing_reprice)
+
+    def test_customer_cart_created_meanwhile_is_merged_into(self):
+        guest = Cart.objects.create(session_key='guest', items=[{'id': self.fries.id, 'price': '3.50', 'quantity': 1}])
+
+        with self.race(lambda: Cart.objects.create(session_key='other-tab', user=self.user, items=[
+            {'id': self.burger.id, 'price': '12.50', 'quantity': 1},
+        ])):
+            cart = merge_session_cart(self.user, guest.session_key)
+
+        self.assertEqual(cart.session_key, 'other-tab')
+        self.assertEqual({line['id']: line['quantity'] for line in cart.items}, {self.burger.id: 1, self.fries.id: 1})
+        self.assertFalse(Cart.objects.filter(pk=guest.pk).exists())
+
+    def test_guest_changes_made_during_the_merge_are_kept(self):
+        guest = Cart.objects.create(session_key='guest', items=[{'id': self.fries.id, 'price': '3.50', 'quantity': 1}])
+        Cart.objects.create(session_key='own', user=self.user)
+
+        with self.race(lambda: apply_changes(Cart.objects.get(pk=guest.pk), [
+            CartChange('add', item_id=self.burger.id, quantity=2, item={'id': self.burger.id, 'price': '12.50'}),
+        ])):
+            cart = merge_session_cart(self.user, guest.session_key)
+
+        self.assertEqual({line['id']: line['quantity'] for line in cart.items}, {self.fries.id: 1, self.burger.id: 2})
+        self.assertFalse(Cart.objects.filter(pk=guest.pk).exists())
@@ -0,0 +1,130 @@
+"""Tests for postal-code delivery zones and the delivery quote endpoint."""
+
+import os
+import tempfile
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+
+from restaurant.delivery_zones import ZoneIndex, Zone, normalize_postcode
+from restaurant.models import DeliverySettings, DeliveryZone
+from restaurant.orders import OrderBuilder, OrderValidationError
+from restaurant.pricing import ResolvedLine
+from restaurant.settings_cache import get_delivery_zones
+
+
+def zone(country, prefix, name='Zone', distance='2.00', fee='3.00', eta=30):
+    return Zone(name=name, country=country, prefix=prefix, distance_km=Decimal(distance),
+                fee=Decimal(fee), eta_minutes=eta)
+
+
+class ZoneIndexTest(TestCase):
+    def test_longest_prefix_wins(self):
+        index = ZoneIndex([zone('NL', '10', name='Amsterdam'), zone('NL', '1012', name='Centrum')])
+
+        self.assertEqual(index.lookup('1012 AB').name, 'Centrum')
+        self.assertEqual(index.lookup('1015CD').name, 'Amsterdam')
+        self.assertIsNone(index.lookup('3011AA'))
+
+    def test_country_is_part_of_the_key(self):
+        index = ZoneIndex([zone('BE', '1000', name='Brussel')])
+
+        self.assertEqual(index.lookup('1000', 'Belgium').name, 'Brussel')
+        self.assertIsNone(index.lookup('1000', 'Netherlands'))
+
+    def test_normalize_postcode(self):
+        self.assertEqual(normalize_postcode(' 1012 ab '), '1012AB')
+
+
+class DeliveryZoneTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        DeliverySettings.objects.create(delivery_charge_fixed=Decimal('2.50'), delivery_charge_percent=Decimal('10.00'),
+                                        max_delivery_radius=Decimal('5.00'))
+        DeliveryZone.objects.create(name='Centrum', country='NL', postal_prefix='1012',
+                                    distance_km=Decimal('1.50'), delivery_fee=Decimal('1.75'), eta_minutes=25)
+        DeliveryZone.objects.create(name='Far away', country='NL', postal_prefix='1100',
+                                    distance_km=Decimal('9.00'), delivery_fee=Decimal('6.00'), eta_minutes=60)
+
+    def place(self, postal_code, country='Netherlands'):
+        builder = OrderBuilder(order_type='delivery', guest_name='Guest', guest_phone='+31600000000',
+                               delivery_address='Damrak 1', delivery_city='Amsterdam',
+                               delivery_postal_code=postal_code, delivery_country=country)
+        builder.add_line(ResolvedLine(menu_item_id=None, name='Dish', unit_price=Decimal('20.00'), quantity=1))
+        return builder.save()
+
+
+class OrderZoneTest(DeliveryZoneTestCase):
+    def test_zone_fee_and_eta_are_applied(self):
+        order = self.place('1012 AB')
+
+        # zone fee + 10% of the subtotal
+        self.assertEqual(order.delivery_charge, Decimal('3.75'))
+        self.assertIsNotNone(order.promised_time)
+
+    def test_unknown_postal_code_is_rejected(self):
+        with self.assertRaisesMessage(OrderValidationError, 'We do not deliver to this postal code'):
+            self.place('3011 AA')
+
+    def test_zone_beyond_radius_is_rejected(self):
+        with self.assertRaisesMessage(OrderValidationError, 'outside our delivery radius'):
+            self.place('1100 AA')
+
+    def test_without_zones_the_flat_charge_applies(self):
+        DeliveryZone.objects.all().delete()
+
+        order = self.place('3011 AA')
+
+        self.assertEqual(order.delivery_charge, Decimal('4.50'))
+
+    def test_zone_changes_supersede_the_cached_index(self):
+        self.assertEqual(len(get_delivery_zones()), 2)
+
+        DeliveryZone.objects.filter(postal_prefix='1100').first().delete()
+
+        self.assertEqual(len(get_delivery_zones()), 1)
+
+
+class DeliveryQuoteApiTest(DeliveryZoneTestCase):
+    def test_quote_for_deliverable_postal_code(self):
+        response = Client().get('/api/delivery/quote/', {'postal_code': '1012ab', 'subtotal': '20.00'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'deliverable': True, 'zone': 'Centrum', 'distance_km': '1.50',
+            'delivery_charge': '3.75', 'eta_minutes': 25,
+        })
+
+    def test_quote_outside_zones(self):
+        data = Client().get('/api/delivery/quote/', {'postal_code': '3011AA'}).json()
+
+        self.assertFalse(data['deliverable'])
+
+    def test_quote_requires_postal_code(self):
+        response = Client().get('/api/delivery/quote/')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_quote_rejects_bad_subtotal(self):
+        response = Client().get('/api/delivery/quote/', {'postal_code': '1012AB', 'subtotal': 'abc'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class LoadDeliveryZonesCommandTest(TestCase):
+    def test_loads_and_updates_zones(self):
+        DeliveryZone.objects.create(name='Old', country='NL', postal_prefix='1012',
+                                    distance_km=Decimal('1.00'), delivery_fee=Decimal('1.00'))
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as handle:
+            handle.write('country,postal_prefix,name,distance_km,delivery_fee,eta_minutes\n')
+            handle.write('NL,1012,Centrum,1.50,1.75,25\n')
+            handle.write('Belgium,1000,Brussel,4.00,4.50,45\n')
+        self.addCleanup(os.unlink, handle.name)
+
+        call_command('load_delivery_zones', handle.name, stdout=open(os.devnull, 'w'))
+
+        self.assertEqual(DeliveryZone.objects.count(), 2)
+        self.assertEqual(DeliveryZone.objects.get(postal_prefix='1012').name, 'Centrum')
+        self.assertEqual(DeliveryZone.objects.get(postal_prefix='1000').country, 'BE')
@@ -0,0 +1,90 @@
+"""Tests for Idempotency-Key handling on POST /api/orders/create/."""
+
+import hashlib
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from restaurant import idempotency
+from restaurant.models import MenuItem, Order
+
+
+class CreateOrderIdempotencyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.dish = MenuItem.objects.create(name="Stew", price=Decimal("18.00"), category="main_courses")
+
+    def payload(self, **overrides):
+        data = {
+            "order_type": "seated",
+            "payment_method": "cash",
+            "guest_name": "Table Guest",
+            "guest_phone": "+31612345678",
+            "table_number": 4,
+            "items": [{"id": self.dish.id, "quantity": 1}],
+        }
+        data.update(overrides)
+        return json.dumps(data)
+
+    def post(self, body, key=None):
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post("/api/orders/create/", body, content_type="application/json", **headers)
+
+    def test_retry_replays_original_response_without_queries(self):
+        body = self.payload()
+        first = self.post(body, key="checkout-1")
+
+        with self.assertNumQueries(0):
+            second = self.post(body, key="checkout-1")
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        body = self.payload()
+        self.post(body)
+        self.post(body)
+
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_different_keys_create_separate_orders(self):
+        body = self.payload()
+        self.post(body, key="checkout-1")
+        self.post(body, key="checkout-2")
+
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_key_reuse_with_different_body_is_rejected(self):
+        self.post(self.payload(), key="checkout-1")
+
+        response = self.post(self.payload(table_number=9), key="checkout-1")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_rejected_request_can_be_corrected_under_same_key(self):
+        response = self.post(self.payload(table_number=None), key="checkout-1")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.post(self.payload(), key="checkout-1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_in_flight_duplicate_gets_conflict(self):
+        body = self.payload()
+        # Another worker has claimed the key and is still creating the order.
+        cache_key = idempotency.CACHE_KEY.format(
+            path="/api/orders/create/", key=hashlib.sha256(b"checkout-1").hexdigest()
+        )
+        cache.set(cache_key, (hashlib.sha256(body.encode()).hexdigest(), idempotency.PENDING, b"", ""))
+
+        response = self.post(body, key="checkout-1")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
@@ -0,0 +1,106 @@
+"""Tests for the kitchen change feed (GET /api/kitchen/changes/)."""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from django.utils import timezone
+
+from restaurant import kitchen, pagination
+from restaurant.models import Order, OrderItem
+
+
+class ChangeFeedTest(TestCase):
+    def make_order(self, minutes_ago, status="pending", lines=1):
+        order = Order.objects.create(order_type="seated", guest_name="Guest", table_number=1, status=status)
+        for i in range(lines):
+            OrderItem.objects.create(order=order, item_name=f"Dish {i}", item_price=Decimal("5.00"), quantity=i + 1)
+        stamp = timezone.now() - timedelta(minutes=minutes_ago)
+        Order.objects.filter(pk=order.pk).update(updated_at=stamp)
+        return order
+
+    def test_cursor_roundtrip(self):
+        stamp = timezone.now()
+        self.assertEqual(pagination.decode_cursor(pagination.encode_cursor(stamp, 42)), (stamp, 42))
+
+    def test_bad_cursor(self):
+        for cursor in ("abc", "1-2-3", "x-1"):
+            with self.subTest(cursor=cursor), self.assertRaises(pagination.CursorError):
+                kitchen.changes_since(cursor)
+
+    def test_initial_call_returns_open_orders_with_items(self):
+        open_order = self.make_order(10, lines=2)
+        self.make_order(9, status="completed")
+
+        feed = kitchen.changes_since()
+
+        self.assertEqual([o["id"] for o in feed["orders"]], [open_order.id])
+        self.assertEqual(feed["orders"][0]["items"], [["Dish 0", 1, ""], ["Dish 1", 2, ""]])
+        self.assertFalse(feed["more"])
+
+    def test_only_changes_after_cursor_are_returned(self):
+        self.make_order(10)
+        cursor = kitchen.changes_since()["cursor"]
+        self.assertEqual(kitchen.changes_since(cursor)["orders"], [])
+
+        changed = self.make_order(5)
+        order = Order.objects.get(pk=changed.pk)
+        order.status = "preparing"
+        order.save()
+
+        feed = kitchen.changes_since(cursor)
+        self.assertEqual([(o["id"], o["status"]) for o in feed["orders"]], [(changed.id, "preparing")])
+
+    def test_cursor_pages_through_ties(self):
+        orders = [self.make_order(10) for _ in range(3)]
+        Order.objects.update(updated_at=timezone.now() - timedelta(minutes=10))
+
+        first = kitchen.changes_since(limit=2)
+        second = kitchen.changes_since(first["cursor"], limit=2)
+
+        self.assertTrue(first["more"])
+        returned = [o["id"] for o in first["orders"] + second["orders"]]
+        self.assertEqual(returned, [o.id for o in orders])
+
+    def test_recent_changes_are_resent_until_settled(self):
+        recent = Order.objects.create(order_type="seated", guest_name="Guest", table_number=1)
+
+        cursor = kitchen.changes_since()["cursor"]
+
+        self.assertEqual([o["id"] for o in kitchen.changes_since(cursor)["orders"]], [recent.id])
+
+    def test_query_count_is_constant(self):
+        for _ in range(5):
+            self.make_order(10, lines=3)
+
+        with self.assertNumQueries(2):
+            kitchen.changes_since()
+
+
+class ChangeFeedEndpointTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.staff = User.objects.create_user("kitchen", password="pw", is_staff=True)
+
+    def test_requires_staff(self):
+        response = self.client.get("/api/kitchen/changes/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_returns_feed(self):
+        Order.objects.create(order_type="pickup", guest_name="Pickup Guest")
+        self.client.force_login(self.staff)
+
+        response = self.client.get("/api/kitchen/changes/")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["orders"][0]["guest"], "Pickup Guest")
+        self.assertIn("cursor", data)
+        self.assertEqual(response["Cache-Control"], "no-store")
+
+    def test_bad_parameters(self):
+        self.client.force_login(self.staff)
+
+        self.assertEqual(self.client.get("/api/kitchen/changes/?since=nope").status_code, 400)
+        self.assertEqual(self.client.get("/api/kitchen/changes/?limit=lots").status_code, 400)
@@ -0,0 +1,78 @@
+"""Tests for the versioned menu catalog endpoint (GET /api/menu/)."""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.utils import translation
+
+from restaurant.models import MenuItem
+
+
+class MenuCatalogAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.soup = MenuItem.objects.create(
+            name="Soup", description="Tomato", price=Decimal("6.50"), category="appetizers"
+        )
+        self.stew = MenuItem.objects.create(name="Stew", price=Decimal("18.00"), category="main_courses")
+
+    def tearDown(self):
+        # Requests under /nl/ leave Dutch active on this thread.
+        translation.activate("en")
+
+    def test_returns_active_menu(self):
+        response = self.client.get("/api/menu/")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["language"], "en")
+        self.assertEqual([item["name"] for item in data["items"]], ["Soup", "Stew"])
+        self.assertEqual(data["items"][0]["price"], "6.50")
+        self.assertEqual(data["categories"]["appetizers"], [self.soup.id])
+        self.assertEqual(data["categories"]["main_courses"], [self.stew.id])
+
+    def test_translated_catalog_per_language(self):
+        self.stew.set_current_language("nl")
+        self.stew.name = "Stoofvlees"
+        self.stew.save()
+
+        data = self.client.get("/nl/api/menu/").json()
+
+        self.assertEqual(data["language"], "nl")
+        self.assertIn("Stoofvlees", [item["name"] for item in data["items"]])
+
+    def test_sends_etag(self):
+        response = self.client.get("/api/menu/")
+
+        self.assertTrue(response.has_header("ETag"))
+        self.assertIn("no-cache", response["Cache-Control"])
+
+    def test_etag_differs_per_language(self):
+        en = self.client.get("/api/menu/")["ETag"]
+        nl = self.client.get("/nl/api/menu/")["ETag"]
+
+        self.assertNotEqual(en, nl)
+
+    def test_repeat_request_returns_304_without_queries(self):
+        etag = self.client.get("/api/menu/")["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/menu/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_menu_change_invalidates_etag(self):
+        etag = self.client.get("/api/menu/")["ETag"]
+
+        self.soup.price = Decimal("7.00")
+        self.soup.save()
+
+        response = self.client.get("/api/menu/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["items"][0]["price"], "7.00")
+
+    def test_rejects_post(self):
+        response = self.client.post("/api/menu/")
+        self.assertEqual(response.status_code, 405)
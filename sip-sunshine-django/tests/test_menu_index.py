@@ -0,0 +1,104 @@
+"""Tests for the cached menu name index and the order line autocomplete."""
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from restaurant.menu_index import build_menu_name_index, get_menu_name_index
+from restaurant.models import MenuItem, Order, OrderItem
+
+
+class MenuNameIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.soup = MenuItem.objects.create(name="Tomato Soup", price=Decimal("6.00"), category="appetizers")
+        self.stew = MenuItem.objects.create(name="Beef Stew", price=Decimal("18.00"), category="main_courses")
+        self.old = MenuItem.objects.create(name="Old Soup", price=Decimal("5.00"), category="appetizers", is_active=False)
+
+    def test_names_per_language(self):
+        self.stew.set_current_language("nl")
+        self.stew.name = "Stoofvlees"
+        self.stew.save()
+
+        self.assertEqual(build_menu_name_index("nl").label(self.stew.pk), "Stoofvlees")
+        self.assertEqual(build_menu_name_index("en").label(self.stew.pk), "Beef Stew")
+        self.assertEqual(build_menu_name_index("nl").label(self.soup.pk), "Tomato Soup")
+
+    def test_search_matches_words_including_inactive_items(self):
+        index = build_menu_name_index("en")
+
+        self.assertEqual(index.search("soup"), [self.soup.pk, self.old.pk])
+        self.assertEqual(index.search("SOUP tom"), [self.soup.pk])
+        self.assertEqual(index.search("soup", limit=1), [self.soup.pk])
+
+    def test_cached_until_menu_changes(self):
+        get_menu_name_index("en")
+        with self.assertNumQueries(0):
+            get_menu_name_index("en")
+
+        self.soup.set_current_language("en")
+        self.soup.name = "Pumpkin Soup"
+        self.soup.save()
+
+        self.assertEqual(get_menu_name_index("en").label(self.soup.pk), "Pumpkin Soup")
+
+
+class OrderAdminMenuWidgetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        self.order = Order.objects.create(order_type="pickup", guest_name="Guest")
+
+    def add_menu(self, count):
+        start = MenuItem.objects.count()
+        items = [
+            MenuItem.objects.create(name=f"Dish {start + i}", price=Decimal("5.00"), category="appetizers")
+            for i in range(count)
+        ]
+        for item in items[:2]:
+            OrderItem.objects.create(order=self.order, menu_item=item, item_name=item.name, item_price=item.price)
+
+    def count_queries(self, url):
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_order_change_page_does_not_grow_with_menu(self):
+        url = f"/admin/restaurant/order/{self.order.pk}/change/"
+        self.add_menu(3)
+        small, _ = self.count_queries(url)
+        self.add_menu(30)
+        large, response = self.count_queries(url)
+
+        self.assertEqual(small, large)
+        self.assertContains(response, "admin-autocomplete")
+        self.assertContains(response, ">Dish 0</option>")
+        self.assertNotContains(response, ">Dish 5</option>")
+
+    def test_order_item_change_page_uses_autocomplete(self):
+        self.add_menu(5)
+        line = OrderItem.objects.filter(order=self.order).first()
+
+        response = self.client.get(f"/admin/restaurant/orderitem/{line.pk}/change/")
+
+        self.assertContains(response, "admin-autocomplete")
+        self.assertNotContains(response, ">Dish 4</option>")
+
+    def test_autocomplete_searches_the_index(self):
+        self.add_menu(3)
+        MenuItem.objects.create(name="Tomato Soup", price=Decimal("6.00"), category="appetizers")
+
+        response = self.client.get(
+            "/admin/autocomplete/",
+            {"term": "soup", "app_label": "restaurant", "model_name": "orderitem", "field_name": "menu_item"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["text"] for r in response.json()["results"]], ["Tomato Soup"])
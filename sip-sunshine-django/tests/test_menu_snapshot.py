@@ -0,0 +1,92 @@
+"""Menu snapshot tests.
+
+The menu page is served from a cached, per-language snapshot that is rebuilt
+only when a MenuItem or one of its translations changes.
+"""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from restaurant.menu_snapshot import build_menu_snapshot, get_menu_snapshot
+from restaurant.models import MenuItem
+
+
+class MenuSnapshotGroupingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.soup = MenuItem.objects.create(name="Soup", price=Decimal("6.00"), category="appetizers")
+        self.stew = MenuItem.objects.create(name="Stew", price=Decimal("18.00"), category="main_courses")
+        self.fries = MenuItem.objects.create(name="Fries", price=Decimal("4.00"), category="Side")
+        self.waffle = MenuItem.objects.create(name="Waffle", price=Decimal("7.50"), category="desserts")
+        self.beer = MenuItem.objects.create(name="Beer", price=Decimal("5.00"), category="drinks")
+        MenuItem.objects.create(name="Hidden", price=Decimal("1.00"), category="appetizers", is_active=False)
+
+    def test_groups_items_by_category(self):
+        snapshot = build_menu_snapshot("en")
+
+        self.assertEqual([e.id for e in snapshot.appetizers], [self.soup.id])
+        self.assertEqual({e.id for e in snapshot.main_courses}, {self.stew.id, self.fries.id})
+        self.assertEqual([e.id for e in snapshot.desserts], [self.waffle.id])
+        self.assertEqual([e.id for e in snapshot.beverages], [self.beer.id])
+        self.assertEqual(len(snapshot.items), 5)
+
+    def test_entries_carry_translated_fields(self):
+        self.stew.set_current_language("nl")
+        self.stew.name = "Stoofvlees"
+        self.stew.save()
+
+        nl = {e.id: e.name for e in build_menu_snapshot("nl").items}
+        en = {e.id: e.name for e in build_menu_snapshot("en").items}
+
+        self.assertEqual(nl[self.stew.id], "Stoofvlees")
+        self.assertEqual(en[self.stew.id], "Stew")
+        # Missing Dutch translations fall back to English.
+        self.assertEqual(nl[self.soup.id], "Soup")
+
+    def test_build_uses_constant_queries(self):
+        for i in range(10):
+            MenuItem.objects.create(name=f"Extra {i}", price=Decimal("3.00"), category="appetizers")
+
+        with self.assertNumQueries(2):
+            build_menu_snapshot("en")
+
+
+class MenuSnapshotCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.item = MenuItem.objects.create(name="Burger", price=Decimal("12.50"), category="main_courses")
+
+    def test_cached_snapshot_needs_no_queries(self):
+        get_menu_snapshot("en")
+        with self.assertNumQueries(0):
+            snapshot = get_menu_snapshot("en")
+        self.assertEqual(snapshot.items[0].name, "Burger")
+
+    def test_save_invalidates_snapshot(self):
+        get_menu_snapshot("en")
+        self.item.price = Decimal("14.00")
+        self.item.save()
+
+        self.assertEqual(get_menu_snapshot("en").items[0].price, Decimal("14.00"))
+
+    def test_translation_save_invalidates_snapshot(self):
+        get_menu_snapshot("en")
+        translation = self.item.get_translation("en")
+        translation.name = "Cheeseburger"
+        translation.save()
+
+        self.assertEqual(get_menu_snapshot("en").items[0].name, "Cheeseburger")
+
+    def test_delete_invalidates_snapshot(self):
+        get_menu_snapshot("en")
+        self.item.delete()
+
+        self.assertEqual(get_menu_snapshot("en").items, ())
+
+    def test_menu_page_renders_from_snapshot(self):
+        client = Client()
+        response = client.get("/menu/")
+        self.assertContains(response, "Burger")
+        self.assertContains(response, 'data-item-price="12.50"')
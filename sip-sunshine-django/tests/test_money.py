@@ -0,0 +1,50 @@
+"""Tests for the integer-cent money helpers."""
+
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+
+from restaurant.models import Cart, DeliverySettings, Order
+from restaurant.money import from_cents, order_totals, percent_of, round_money, tax_cents, to_cents
+
+
+class MoneyTest(SimpleTestCase):
+    def test_to_cents_accepts_every_input_type(self):
+        self.assertEqual(to_cents(Decimal('12.50')), 1250)
+        self.assertEqual(to_cents('3.5'), 350)
+        self.assertEqual(to_cents(0.1), 10)
+        self.assertEqual(to_cents(7), 700)
+        self.assertEqual(to_cents(None), 0)
+
+    def test_to_cents_rejects_garbage(self):
+        for value in ('abc', 'NaN', [1]):
+            with self.assertRaises(ValueError):
+                to_cents(value)
+
+    def test_from_cents_has_two_places(self):
+        self.assertEqual(str(from_cents(1250)), '12.50')
+        self.assertEqual(str(round_money(Decimal('36.3000000000'))), '36.30')
+
+    def test_rounding_is_half_to_even(self):
+        self.assertEqual(tax_cents(1250), 262)  # 2.625
+        self.assertEqual(tax_cents(1750), 368)  # 3.675
+        self.assertEqual(percent_of(-1250, 21), -262)
+        self.assertEqual(percent_of(2000, Decimal('12.50')), 250)
+
+    def test_order_totals(self):
+        totals = order_totals([1250, 350], [2, 3])
+
+        self.assertEqual((totals.subtotal, totals.tax, totals.total), (3550, 746, 4296))
+        self.assertEqual(totals.as_decimals()['total_price'], Decimal('42.96'))
+
+
+class MoneyPathsTest(TestCase):
+    def test_order_cart_and_delivery_round_alike(self):
+        order = Order(order_type='pickup', subtotal=Decimal('12.50'), delivery_charge=Decimal('2.50'))
+        cart = Cart(session_key='money', items=[{'id': 1, 'price': '12.50', 'quantity': 1}])
+        cart.save()
+        settings = DeliverySettings(delivery_charge_fixed=Decimal('2.50'), delivery_charge_percent=Decimal('21.00'))
+
+        self.assertEqual(order.calculate_total(), Decimal('17.62'))
+        self.assertEqual(cart.get_total(), Decimal('15.12'))
+        self.assertEqual(settings.calculate_delivery_charge(Decimal('12.50')), Decimal('5.12'))
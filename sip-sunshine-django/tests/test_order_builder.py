@@ -0,0 +1,129 @@
+"""Tests for the bulk order builder (restaurant.orders)."""
+
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from restaurant.models import DeliverySettings, MenuItem, Order, OrderItem
+from restaurant.orders import OrderBuilder, OrderValidationError
+from restaurant.pricing import ResolvedLine, get_price_map
+
+
+def make_line(index, price="10.00", quantity=1):
+    return ResolvedLine(
+        menu_item_id=None, name=f"Line {index}", unit_price=Decimal(price), quantity=quantity
+    )
+
+
+class OrderBuilderTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def build(self, **fields):
+        defaults = {"guest_name": "Guest", "guest_phone": "+31612345678", "order_type": "seated"}
+        defaults.update(fields)
+        return OrderBuilder(**defaults)
+
+    def test_totals_computed_from_lines(self):
+        order = self.build().add_lines([make_line(1, "12.50", 2), make_line(2, "3.00")]).save()
+
+        order.refresh_from_db()
+        self.assertEqual(order.subtotal, Decimal("28.00"))
+        self.assertEqual(order.tax, Decimal("5.88"))
+        self.assertEqual(order.delivery_charge, Decimal("0.00"))
+        self.assertEqual(order.total_price, Decimal("33.88"))
+        self.assertEqual(order.items.count(), 2)
+
+    def test_delivery_charge_from_settings(self):
+        DeliverySettings.objects.create(delivery_charge_fixed=Decimal("2.00"), delivery_charge_percent=Decimal("10"))
+        builder = self.build(
+            order_type="delivery",
+            delivery_address="Main St 1",
+            delivery_city="Amsterdam",
+            delivery_postal_code="1012AB",
+        )
+
+        order = builder.add_line(make_line(1, "20.00")).save()
+
+        self.assertEqual(order.delivery_charge, Decimal("4.00"))
+        self.assertEqual(order.total_price, Decimal("28.20"))
+
+    def test_large_order_uses_constant_statements(self):
+        def statements_for(line_count):
+            builder = self.build().add_lines(make_line(i) for i in range(line_count))
+            with CaptureQueriesContext(connection) as queries:
+                builder.save()
+            return len(queries.captured_queries)
+
+        statements_for(1)  # first order of the month also creates its MonthBucket
+        self.assertEqual(statements_for(2), statements_for(20))
+
+    def test_validation_errors_write_nothing(self):
+        cases = [
+            self.build(order_type="takeaway").add_line(make_line(1)),
+            self.build(payment_method="bitcoin").add_line(make_line(1)),
+            self.build(order_type="delivery").add_line(make_line(1)),
+            self.build(),
+            self.build().add_line(make_line(1, quantity=0)),
+        ]
+        for builder in cases:
+            with self.subTest(order_type=builder.order.order_type), self.assertRaises(OrderValidationError):
+                builder.save()
+
+        self.assertFalse(Order.objects.exists())
+
+
+class CreateOrderBulkInsertTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.items = [
+            MenuItem.objects.create(name=f"Dish {i}", price=Decimal("5.00"), category="main_courses")
+            for i in range(20)
+        ]
+        get_price_map()
+
+    def post_order(self, items, **extra):
+        payload = {
+            "order_type": "seated",
+            "payment_method": "cash",
+            "guest_name": "Table Guest",
+            "guest_phone": "+31612345678",
+            "table_number": 3,
+            "items": items,
+        }
+        payload.update(extra)
+        return self.client.post("/api/orders/create/", json.dumps(payload), content_type="application/json")
+
+    def test_line_inserts_are_batched(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_order([{"id": item.id, "quantity": 1} for item in self.items])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(OrderItem.objects.count(), 20)
+        line_inserts = [
+            q["sql"] for q in queries.captured_queries
+            if q["sql"].startswith("INSERT") and "restaurant_orderitem" in q["sql"]
+        ]
+        self.assertEqual(len(line_inserts), 1)
+
+    def test_bad_pickup_time_leaves_no_order(self):
+        response = self.post_order(
+            [{"id": self.items[0].id, "quantity": 1}],
+            order_type="pickup",
+            preferred_pickup_time="not-a-date",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_invalid_order_type_message(self):
+        response = self.post_order([{"id": self.items[0].id, "quantity": 1}], order_type="takeaway")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Invalid order type", response.json()["message"])
+
@@ -0,0 +1,168 @@
+"""Tests for Order optimistic concurrency and the status transition table."""
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from restaurant import order_events
+from restaurant.models import InvalidStatusTransition, Order, OrderConflict, OrderItem, PickupSlot
+from restaurant.order_status import transition_order, transition_orders
+from restaurant.pickup_slots import release_slots
+
+
+class OrderVersionTest(TestCase):
+    def setUp(self):
+        self.order = Order.objects.create(order_type="pickup", guest_name="Guest")
+
+    def test_save_bumps_version(self):
+        self.assertEqual(self.order.version, 1)
+        self.order.guest_phone = "0612345678"
+        self.order.save()
+
+        self.assertEqual(self.order.version, 2)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).version, 2)
+
+    def test_stale_save_fails_instead_of_reverting(self):
+        tablet_a = Order.objects.get(pk=self.order.pk)
+        tablet_b = Order.objects.get(pk=self.order.pk)
+        tablet_a.status = "confirmed"
+        tablet_a.save()
+
+        tablet_b.guest_name = "Renamed"
+        with self.assertRaises(OrderConflict), transaction.atomic():
+            tablet_b.save()
+
+        stored = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((stored.status, stored.guest_name), ("confirmed", "Guest"))
+
+    def test_line_change_makes_older_copies_stale(self):
+        admin_copy = Order.objects.get(pk=self.order.pk)
+        OrderItem.objects.create(order_id=self.order.pk, item_name="Soup", item_price=Decimal("4.50"), quantity=2)
+
+        admin_copy.subtotal = Decimal("1.00")
+        with self.assertRaises(OrderConflict), transaction.atomic():
+            admin_copy.save()
+
+        self.assertEqual(Order.objects.get(pk=self.order.pk).subtotal, Decimal("9.00"))
+
+    def test_holder_of_the_order_stays_current_after_a_line_change(self):
+        OrderItem.objects.create(order=self.order, item_name="Soup", item_price=Decimal("4.50"), quantity=1)
+
+        self.order.guest_phone = "0612345678"
+        self.order.save()
+
+        self.assertEqual(Order.objects.get(pk=self.order.pk).version, 3)
+
+    def test_releasing_a_pickup_slot_bumps_version(self):
+        slot = PickupSlot.objects.create(start=timezone.now(), reserved_items=1, order_count=1)
+        Order.objects.filter(pk=self.order.pk).update(pickup_slot=slot)
+        stale = Order.objects.get(pk=self.order.pk)
+
+        release_slots([self.order.pk])
+
+        stale.guest_name = "Renamed"
+        with self.assertRaises(OrderConflict), transaction.atomic():
+            stale.save()
+
+    def test_save_uses_one_statement(self):
+        order = Order.objects.get(pk=self.order.pk)
+        order.special_requests = "No onions"
+        with self.assertNumQueries(1):
+            order.save()
+
+
+class TransitionOrderTest(TestCase):
+    def setUp(self):
+        self.order = Order.objects.create(order_type="delivery", guest_name="Guest", delivery_address="Street 1")
+
+    def test_follows_the_table(self):
+        for status in ("confirmed", "preparing", "ready", "out_for_delivery", "completed"):
+            transition_order(self.order, status)
+
+        stored = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((stored.status, stored.version), ("completed", 6))
+        self.assertIsNotNone(stored.completed_at)
+
+    def test_rejects_illegal_moves(self):
+        with self.assertRaises(InvalidStatusTransition):
+            transition_order(self.order, "completed")
+        transition_order(self.order, "cancelled")
+        with self.assertRaises(InvalidStatusTransition):
+            transition_order(self.order, "confirmed")
+
+    def test_conflict_fails_fast_with_one_statement(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        transition_order(self.order, "confirmed")
+
+        with CaptureQueriesContext(connection) as queries, self.assertRaises(OrderConflict):
+            transition_order(stale, "cancelled")
+        statements = [q["sql"] for q in queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith("UPDATE"))
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, "confirmed")
+
+    def test_publishes_after_commit(self):
+        before = order_events.notifier.position(self.order.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_order(self.order, "confirmed")
+        self.assertGreater(order_events.notifier.position(self.order.pk), before)
+
+    def test_bulk_transition_bumps_version_so_stale_saves_fail(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        transition_orders(Order.objects.all(), "confirm")
+
+        stale.guest_name = "Renamed"
+        with self.assertRaises(OrderConflict), transaction.atomic():
+            stale.save()
+
+
+class OrderAdminConcurrencyTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        self.order = Order.objects.create(order_type="pickup", guest_name="Guest")
+        self.url = f"/admin/restaurant/order/{self.order.pk}/change/"
+
+    def form_data(self, **changes):
+        response = self.client.get(self.url)
+        form = response.context["adminform"].form
+        data = {}
+        for name, field in form.fields.items():
+            value = form.initial.get(name, field.initial)
+            if value is not None and not isinstance(value, dict):
+                data[name] = value
+        data.update({
+            "payment_details": "{}",
+            "items-TOTAL_FORMS": "0",
+            "items-INITIAL_FORMS": "0",
+            "items-MIN_NUM_FORMS": "0",
+            "items-MAX_NUM_FORMS": "1000",
+        })
+        data.update(changes)
+        return {key: value for key, value in data.items() if value is not None}
+
+    def test_only_allowed_statuses_are_offered(self):
+        form = self.client.get(self.url).context["adminform"].form
+
+        self.assertEqual([value for value, _label in form.fields["status"].choices], ["pending", "confirmed", "cancelled"])
+
+    def test_stale_form_is_refused(self):
+        stale = self.form_data(status="cancelled")
+        transition_order(Order.objects.get(pk=self.order.pk), "confirmed")
+
+        response = self.client.post(self.url, stale)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "changed by someone else")
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, "confirmed")
+
+    def test_current_form_saves(self):
+        response = self.client.post(self.url, self.form_data(status="confirmed"))
+
+        self.assertEqual(response.status_code, 302)
+        stored = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((stored.status, stored.version), ("confirmed", 2))
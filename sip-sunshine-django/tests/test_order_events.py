@@ -0,0 +1,142 @@
+"""Tests for the live order status stream (restaurant.order_events)."""
+
+import json
+import threading
+from unittest import mock
+
+from django.test import Client, TestCase
+
+from restaurant import order_events
+from restaurant.models import Order
+
+
+def parse_event(chunk):
+    data = [line[len("data: "):] for line in chunk.splitlines() if line.startswith("data: ")]
+    return json.loads(data[0]) if data else None
+
+
+class OrderStatusNotifierTest(TestCase):
+    def test_wait_returns_published_change(self):
+        notifier = order_events.OrderStatusNotifier()
+        start = notifier.position(7)
+
+        threading.Timer(0.01, notifier.publish, args=(7, "ready")).start()
+        change = notifier.wait(7, start, timeout=2)
+
+        self.assertEqual(change[1], "ready")
+        self.assertGreater(change[0], start)
+
+    def test_wait_ignores_other_orders(self):
+        notifier = order_events.OrderStatusNotifier()
+        notifier.publish(8, "ready")
+
+        self.assertIsNone(notifier.wait(7, 0, timeout=0.01))
+
+    def test_tracked_orders_are_bounded(self):
+        notifier = order_events.OrderStatusNotifier()
+        notifier.MAX_TRACKED_ORDERS = 3
+        for order_id in range(10):
+            notifier.publish(order_id, "confirmed")
+
+        self.assertEqual(notifier.position(0), 0)
+        self.assertEqual(notifier.position(9), 10)
+
+
+class OrderStatusPublishTest(TestCase):
+    def setUp(self):
+        self.order = Order.objects.create(order_type="seated", guest_name="Guest", table_number=1)
+
+    def test_status_change_is_published_after_commit(self):
+        start = order_events.notifier.position(self.order.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.get(pk=self.order.pk)
+            order.status = "preparing"
+            order.save()
+
+        self.assertEqual(order_events.notifier.wait(self.order.pk, start, timeout=0)[1], "preparing")
+
+    def test_other_saves_are_not_published(self):
+        start = order_events.notifier.position(self.order.pk)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            order = Order.objects.get(pk=self.order.pk)
+            order.special_requests = "Extra napkins"
+            order.save()
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(order_events.notifier.position(self.order.pk), start)
+
+
+class OrderStatusStreamTest(TestCase):
+    def setUp(self):
+        self.order = Order.objects.create(order_type="pickup", guest_name="Guest")
+
+    def open(self, **options):
+        stream = order_events.open_stream(self.order.pk, self.order.status, **options)
+        self.addCleanup(stream.close)
+        return iter(stream)
+
+    def test_sends_current_status_then_transitions(self):
+        events = self.open(heartbeat=1)
+        self.assertEqual(parse_event(next(events))["status"], "pending")
+
+        order_events.publish_status(self.order.pk, "ready")
+
+        self.assertEqual(parse_event(next(events))["status"], "ready")
+
+    def test_heartbeat_picks_up_changes_from_other_workers(self):
+        events = self.open(heartbeat=0.01)
+        next(events)
+
+        self.assertEqual(next(events), ": keep-alive\n\n")
+        Order.objects.filter(pk=self.order.pk).update(status="confirmed")
+        self.assertEqual(parse_event(next(events))["status"], "confirmed")
+
+    def test_stream_ends_at_final_status(self):
+        events = self.open(heartbeat=0.01)
+        next(events)
+
+        order_events.publish_status(self.order.pk, "completed")
+
+        self.assertEqual(parse_event(next(events))["status"], "completed")
+        self.assertEqual(list(events), [])
+
+    def test_stream_ends_after_max_duration(self):
+        events = self.open(heartbeat=0.01, max_duration=0)
+        next(events)
+
+        self.assertEqual(list(events), [])
+
+
+class OrderStatusStreamEndpointTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.order = Order.objects.create(order_type="seated", guest_name="Guest", table_number=2)
+        self.url = f"/api/orders/{self.order.pk}/events/"
+
+    def test_streams_event_stream(self):
+        response = self.client.get(self.url)
+        try:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            self.assertEqual(response["Cache-Control"], "no-cache")
+            first = next(iter(response.streaming_content)).decode()
+            self.assertEqual(parse_event(first)["status"], "pending")
+        finally:
+            response.close()
+
+    def test_unknown_order_is_404(self):
+        self.assertEqual(self.client.get("/api/orders/999999/events/").status_code, 404)
+
+    def test_connections_are_bounded_and_released(self):
+        with mock.patch.object(order_events, "_slots", threading.BoundedSemaphore(1)):
+            first = self.client.get(self.url)
+            rejected = self.client.get(self.url)
+            self.assertEqual(rejected.status_code, 503)
+            self.assertEqual(rejected["Retry-After"], "30")
+
+            first.close()
+            again = self.client.get(self.url)
+            self.assertEqual(again.status_code, 200)
+            again.close()
@@ -0,0 +1,120 @@
+"""Tests for the streaming order export (admin actions and export_orders)."""
+
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.utils import timezone
+
+from restaurant import exports
+from restaurant.models import Order, OrderItem
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.orders = []
+        for i in range(5):
+            order = Order.objects.create(order_type="pickup", guest_name=f"Guest {i}", status="completed")
+            for j in range(i % 3):
+                OrderItem.objects.create(order=order, item_name=f"Dish {j}", item_price=Decimal("3.50"), quantity=j + 1)
+            self.orders.append(order)
+
+    def read_csv(self, text):
+        return list(csv.DictReader(io.StringIO(text)))
+
+    def test_csv_has_one_row_per_line(self):
+        rows = self.read_csv("".join(exports.export_orders(Order.objects.all(), "csv", chunk_size=2)))
+
+        # Orders with 0, 1, 2, 0, 1 lines
+        self.assertEqual(len(rows), 1 + 1 + 2 + 1 + 1)
+        self.assertEqual(sorted({int(row["id"]) for row in rows}), [o.id for o in self.orders])
+        second = [row for row in rows if row["id"] == str(self.orders[2].id)]
+        self.assertEqual([row["line_item_name"] for row in second], ["Dish 0", "Dish 1"])
+        self.assertEqual(second[1]["line_subtotal"], "7.00")
+        self.assertEqual(rows[0]["line_item_name"], "")
+
+    def test_jsonl_nests_items(self):
+        lines = list(exports.export_orders(Order.objects.all(), "jsonl", chunk_size=2))
+
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([r["id"] for r in records], [o.id for o in self.orders])
+        self.assertEqual(len(records[2]["items"]), 2)
+        self.assertEqual(records[2]["total_price"], str(Order.objects.get(pk=self.orders[2].pk).total_price))
+
+    def test_csv_keeps_formulas_as_text(self):
+        order = Order.objects.create(order_type="pickup", guest_name='=HYPERLINK("http://x","y")',
+                                     guest_email="@evil", status="completed")
+        OrderItem.objects.create(order=order, item_name="-1+1", item_price=Decimal("3.50"), quantity=1)
+
+        row = self.read_csv("".join(exports.export_orders(Order.objects.filter(pk=order.pk), "csv")))[0]
+
+        self.assertEqual(row["guest_name"], "'=HYPERLINK(\"http://x\",\"y\")")
+        self.assertEqual((row["guest_email"], row["line_item_name"]), ("'@evil", "'-1+1"))
+        self.assertEqual(row["line_item_price"], "3.50")
+        record = json.loads(next(exports.export_orders(Order.objects.filter(pk=order.pk), "jsonl")))
+        self.assertEqual(record["guest_email"], "@evil")
+
+    def test_queries_per_chunk_are_constant(self):
+        chunks = exports.iter_orders(Order.objects.all(), chunk_size=2)
+        # 3 chunks of orders + 3 line queries + the final empty chunk
+        with self.assertNumQueries(7):
+            self.assertEqual(len(list(chunks)), 5)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            exports.export_orders(Order.objects.all(), "xlsx")
+
+
+class ExportCommandTest(TestCase):
+    def setUp(self):
+        self.recent = Order.objects.create(order_type="pickup", guest_name="Recent")
+        self.old = Order.objects.create(order_type="pickup", guest_name="Old")
+        Order.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=40))
+
+    def test_date_range_to_stdout(self):
+        out = io.StringIO()
+        today = timezone.localdate().isoformat()
+
+        call_command("export_orders", start=today, end=today, stdout=out)
+
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual([row["guest_name"] for row in rows], ["Recent"])
+
+    def test_writes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "orders.jsonl")
+            call_command("export_orders", format="jsonl", output=path, stderr=io.StringIO())
+            with open(path, encoding="utf-8") as handle:
+                self.assertEqual(len(handle.readlines()), 2)
+
+    def test_rejects_bad_options(self):
+        with self.assertRaises(CommandError):
+            call_command("export_orders", month="2024-13")
+        with self.assertRaises(CommandError):
+            call_command("export_orders", start="2024-02-01", end="2024-01-01")
+
+
+class ExportAdminActionTest(TestCase):
+    def test_action_streams_attachment(self):
+        admin_user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        order = Order.objects.create(order_type="pickup", guest_name="Guest")
+        client = Client()
+        client.force_login(admin_user)
+
+        response = client.post(
+            "/admin/restaurant/order/",
+            {"action": "export_csv", "_selected_action": [order.pk]},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        body = b"".join(response.streaming_content).decode()
+        self.assertIn("Guest", body)
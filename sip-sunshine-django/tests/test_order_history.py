@@ -0,0 +1,106 @@
+"""Tests for the keyset-paginated customer order history."""
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+from django.utils import timezone
+
+from restaurant.models import Order
+from restaurant.order_history import get_current_order, get_order_history
+
+
+class OrderHistoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("regular", email="regular@example.com", password="pw")
+        self.other = User.objects.create_user("other", email="other@example.com", password="pw")
+        now = timezone.now()
+        self.orders = []
+        for i in range(5):
+            order = Order.objects.create(
+                order_type="pickup", guest_name="Regular", user=self.user, status="completed"
+            )
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=i))
+            self.orders.append(order)
+        Order.objects.create(order_type="pickup", guest_name="Other", user=self.other)
+
+    def test_pages_newest_first_without_gaps(self):
+        first = get_order_history(self.user, limit=2)
+        second = get_order_history(self.user, first.next_cursor, limit=2)
+        third = get_order_history(self.user, second.next_cursor, limit=2)
+
+        ids = [o.id for o in first.items + second.items + third.items]
+        self.assertEqual(ids, [o.id for o in self.orders])
+        self.assertIsNone(third.next_cursor)
+
+    def test_same_timestamp_ties_are_not_lost(self):
+        Order.objects.filter(user=self.user).update(created_at=timezone.now())
+
+        first = get_order_history(self.user, limit=3)
+        second = get_order_history(self.user, first.next_cursor, limit=3)
+
+        self.assertEqual(len({o.id for o in first.items + second.items}), 5)
+
+    def test_deep_page_uses_no_offset(self):
+        page = get_order_history(self.user, limit=2)
+
+        with self.assertNumQueries(1) as queries:
+            get_order_history(self.user, page.next_cursor, limit=2)
+
+        self.assertNotIn("OFFSET", queries.captured_queries[0]["sql"].upper())
+
+    def test_current_order_is_latest_active(self):
+        self.assertIsNone(get_current_order(self.user))
+
+        active = Order.objects.create(order_type="pickup", guest_name="Regular", user=self.user, status="preparing")
+
+        self.assertEqual(get_current_order(self.user), active)
+
+
+class ProfileOrdersViewTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user("regular", email="regular@example.com", password="pw")
+        for _ in range(25):
+            Order.objects.create(order_type="pickup", guest_name="Regular", user=self.user, status="completed")
+        # A stranger's guest order with the same email is not history of this account.
+        Order.objects.create(order_type="pickup", guest_name="Guest", guest_email="regular@example.com")
+        self.client.force_login(self.user)
+
+    def test_profile_shows_first_page_and_link(self):
+        response = self.client.get("/auth/profile/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["orders"]), 20)
+        self.assertIsNotNone(response.context["next_cursor"])
+
+        response = self.client.get(f"/auth/profile/?cursor={response.context['next_cursor']}")
+        self.assertEqual(len(response.context["orders"]), 5)
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_profile_shows_current_order(self):
+        active = Order.objects.create(order_type="delivery", guest_name="Regular", user=self.user, status="confirmed")
+
+        response = self.client.get("/auth/profile/")
+
+        self.assertEqual(response.context["current_order"], active)
+
+    def test_bad_cursor_redirects_to_first_page(self):
+        response = self.client.get("/auth/profile/?cursor=garbage")
+        self.assertRedirects(response, "/auth/profile/")
+
+    def test_json_variant(self):
+        data = self.client.get("/api/profile/orders/?limit=10").json()
+
+        self.assertEqual(len(data["orders"]), 10)
+        self.assertIn("tracking_url", data["orders"][0])
+
+        seen = [o["id"] for o in data["orders"]]
+        while data["next_cursor"]:
+            data = self.client.get(f"/api/profile/orders/?limit=10&cursor={data['next_cursor']}").json()
+            seen += [o["id"] for o in data["orders"]]
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_json_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get("/api/profile/orders/").status_code, 401)
@@ -0,0 +1,116 @@
+"""Server-side pricing tests for POST /api/orders/create/."""
+
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from restaurant.models import DeliverySettings, MenuItem, Order, OrderItem
+from restaurant.pricing import PricingError, get_price_map, resolve_line_items
+
+
+class PriceMapTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.burger = MenuItem.objects.create(name="Burger", price=Decimal("12.50"), category="main_courses")
+        self.hidden = MenuItem.objects.create(
+            name="Old Dish", price=Decimal("9.00"), category="main_courses", is_active=False
+        )
+
+    def test_warm_map_needs_no_queries(self):
+        get_price_map()
+        with self.assertNumQueries(0):
+            prices = get_price_map()
+        self.assertEqual(prices[self.burger.id].price, Decimal("12.50"))
+
+    def test_menu_change_refreshes_map(self):
+        get_price_map()
+        self.burger.price = Decimal("13.00")
+        self.burger.save()
+
+        self.assertEqual(get_price_map()[self.burger.id].price, Decimal("13.00"))
+
+    def test_resolve_ignores_client_price_and_name(self):
+        lines = resolve_line_items([{"id": self.burger.id, "name": "Free", "price": 0.01, "quantity": 2}])
+
+        self.assertEqual(lines[0].name, "Burger")
+        self.assertEqual(lines[0].unit_price, Decimal("12.50"))
+        self.assertEqual(lines[0].subtotal, Decimal("25.00"))
+
+    def test_resolve_uses_requested_language(self):
+        self.burger.set_current_language("nl")
+        self.burger.name = "Hamburger NL"
+        self.burger.save()
+
+        self.assertEqual(resolve_line_items([{"id": self.burger.id}], language="nl")[0].name, "Hamburger NL")
+        self.assertEqual(resolve_line_items([{"id": self.burger.id}], language="fr")[0].name, "Burger")
+
+    def test_resolve_rejects_unknown_and_inactive_items(self):
+        with self.assertRaises(PricingError):
+            resolve_line_items([{"id": 999999, "quantity": 1}])
+        with self.assertRaises(PricingError):
+            resolve_line_items([{"id": self.hidden.id, "quantity": 1}])
+        with self.assertRaises(PricingError):
+            resolve_line_items([{"name": "No id", "price": 5, "quantity": 1}])
+
+    def test_resolve_rejects_bad_quantities(self):
+        for quantity in (0, -1, 1.5, "two", None, True):
+            with self.subTest(quantity=quantity), self.assertRaises(PricingError):
+                resolve_line_items([{"id": self.burger.id, "quantity": quantity}])
+
+
+class CreateOrderPricingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        DeliverySettings.objects.create()
+        self.items = [
+            MenuItem.objects.create(name=f"Dish {i}", price=Decimal("10.00") + i, category="main_courses")
+            for i in range(10)
+        ]
+
+    def post_order(self, items):
+        payload = {
+            "order_type": "seated",
+            "payment_method": "cash",
+            "guest_name": "Table Guest",
+            "guest_phone": "+31612345678",
+            "table_number": 4,
+            "items": items,
+        }
+        return self.client.post("/api/orders/create/", json.dumps(payload), content_type="application/json")
+
+    def test_client_prices_are_ignored(self):
+        response = self.post_order([{"id": self.items[0].id, "name": "Cheap", "price": 0.5, "quantity": 3}])
+
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get(id=response.json()["order_id"])
+        self.assertEqual(order.subtotal, Decimal("30.00"))
+        line = OrderItem.objects.get(order=order)
+        self.assertEqual(line.item_name, "Dish 0")
+        self.assertEqual(line.item_price, Decimal("10.00"))
+        self.assertEqual(line.menu_item_id, self.items[0].id)
+
+    def test_unknown_item_is_rejected(self):
+        response = self.post_order([{"id": 424242, "name": "Ghost", "price": 1, "quantity": 1}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()["success"])
+        self.assertFalse(Order.objects.exists())
+
+    def test_warm_catalog_issues_no_menu_queries(self):
+        get_price_map()
+        lines = [{"id": item.id, "quantity": 1} for item in self.items]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_order(lines)
+
+        self.assertEqual(response.status_code, 200)
+        menu_selects = [
+            q["sql"] for q in queries.captured_queries
+            if q["sql"].startswith("SELECT") and "restaurant_menuitem" in q["sql"]
+        ]
+        self.assertEqual(menu_selects, [])
@@ -0,0 +1,134 @@
+"""Tests for the stored, incrementally maintained Order totals."""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.test import TestCase
+
+from restaurant.models import Order, OrderConflict, OrderItem
+
+
+class OrderTotalsTest(TestCase):
+    def setUp(self):
+        self.order = Order.objects.create(order_type="seated", guest_name="Guest", table_number=2)
+
+    def add_line(self, price="10.00", quantity=1, order=None):
+        return OrderItem.objects.create(
+            order=order or self.order, item_name="Dish", item_price=Decimal(price), quantity=quantity
+        )
+
+    def stored(self):
+        return Order.objects.get(pk=self.order.pk)
+
+    def test_adding_lines_updates_totals(self):
+        self.add_line("12.50", 2)
+        self.add_line("3.00", 1)
+
+        order = self.stored()
+        self.assertEqual(order.subtotal, Decimal("28.00"))
+        self.assertEqual(order.tax, Decimal("5.88"))
+        self.assertEqual(order.total_price, Decimal("33.88"))
+        self.assertEqual(order.item_count, 2)
+        self.assertEqual(order.quantity_sum, 3)
+        # The instance the lines were attached to is kept in step too.
+        self.assertEqual(self.order.total_price, Decimal("33.88"))
+
+    def test_changing_a_line_applies_the_difference(self):
+        line = self.add_line("10.00", 1)
+        self.add_line("5.00", 1)
+
+        line = OrderItem.objects.get(pk=line.pk)
+        line.quantity = 3
+        line.save()
+
+        order = self.stored()
+        self.assertEqual(order.subtotal, Decimal("35.00"))
+        self.assertEqual(order.quantity_sum, 4)
+        self.assertEqual(order.item_count, 2)
+
+    def test_moving_a_line_between_orders(self):
+        other = Order.objects.create(order_type="seated", guest_name="Other", table_number=3)
+        line = self.add_line("8.00", 2)
+
+        line.order = other
+        line.save()
+
+        self.assertEqual(self.stored().subtotal, Decimal("0.00"))
+        self.assertEqual(self.stored().item_count, 0)
+        other.refresh_from_db()
+        self.assertEqual(other.subtotal, Decimal("16.00"))
+        self.assertEqual(other.quantity_sum, 2)
+
+    def test_deleting_lines_updates_totals(self):
+        first = self.add_line("10.00", 2)
+        self.add_line("4.00", 1)
+
+        first.delete()
+        self.assertEqual(self.stored().subtotal, Decimal("4.00"))
+
+        OrderItem.objects.filter(order=self.order).delete()
+        order = self.stored()
+        self.assertEqual(order.subtotal, Decimal("0.00"))
+        self.assertEqual(order.total_price, Decimal("0.00"))
+        self.assertEqual((order.item_count, order.quantity_sum), (0, 0))
+
+    def test_deleting_the_order_cascades_cleanly(self):
+        self.add_line()
+
+        self.order.delete()
+
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_status_only_save_skips_recomputation(self):
+        self.add_line("10.00", 1)
+        order = self.stored()
+
+        with self.assertNumQueries(1):
+            order.status = "preparing"
+            order.save()
+
+    def test_status_save_does_not_clobber_concurrent_line_changes(self):
+        stale = self.stored()
+        self.add_line("10.00", 1)
+
+        # The line change bumped the version: the stale copy must reload
+        stale.status = "confirmed"
+        with self.assertRaises(OrderConflict), transaction.atomic():
+            stale.save()
+        order = self.stored()
+        order.status = "confirmed"
+        order.save()
+
+        order = self.stored()
+        self.assertEqual(order.status, "confirmed")
+        self.assertEqual(order.subtotal, Decimal("10.00"))
+        self.assertEqual(order.item_count, 1)
+
+    def test_item_counts_need_no_queries(self):
+        self.add_line("10.00", 2)
+        self.add_line("10.00", 3)
+        order = self.stored()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(order.get_item_count(), 2)
+            self.assertEqual(order.get_item_quantity_sum(), 5)
+
+    def test_changing_delivery_charge_recomputes_total(self):
+        self.add_line("10.00", 1)
+        order = self.stored()
+
+        order.delivery_charge = Decimal("2.50")
+        order.save()
+
+        self.assertEqual(self.stored().total_price, Decimal("14.60"))
+
+    def test_changing_the_subtotal_recomputes_tax(self):
+        self.add_line("10.00", 1)
+        order = self.stored()
+
+        order.subtotal = Decimal("20.00")
+        order.save()
+
+        order = self.stored()
+        self.assertEqual(order.tax, Decimal("4.20"))
+        self.assertEqual(order.total_price, Decimal("24.20"))
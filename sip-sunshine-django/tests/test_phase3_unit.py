@@ -218,13 +218,13 @@ class APICreateOrderTest(TestCase):
         
         order = Order.objects.get(id=result['order_id'])
         
-        # Verify calculations
-        # Subtotal = 10 * 2 = 20
-        self.assertEqual(order.subtotal, Decimal('20.00'))
-        # Tax = 20 * 0.21 = 4.20
-        self.assertEqual(order.tax, Decimal('4.20'))
-        # Total = 20 + 4.20 = 24.20
-        self.assertEqual(order.total_amount, Decimal('24.20'))
+        # Verify calculations (menu price wins over the client-sent 10.00)
+        # Subtotal = 12.50 * 2 = 25
+        self.assertEqual(order.subtotal, Decimal('25.00'))
+        # Tax = 25 * 0.21 = 5.25
+        self.assertEqual(order.tax, Decimal('5.25'))
+        # Total = 25 + 5.25 = 30.25
+        self.assertEqual(order.total_amount, Decimal('30.25'))
 
 
 class APIGetOrderTest(TestCase):
@@ -0,0 +1,188 @@
+"""Tests for the kitchen-capacity-aware pickup slot scheduler."""
+
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase
+from django.utils import timezone
+
+from restaurant.models import DeliverySettings, MenuItem, Order, OrderItem, PickupSlot
+from restaurant.order_status import transition_order
+from restaurant.orders import OrderBuilder
+from restaurant.pickup_slots import PickupSlotUnavailable, available_slots, occupancy
+from restaurant.pricing import ResolvedLine
+
+
+def tomorrow_at(hour, minute=0):
+    day = timezone.localdate() + timedelta(days=1)
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class PickupSlotTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        occupancy.clear()
+        DeliverySettings.objects.create(
+            estimated_pickup_time=15, pickup_slot_minutes=15, pickup_slot_capacity=5,
+            pickup_start_time=time(11, 0), pickup_end_time=time(22, 0),
+        )
+
+    def place(self, quantity, preferred=None):
+        builder = OrderBuilder(order_type="pickup", guest_name="Guest", guest_phone="+31600000000",
+                               preferred_pickup_time=preferred)
+        builder.add_line(ResolvedLine(menu_item_id=None, name="Dish", unit_price=Decimal("5.00"), quantity=quantity))
+        with self.captureOnCommitCallbacks(execute=True):
+            return builder.save()
+
+
+class ReserveSlotTest(PickupSlotTestCase):
+    def test_orders_fill_a_slot_then_move_on(self):
+        first = self.place(3, tomorrow_at(12))
+        second = self.place(2, tomorrow_at(12))
+        third = self.place(1, tomorrow_at(12))
+
+        self.assertEqual(first.promised_time, tomorrow_at(12))
+        self.assertEqual(second.promised_time, tomorrow_at(12))
+        self.assertEqual(third.promised_time, tomorrow_at(12, 15))
+        slot = PickupSlot.objects.get(start=tomorrow_at(12))
+        self.assertEqual((slot.reserved_items, slot.order_count), (5, 2))
+
+    def test_large_order_gets_an_empty_slot(self):
+        self.place(1, tomorrow_at(12))
+
+        big = self.place(9, tomorrow_at(12))
+
+        self.assertEqual(big.promised_time, tomorrow_at(12, 15))
+
+    def test_preferred_time_outside_hours_moves_to_opening(self):
+        order = self.place(1, tomorrow_at(8))
+
+        self.assertEqual(order.promised_time, tomorrow_at(11))
+        self.assertEqual(order.estimated_completion_time, tomorrow_at(11))
+
+    def test_preferred_time_inside_a_slot_is_kept(self):
+        order = self.place(1, tomorrow_at(12, 5))
+
+        self.assertEqual(order.promised_time, tomorrow_at(12, 5))
+        self.assertEqual(order.pickup_slot.start, tomorrow_at(12))
+
+    def test_asap_respects_lead_time(self):
+        order = self.place(1)
+
+        self.assertGreaterEqual(order.promised_time, timezone.now() + timedelta(minutes=15) - timedelta(seconds=5))
+
+    def test_stale_index_cannot_overbook(self):
+        self.place(1, tomorrow_at(12))
+        # Another worker filled the slot; this process has not seen it yet
+        PickupSlot.objects.filter(start=tomorrow_at(12)).update(reserved_items=5)
+
+        order = self.place(1, tomorrow_at(12))
+
+        self.assertEqual(order.promised_time, tomorrow_at(12, 15))
+        self.assertEqual(PickupSlot.objects.get(start=tomorrow_at(12)).reserved_items, 5)
+
+    def test_fully_booked(self):
+        DeliverySettings.objects.update(pickup_start_time=time(0, 0), pickup_end_time=time(0, 15))
+        cache.clear()
+        day_after = tomorrow_at(0) + timedelta(days=1)
+        PickupSlot.objects.create(start=tomorrow_at(0), reserved_items=5)
+        PickupSlot.objects.create(start=day_after, reserved_items=5)
+
+        with self.assertRaises(PickupSlotUnavailable):
+            self.place(1, tomorrow_at(0))
+        self.assertFalse(Order.objects.exists())
+
+    def test_cancelling_releases_capacity(self):
+        kept = self.place(2, tomorrow_at(12))
+        cancelled = self.place(3, tomorrow_at(12))
+
+        transition_order(cancelled, "cancelled")
+        order = Order.objects.get(pk=kept.pk)
+        order.status = "cancelled"
+        order.save()
+
+        slot = PickupSlot.objects.get(start=tomorrow_at(12))
+        self.assertEqual((slot.reserved_items, slot.order_count), (0, 0))
+        self.assertFalse(Order.objects.filter(pickup_slot__isnull=False).exists())
+
+    def test_cancelling_after_an_edit_releases_what_was_reserved(self):
+        order = self.place(2, tomorrow_at(12))
+        OrderItem.objects.create(order=order, item_name="Extra", item_price=Decimal("5.00"), quantity=5)
+
+        transition_order(Order.objects.get(pk=order.pk), "cancelled")
+
+        slot = PickupSlot.objects.get(start=tomorrow_at(12))
+        self.assertEqual((slot.reserved_items, slot.order_count), (0, 0))
+        self.assertEqual(Order.objects.get(pk=order.pk).pickup_load, 0)
+
+
+class AvailableSlotsTest(PickupSlotTestCase):
+    def test_lists_remaining_capacity(self):
+        self.place(4, tomorrow_at(12))
+
+        slots = {s["start"]: s for s in available_slots(2, tomorrow_at(0).date())}
+
+        noon = slots[tomorrow_at(12).isoformat()]
+        self.assertEqual((noon["remaining"], noon["available"]), (1, False))
+        self.assertTrue(slots[tomorrow_at(12, 15).isoformat()]["available"])
+        self.assertEqual(len(slots), 44)
+
+    def test_rolled_back_checkout_leaves_no_load(self):
+        day = tomorrow_at(0).date()
+        available_slots(1, day)
+        builder = OrderBuilder(order_type="pickup", guest_name="Guest", guest_phone="+31600000000",
+                               preferred_pickup_time=tomorrow_at(12))
+        builder.add_line(ResolvedLine(menu_item_id=None, name="Dish", unit_price=Decimal("5.00"), quantity=4))
+
+        try:
+            with transaction.atomic():
+                builder.save()
+                raise RuntimeError("payment failed")
+        except RuntimeError:
+            pass
+
+        noon = {s["start"]: s for s in available_slots(1, day)}[tomorrow_at(12).isoformat()]
+        self.assertEqual(noon["remaining"], 5)
+
+    def test_past_day_has_no_slots(self):
+        self.assertEqual(available_slots(1, timezone.localdate() - timedelta(days=1)), [])
+
+    def test_warm_listing_needs_no_slot_query(self):
+        day = tomorrow_at(0).date()
+        available_slots(1, day)
+
+        with self.assertNumQueries(0):
+            available_slots(1, day)
+
+
+class PickupApiTest(PickupSlotTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.item = MenuItem.objects.create(name="Pizza", price=Decimal("15.00"), category="main_courses")
+
+    def test_create_order_returns_promised_time(self):
+        response = self.client.post("/api/orders/create/", json.dumps({
+            "order_type": "pickup", "payment_method": "cash", "guest_name": "Jane", "guest_phone": "+31600000000",
+            "preferred_pickup_time": tomorrow_at(13).isoformat(),
+            "items": [{"id": self.item.id, "quantity": 2}],
+        }), content_type="application/json")
+
+        data = response.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(data["promised_time"], tomorrow_at(13).isoformat())
+
+    def test_slots_endpoint(self):
+        response = self.client.get(f"/api/pickup/slots/?items=2&date={tomorrow_at(0).date()}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["slots"][0]["start"], tomorrow_at(11).isoformat())
+
+    def test_slots_endpoint_validates(self):
+        self.assertEqual(self.client.get("/api/pickup/slots/?items=0").status_code, 400)
+        self.assertEqual(self.client.get("/api/pickup/slots/?date=tomorrow").status_code, 400)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self.assertEqual(self.client.get(f"/api/pickup/slots/?date={yesterday}").status_code, 400)
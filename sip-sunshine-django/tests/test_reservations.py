@@ -0,0 +1,287 @@
+"""Tests for table reservations and the per-day occupancy index."""
+
+from datetime import date, time
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.forms.models import model_to_dict
+from django.test import Client, SimpleTestCase, TestCase
+
+from restaurant import reservations
+from restaurant.admin import ReservationAdminForm
+from restaurant.models import DiningTable, Reservation, ReservationSettings, TableSlot
+from restaurant.reservations import (
+    DayOccupancy, ReservationUnavailable, SeatingConfig, Table, available_times, sitting_mask, slot_of,
+)
+
+DAY = date(2030, 6, 14)
+
+
+class DayOccupancyTest(SimpleTestCase):
+    def setUp(self):
+        self.config = SeatingConfig(first_slot=slot_of(time(18, 0)), last_slot=slot_of(time(21, 0)), length=8)
+        self.day = DayOccupancy([Table(1, 4, 1), Table(2, 2, 1), Table(3, 8, 5)], {})
+
+    def test_smallest_fitting_table_comes_first(self):
+        start = slot_of(time(19, 0))
+
+        self.assertEqual(self.day.free_tables(2, start, 8), [2, 1])
+        self.assertEqual(self.day.free_tables(6, start, 8), [3])
+        self.assertEqual(self.day.free_tables(9, start, 8), [])
+
+    def test_sitting_blocks_the_dining_duration(self):
+        self.day.mark(3, slot_of(time(19, 0)), 8)
+
+        starts = self.day.available_starts(6, self.config)
+
+        # 19:00 - 21:00 is taken; a two-hour sitting from 18:00 would overlap it
+        self.assertEqual(starts, [slot_of(time(21, 0))])
+
+    def test_sitting_mask(self):
+        self.assertEqual(sitting_mask(2, 3), 0b11100)
+
+
+class ReserveTableTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reservations.occupancy.clear()
+        ReservationSettings.objects.create(first_seating_time='17:00', last_seating_time='21:00', dining_minutes=120)
+        self.two = DiningTable.objects.create(name='T1', seats=2)
+        self.four = DiningTable.objects.create(name='T2', seats=4)
+
+    def book(self, at, guests=2):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Reservation.objects.create(
+                name='Eva', email='eva@example.com', phone='0612345678',
+                reservation_date=DAY, reservation_time=at, number_of_guests=guests,
+            )
+
+    def change(self, reservation, **fields):
+        reservation = Reservation.objects.get(pk=reservation.pk)
+        for name, value in fields.items():
+            setattr(reservation, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.save()
+        return reservation
+
+    def test_party_gets_the_smallest_table_for_the_whole_sitting(self):
+        reservation = self.book(time(19, 0))
+
+        self.assertEqual(reservation.table, self.two)
+        self.assertEqual(Reservation.objects.get(pk=reservation.pk).table, self.two)
+        self.assertEqual(TableSlot.objects.filter(reservation=reservation).count(), 8)
+
+    def test_overlapping_sittings_share_no_table(self):
+        self.book(time(19, 0))
+        second = self.book(time(20, 0))
+
+        self.assertEqual(second.table, self.four)
+        with self.assertRaises(ReservationUnavailable):
+            self.book(time(19, 30))
+        # The failed claim took no slots and saved no reservation
+        self.assertEqual(TableSlot.objects.count(), 16)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_stale_index_loses_the_race_cleanly(self):
+        available_times(DAY, 2)  # warm the index
+        # Another process seats someone at the small table behind our back
+        other = Reservation.objects.create(
+            name='Bo', email='bo@example.com', phone='1', reservation_date=DAY,
+            reservation_time=time(19, 0), number_of_guests=2, status='cancelled',
+        )
+        TableSlot.objects.bulk_create([
+            TableSlot(table=self.two, reservation=other, date=DAY, slot=slot)
+            for slot in range(slot_of(time(19, 0)), slot_of(time(21, 0)))
+        ])
+
+        reservation = self.book(time(19, 0))
+
+        self.assertEqual(reservation.table, self.four)
+        self.assertEqual(TableSlot.objects.filter(reservation=reservation).count(), 8)
+
+    def test_outside_seating_hours(self):
+        with self.assertRaises(ReservationUnavailable):
+            self.book(time(22, 0))
+
+    def test_available_times(self):
+        self.book(time(19, 0), guests=3)
+
+        times = available_times(DAY, 4)
+
+        self.assertIn(time(17, 0), times)
+        self.assertNotIn(time(18, 0), times)
+        self.assertNotIn(time(20, 45), times)
+        self.assertIn(time(21, 0), times)
+
+    def test_cancelling_frees_the_table(self):
+        reservation = self.book(time(19, 0), guests=4)
+        self.assertNotIn(time(19, 0), available_times(DAY, 4))
+
+        reservation = self.change(reservation, status='cancelled')
+
+        self.assertFalse(TableSlot.objects.exists())
+        self.assertIsNone(Reservation.objects.get(pk=reservation.pk).table)
+        self.assertIn(time(19, 0), available_times(DAY, 4))
+
+    def test_uncancelling_claims_a_table_again(self):
+        first = self.change(self.book(time(19, 0)), status='cancelled')
+        second = self.book(time(19, 0))
+
+        first = self.change(first, status='confirmed')
+
+        self.assertEqual((second.table, first.table), (self.two, self.four))
+        self.assertEqual(TableSlot.objects.filter(reservation=first, table=self.four).count(), 8)
+
+    def test_uncancelling_into_a_full_time_is_refused(self):
+        first = self.change(self.book(time(19, 0)), status='cancelled')
+        self.book(time(19, 0))
+        self.book(time(19, 0))
+
+        with self.assertRaises(ReservationUnavailable):
+            self.change(first, status='confirmed')
+
+        self.assertEqual(Reservation.objects.get(pk=first.pk).status, 'cancelled')
+
+    def test_moving_a_reservation_moves_its_slots(self):
+        reservation = self.book(time(19, 0))
+        next_day = date(2030, 6, 15)
+
+        self.change(reservation, reservation_date=next_day, reservation_time=time(18, 0))
+
+        slots = TableSlot.objects.filter(reservation=reservation)
+        self.assertEqual({slot.date for slot in slots}, {next_day})
+        self.assertEqual(min(slot.slot for slot in slots), slot_of(time(18, 0)))
+        self.assertIn(time(19, 0), available_times(DAY, 2))
+
+    def test_bigger_party_moves_to_a_bigger_table(self):
+        reservation = self.book(time(19, 0))
+
+        reservation = self.change(reservation, number_of_guests=4)
+
+        self.assertEqual(reservation.table, self.four)
+        self.assertEqual(TableSlot.objects.filter(reservation=reservation).count(), 8)
+
+    def test_failed_move_keeps_the_old_seating(self):
+        reservation = self.book(time(19, 0), guests=4)
+        self.book(time(17, 0), guests=4)
+
+        with self.assertRaises(ReservationUnavailable):
+            self.change(reservation, reservation_time=time(17, 30))
+
+        stored = Reservation.objects.get(pk=reservation.pk)
+        self.assertEqual((stored.reservation_time, stored.table), (time(19, 0), self.four))
+        self.assertEqual(TableSlot.objects.filter(reservation=reservation).count(), 8)
+
+    def test_sittings_end_by_midnight(self):
+        ReservationSettings.objects.update(last_seating_time='23:30')
+        cache.clear()
+
+        config = SeatingConfig.current()
+
+        self.assertEqual(config.last_slot + config.length, 96)
+        with self.assertRaises(ReservationUnavailable):
+            self.book(time(23, 30))
+
+    def test_warm_day_needs_no_queries(self):
+        available_times(DAY, 2)
+
+        with self.assertNumQueries(0):
+            available_times(DAY, 4)
+
+    def test_admin_form_refuses_a_move_no_table_can_take(self):
+        reservation = self.book(time(19, 0), guests=4)
+        self.book(time(17, 0), guests=4)
+
+        def form(**fields):
+            instance = Reservation.objects.get(pk=reservation.pk)
+            return ReservationAdminForm({**model_to_dict(instance), **fields}, instance=instance)
+
+        refused = form(reservation_time='17:30')
+        self.assertFalse(refused.is_valid())
+        self.assertIn('No table is available', str(refused.errors))
+        # Its own sitting does not stand in the way
+        self.assertTrue(form(reservation_time='19:15').is_valid())
+
+
+class ReservationSettingsTest(SimpleTestCase):
+    def test_last_sitting_must_end_by_midnight(self):
+        with self.assertRaises(ValidationError):
+            ReservationSettings(first_seating_time=time(17, 0), last_seating_time=time(23, 0), dining_minutes=120).clean()
+        with self.assertRaises(ValidationError):
+            ReservationSettings(first_seating_time=time(21, 0), last_seating_time=time(17, 0), dining_minutes=60).clean()
+        ReservationSettings(first_seating_time=time(17, 0), last_seating_time=time(22, 0), dining_minutes=120).clean()
+
+
+class ReservationViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reservations.occupancy.clear()
+        self.client = Client()
+
+    def post(self, at='19:00', guests='2'):
+        return self.client.post('/reservation/', {
+            'name': 'Eva', 'email': 'eva@example.com', 'phone': '0612345678',
+            'reservation_date': DAY.isoformat(), 'reservation_time': at, 'number_of_guests': guests,
+        })
+
+    def test_without_tables_every_request_is_taken(self):
+        self.post()
+        self.post()
+
+        self.assertEqual(Reservation.objects.count(), 2)
+        self.assertIsNone(Reservation.objects.first().table)
+
+    def test_full_time_is_refused_with_alternatives(self):
+        DiningTable.objects.create(name='T1', seats=2)
+        self.post()
+
+        response = self.post(at='20:00', guests='2')
+
+        self.assertEqual(Reservation.objects.count(), 1)
+        error = [str(message) for message in response.wsgi_request._messages][-1]
+        self.assertIn('No table is available', error)
+        self.assertIn('12:00', error)
+
+    def test_bad_guest_count_is_reported(self):
+        self.post(guests='many')
+
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_past_date_is_refused(self):
+        DiningTable.objects.create(name='T1', seats=2)
+
+        response = self.client.post('/reservation/', {
+            'name': 'Eva', 'email': 'eva@example.com', 'phone': '0612345678',
+            'reservation_date': '2020-06-14', 'reservation_time': '19:00', 'number_of_guests': '2',
+        })
+
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(TableSlot.objects.exists())
+        error = [str(message) for message in response.wsgi_request._messages][-1]
+        self.assertIn('past', error)
+
+
+class ReservationAvailabilityApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reservations.occupancy.clear()
+        self.client = Client()
+
+    def test_times_for_a_party(self):
+        DiningTable.objects.create(name='T1', seats=4)
+        ReservationSettings.objects.create(first_seating_time='18:00', last_seating_time='19:00', dining_minutes=90)
+
+        data = self.client.get('/api/reservations/availability/', {'date': DAY.isoformat(), 'guests': 3}).json()
+
+        self.assertEqual(data['times'], ['18:00', '18:15', '18:30', '18:45', '19:00'])
+        self.assertEqual(self.client.get('/api/reservations/availability/', {
+            'date': DAY.isoformat(), 'guests': 5,
+        }).json()['times'], [])
+
+    def test_bad_query_is_rejected(self):
+        response = self.client.get('/api/reservations/availability/', {'date': '14-06-2030', 'guests': 2})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/reservations/availability/', {
+            'date': '2020-06-14', 'guests': 2,
+        }).status_code, 400)
@@ -0,0 +1,204 @@
+"""Tests for the daily sales rollups and the sales report API."""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.utils import timezone
+
+from restaurant import rollups
+from restaurant.models import MenuItemSalesRollup, Order, OrderItem, RolledUpOrder, SalesRollup
+
+
+def snapshot():
+    sales = sorted(
+        SalesRollup.objects.filter(order_count__gt=0).values_list(
+            "date", "hour", "order_type", "payment_method", "order_count", "item_quantity", "subtotal", "total"
+        )
+    )
+    items = sorted(
+        MenuItemSalesRollup.objects.filter(quantity__gt=0).values_list("date", "item_key", "line_count", "quantity", "revenue")
+    )
+    return sales, items
+
+
+class SalesRollupTest(TestCase):
+    def make_order(self, status="pending", order_type="pickup", lines=(("Soup", "4.50", 2),)):
+        order = Order.objects.create(order_type=order_type, guest_name="Guest", status=status)
+        for name, price, quantity in lines:
+            OrderItem.objects.create(order=order, item_name=name, item_price=Decimal(price), quantity=quantity)
+        return Order.objects.get(pk=order.pk)
+
+    def complete(self, order):
+        order.status = "completed"
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+
+    def test_completing_an_order_adds_it(self):
+        order = self.make_order(lines=(("Soup", "4.50", 2), ("Bread", "2.00", 1)))
+
+        self.complete(order)
+
+        sales = SalesRollup.objects.get()
+        self.assertEqual((sales.order_count, sales.item_quantity), (1, 3))
+        self.assertEqual(sales.subtotal, Decimal("11.00"))
+        self.assertEqual(sales.total, order.total_price)
+        soup = MenuItemSalesRollup.objects.get(item_name="Soup")
+        self.assertEqual((soup.quantity, soup.revenue), (2, Decimal("9.00")))
+
+    def test_reopening_an_order_takes_it_out(self):
+        order = self.make_order()
+        self.complete(order)
+
+        order.status = "preparing"
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+
+        self.assertEqual(SalesRollup.objects.get().order_count, 0)
+        self.assertEqual(MenuItemSalesRollup.objects.get().quantity, 0)
+
+    def test_other_status_changes_are_ignored(self):
+        order = self.make_order()
+        order.status = "preparing"
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+
+        self.assertFalse(SalesRollup.objects.exists())
+
+    def test_rebuild_matches_incremental_rollups(self):
+        for order_type in ("pickup", "delivery", "pickup"):
+            self.complete(self.make_order(order_type=order_type, lines=(("Soup", "4.50", 1), ("Tea", "2.25", 3))))
+        self.make_order()
+        incremental = snapshot()
+
+        rollups.rebuild()
+
+        self.assertEqual(snapshot(), incremental)
+
+    def test_line_edits_on_a_completed_order_follow_through(self):
+        order = self.make_order(lines=(("Soup", "4.50", 2), ("Bread", "2.00", 1)))
+        self.complete(order)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            soup = OrderItem.objects.get(order=order, item_name="Soup")
+            soup.quantity = 3
+            soup.save()
+            OrderItem.objects.get(order=order, item_name="Bread").delete()
+        incremental = snapshot()
+
+        rollups.rebuild()
+
+        self.assertEqual(snapshot(), incremental)
+        self.assertEqual(SalesRollup.objects.get().subtotal, Decimal("13.50"))
+
+    def test_reopening_subtracts_what_was_added(self):
+        order = self.make_order()
+        self.complete(order)
+        # Totals changed behind the signals' back, e.g. by a queryset update
+        Order.objects.filter(pk=order.pk).update(subtotal=Decimal("99.00"))
+
+        order = Order.objects.get(pk=order.pk)
+        order.status = "preparing"
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+
+        sales = SalesRollup.objects.get()
+        self.assertEqual((sales.order_count, sales.subtotal, sales.total), (0, Decimal("0.00"), Decimal("0.00")))
+
+    def test_deleting_a_completed_order_takes_it_out(self):
+        kept = self.make_order()
+        self.complete(kept)
+        order = self.make_order(lines=(("Soup", "4.50", 1),))
+        self.complete(order)
+
+        Order.objects.filter(pk=order.pk).delete()
+
+        self.assertEqual(SalesRollup.objects.get().order_count, 1)
+        self.assertEqual(MenuItemSalesRollup.objects.get().quantity, 2)
+        self.assertFalse(RolledUpOrder.objects.filter(order_id=order.pk).exists())
+
+    def test_rebuild_rewrites_the_recorded_contributions(self):
+        order = self.make_order()
+        self.complete(order)
+        RolledUpOrder.objects.all().delete()
+
+        rollups.rebuild()
+        order.delete()
+
+        self.assertEqual(SalesRollup.objects.get().order_count, 0)
+
+    def test_rebuild_only_touches_the_range(self):
+        self.complete(self.make_order())
+        yesterday = timezone.localdate() - timedelta(days=1)
+        SalesRollup.objects.create(date=yesterday, hour=12, order_type="pickup", payment_method="cash", order_count=7)
+
+        rollups.rebuild(start=timezone.localdate())
+
+        self.assertEqual(SalesRollup.objects.get(date=yesterday).order_count, 7)
+
+    def test_command(self):
+        self.complete(self.make_order())
+        SalesRollup.objects.all().delete()
+        out = StringIO()
+
+        call_command("rebuild_sales_rollups", stdout=out)
+
+        self.assertIn("Rebuilt 1 sales rollup rows", out.getvalue())
+        self.assertEqual(SalesRollup.objects.get().order_count, 1)
+
+    def test_command_rejects_bad_dates(self):
+        with self.assertRaises(CommandError):
+            call_command("rebuild_sales_rollups", start="yesterday")
+        with self.assertRaises(CommandError):
+            call_command("rebuild_sales_rollups", start="2024-02-01", end="2024-01-01")
+
+
+class SalesReportApiTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.staff = User.objects.create_user("manager", password="pw", is_staff=True)
+        today = timezone.localdate()
+        for days_ago, order_type, count in ((0, "pickup", 2), (0, "delivery", 1), (3, "pickup", 4)):
+            SalesRollup.objects.create(
+                date=today - timedelta(days=days_ago), hour=12, order_type=order_type, payment_method="cash",
+                order_count=count, item_quantity=count, subtotal=Decimal("10.00") * count,
+                tax=Decimal("2.10") * count, total=Decimal("12.10") * count,
+            )
+        MenuItemSalesRollup.objects.create(date=today, item_key="name:Soup", item_name="Soup", line_count=3, quantity=5)
+
+    def test_requires_staff(self):
+        self.assertEqual(self.client.get("/api/reports/sales/").status_code, 403)
+
+    def test_groups_by_day(self):
+        self.client.force_login(self.staff)
+
+        data = self.client.get("/api/reports/sales/").json()
+
+        self.assertEqual([row["orders"] for row in data["rows"]], [4, 3])
+        self.assertEqual(data["rows"][1]["total"], "36.30")
+        self.assertEqual(data["top_items"][0]["name"], "Soup")
+
+    def test_groups_by_order_type(self):
+        self.client.force_login(self.staff)
+
+        rows = self.client.get("/api/reports/sales/?group_by=order_type").json()["rows"]
+
+        self.assertEqual({row["order_type"]: row["orders"] for row in rows}, {"delivery": 1, "pickup": 6})
+
+    def test_reads_only_rollups(self):
+        self.client.force_login(self.staff)
+        self.client.get("/api/reports/sales/")
+
+        with self.assertNumQueries(5):  # session, user, rows, top items, item names
+            self.client.get("/api/reports/sales/")
+
+    def test_bad_parameters(self):
+        self.client.force_login(self.staff)
+
+        self.assertEqual(self.client.get("/api/reports/sales/?group_by=week").status_code, 400)
+        self.assertEqual(self.client.get("/api/reports/sales/?start=2024-13-01").status_code, 400)
+        self.assertEqual(self.client.get("/api/reports/sales/?start=2024-02-01&end=2024-01-01").status_code, 400)
+        self.assertEqual(self.client.get("/api/reports/sales/?top=many").status_code, 400)
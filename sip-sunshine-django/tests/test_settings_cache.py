@@ -0,0 +1,113 @@
+"""Tests for the cached settings singletons (restaurant.settings_cache)."""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from restaurant import settings_cache
+from restaurant.models import DeliverySettings, Language, Page, PaymentSettings, SiteSetting
+
+SETTINGS_TABLES = (
+    "restaurant_sitesetting",
+    "restaurant_deliverysettings",
+    "restaurant_paymentsettings",
+    "restaurant_language",
+)
+
+
+class SettingsCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        SiteSetting.objects.all().delete()
+        self.site = SiteSetting.objects.create(site_name="Sip and SunShine", phone="+31 6 1234")
+
+    def test_warm_reads_issue_no_queries(self):
+        settings_cache.get_site_settings()
+        settings_cache.get_delivery_settings()
+        settings_cache.get_active_languages()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(settings_cache.get_site_settings().site_name, "Sip and SunShine")
+            self.assertIsNone(settings_cache.get_delivery_settings())
+            settings_cache.get_active_languages()
+
+    def test_save_invalidates(self):
+        settings_cache.get_site_settings()
+
+        site = SiteSetting.objects.get(pk=self.site.pk)
+        site.site_name = "Renamed"
+        site.save()
+
+        self.assertEqual(settings_cache.get_site_settings().site_name, "Renamed")
+
+    def test_delete_invalidates(self):
+        delivery = DeliverySettings.objects.create(estimated_pickup_time=20)
+        self.assertEqual(settings_cache.get_delivery_settings().estimated_pickup_time, 20)
+
+        delivery.delete()
+
+        self.assertIsNone(settings_cache.get_delivery_settings())
+
+    def test_change_from_another_process_is_picked_up(self):
+        settings_cache.get_site_settings()
+        # Another process saved the row: only the shared version moved.
+        SiteSetting.objects.filter(pk=self.site.pk).update(site_name="Elsewhere")
+        cache.incr(settings_cache.VERSION_KEY.format(name=settings_cache.SITE))
+
+        self.assertEqual(settings_cache.get_site_settings().site_name, "Elsewhere")
+
+    def test_evicted_counter_never_serves_an_old_entry(self):
+        settings_cache.get_site_settings()
+        SiteSetting.objects.filter(pk=self.site.pk).update(site_name="Elsewhere")
+        settings_cache._bump_version(settings_cache.SITE)
+        # The counter is evicted: a freshly seeded version must not be one
+        # the old entry was cached under
+        cache.delete(settings_cache.VERSION_KEY.format(name=settings_cache.SITE))
+
+        self.assertEqual(settings_cache.get_site_settings().site_name, "Elsewhere")
+
+    def test_payment_settings_by_gateway(self):
+        PaymentSettings.objects.create(gateway="stripe", enabled=True)
+
+        self.assertTrue(settings_cache.get_payment_settings("stripe").enabled)
+        self.assertIsNone(settings_cache.get_payment_settings("paypal"))
+
+    def test_languages_follow_activation(self):
+        Language.objects.update_or_create(code="de", defaults={"name": "German", "is_active": True})
+        self.assertIn("de", [lang.code for lang in settings_cache.get_active_languages()])
+
+        german = Language.objects.get(code="de")
+        german.is_active = False
+        german.save()
+
+        self.assertNotIn("de", [lang.code for lang in settings_cache.get_active_languages()])
+
+
+class SettingsConsumersTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        DeliverySettings.objects.create(delivery_charge_fixed=Decimal("3.00"), estimated_delivery_time=45)
+        Page.objects.create(slug="home", template_name="index", title="Home", content="Welcome")
+
+    def test_steady_state_page_render_skips_settings_tables(self):
+        self.client.get("/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/")
+
+        self.assertEqual(response.status_code, 200)
+        touched = [q["sql"] for q in queries.captured_queries if any(t in q["sql"] for t in SETTINGS_TABLES)]
+        self.assertEqual(touched, [])
+
+    def test_delivery_settings_api_reflects_updates(self):
+        self.assertEqual(self.client.get("/api/settings/delivery/").json()["delivery_charge_fixed"], 3.0)
+
+        delivery = DeliverySettings.objects.get()
+        delivery.delivery_charge_fixed = Decimal("4.50")
+        delivery.save()
+
+        self.assertEqual(self.client.get("/api/settings/delivery/").json()["delivery_charge_fixed"], 4.5)
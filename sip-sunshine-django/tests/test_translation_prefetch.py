@@ -0,0 +1,89 @@
+"""Translation prefetch tests.
+
+Parler-backed list views batch-load translations for the active and fallback
+languages, so their query count must not grow with the number of objects.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from restaurant.models import BlogPost, ContentBlock, MenuItem, Page
+
+
+class TranslationPrefetchQuerySetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            item = MenuItem.objects.create(name=f"Dish {i}", price=Decimal("9.00"), category="main_courses")
+            item.set_current_language("nl")
+            item.name = f"Gerecht {i}"
+            item.save()
+
+    def test_loads_active_and_fallback_languages_in_one_query(self):
+        with self.assertNumQueries(2):
+            names = [item.name for item in MenuItem.objects.language("nl").prefetch_translations()]
+        self.assertEqual(names, ["Gerecht 0", "Gerecht 1", "Gerecht 2"])
+
+    def test_missing_translation_uses_prefetched_fallback(self):
+        with self.assertNumQueries(2):
+            names = [item.name for item in MenuItem.objects.language("fr").prefetch_translations()]
+        self.assertEqual(names, ["Dish 0", "Dish 1", "Dish 2"])
+
+
+class ListViewQueryCountTest(TestCase):
+    """Each view must issue the same number of queries for 2 and for 8 objects."""
+
+    def setUp(self):
+        self.client = Client()
+        for slug, template in [("home", "index"), ("about", "about"), ("blog", "blog"), ("info", "page")]:
+            Page.objects.create(slug=slug, template_name=template, title=slug.title(), content="Content")
+        self.add_objects(2)
+
+    def add_objects(self, count):
+        start = MenuItem.objects.count()
+        for i in range(start, start + count):
+            MenuItem.objects.create(name=f"Dish {i}", price=Decimal("10.00"), category="main_courses")
+            ContentBlock.objects.create(key=f"block_{i}", block_type="about", title=f"Block {i}")
+            BlogPost.objects.create(
+                author="Chef",
+                featured_image="blog_posts/post.jpg",
+                is_published=True,
+                published_at=timezone.now() - timedelta(days=i),
+                title=f"Post {i}",
+                slug=f"post-{i}",
+                excerpt="Excerpt",
+                content="Content",
+            )
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url):
+        baseline = self.count_queries(url)
+        self.add_objects(6)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_home_page(self):
+        self.assert_constant_queries("/")
+
+    def test_menu_page(self):
+        self.assert_constant_queries("/menu/")
+
+    def test_blog_list(self):
+        self.assert_constant_queries("/blog/")
+
+    def test_about_page(self):
+        self.assert_constant_queries("/about/")
+
+    def test_cms_page(self):
+        self.assert_constant_queries("/page/info/")